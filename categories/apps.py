@@ -2,4 +2,7 @@ from django.apps import AppConfig
 
 class CategoriesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'categories'
\ No newline at end of file
+    name = 'categories'
+
+    def ready(self):
+        from . import signals  # noqa: F401
\ No newline at end of file
@@ -1,5 +1,10 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.core.cache import cache
+from django.urls import reverse
+from . import tree as tree_module
 from .models import Category
+from .tree import get_tree
+from project.testing import QueryBudgetTestMixin
 
 class CategoryModelTest(TestCase):
     def test_category_creation(self):
@@ -8,4 +13,104 @@ class CategoryModelTest(TestCase):
         
         self.assertEqual(root.name, 'Root')
         self.assertEqual(child.parent, root)
-        self.assertIn(child, root.get_children())
\ No newline at end of file
+        self.assertIn(child, root.get_children())
+
+class CategoryTreeCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.root = Category.objects.create(name='Medicines', slug='medicines')
+        self.child = Category.objects.create(name='Pain Relief', slug='pain-relief', parent=self.root)
+        self.grandchild = Category.objects.create(name='Ibuprofen', slug='ibuprofen', parent=self.child)
+        self.other = Category.objects.create(name='Devices', slug='devices')
+
+    def test_tree_structure(self):
+        tree = get_tree()
+        self.assertEqual([node.slug for node in tree.roots], ['devices', 'medicines'])
+        root = tree.get(self.root.id)
+        self.assertEqual([node.name for node in root.children], ['Pain Relief'])
+        self.assertEqual(
+            [node.id for node in tree.descendants(root)],
+            [self.root.id, self.child.id, self.grandchild.id]
+        )
+        self.assertEqual(tree.ancestors(tree.get(self.grandchild.id)), [root, tree.get(self.child.id)])
+
+    def test_warm_cache_costs_no_queries(self):
+        get_tree()
+        with self.assertNumQueries(0):
+            tree = get_tree()
+        self.assertEqual(len(tree), 4)
+
+    def test_tree_is_shared_through_the_cache(self):
+        get_tree()
+        tree_module._snapshot = None
+        with self.assertNumQueries(0):
+            self.assertEqual(len(get_tree()), 4)
+
+    def test_save_invalidates(self):
+        get_tree()
+        self.other.name = 'Medical Devices'
+        self.other.save()
+        self.assertEqual(get_tree().get(self.other.id).name, 'Medical Devices')
+
+    def test_move_invalidates(self):
+        get_tree()
+        self.child.refresh_from_db()
+        self.other.refresh_from_db()
+        self.child.move_to(self.other)
+        tree = get_tree()
+        self.assertEqual(tree.get(self.child.id).parent.id, self.other.id)
+        self.assertEqual(len(tree.descendants(tree.get(self.other.id))), 3)
+
+    def test_delete_invalidates(self):
+        get_tree()
+        self.child.delete()
+        self.assertEqual([node.id for node in get_tree()], [self.other.id, self.root.id])
+
+    @override_settings(PAGE_CACHE_TIMEOUT=0)
+    def test_home_uses_cached_tree(self):
+        self.client.get(reverse('frontend:home'))
+        # featured products only
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('frontend:home'))
+        self.assertContains(response, 'Pain Relief')
+
+
+class CategoryAPITest(QueryBudgetTestMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.root = Category.objects.create(name='Medicines', slug='medicines')
+        self.child = Category.objects.create(name='Pain Relief', slug='pain-relief', parent=self.root)
+        self.other = Category.objects.create(name='Devices', slug='devices')
+        self.url = reverse('category-list')
+
+    def test_flat_tree(self):
+        response = self.client.get(self.url)
+        self.assertWithinQueryBudget(response)
+        self.assertEqual(response.json(), [
+            {'id': self.other.id, 'name': 'Devices', 'slug': 'devices', 'parent': None, 'level': 0},
+            {'id': self.root.id, 'name': 'Medicines', 'slug': 'medicines', 'parent': None, 'level': 0},
+            {'id': self.child.id, 'name': 'Pain Relief', 'slug': 'pain-relief', 'parent': self.root.id, 'level': 1},
+        ])
+
+    def test_nested_tree(self):
+        data = self.client.get(self.url, {'shape': 'nested'}).json()
+        self.assertEqual([node['slug'] for node in data], ['devices', 'medicines'])
+        self.assertEqual([node['slug'] for node in data[1]['children']], ['pain-relief'])
+        self.assertEqual(data[1]['children'][0]['children'], [])
+
+    def test_invalid_shape(self):
+        self.assertEqual(self.client.get(self.url, {'shape': 'round'}).status_code, 400)
+
+    def test_conditional_get(self):
+        """Test an unchanged tree answers 304 without queries until it changes"""
+        etag = self.client.get(self.url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertNotEqual(self.client.get(self.url, {'shape': 'nested'})['ETag'], etag)
+
+        self.other.name = 'Medical Devices'
+        self.other.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]['name'], 'Medical Devices')
@@ -0,0 +1,125 @@
+"""Cached, versioned snapshot of the category tree.
+
+The whole tree is loaded with one query ordered by ``tree_id, lft`` and
+stored in the cache under a key that includes a version counter. Saving,
+deleting or moving a category bumps the counter (see ``categories.signals``),
+so every process sharing the cache sees the change on its next request.
+Writes that bypass signals (``Category.objects.rebuild()``, queryset
+``update``) must call ``bump_version`` themselves.
+Each process also keeps the last built tree in memory, so a warm request
+costs one cache read for the version and no database queries. A new version
+is loaded by one process while the others wait for its result (see
+``project.cache.get_or_compute``).
+"""
+from project.cache import bump_namespace_version, get_namespace_version, get_or_compute, make_key
+from .models import Category
+
+NAMESPACE = 'categories'
+# Old versions are never read again; let them expire
+TREE_TIMEOUT = 60 * 60 * 24
+FIELDS = ('id', 'name', 'slug', 'parent_id', 'level', 'lft', 'rght', 'tree_id')
+
+_snapshot = None
+
+
+class CategoryNode:
+    def __init__(self, id, name, slug, parent_id, level, lft, rght, tree_id):
+        self.id = id
+        self.name = name
+        self.slug = slug
+        self.parent_id = parent_id
+        self.level = level
+        self.lft = lft
+        self.rght = rght
+        self.tree_id = tree_id
+        self.parent = None
+        self.children = []
+
+    @property
+    def pk(self):
+        return self.id
+
+    def is_leaf_node(self):
+        return self.rght - self.lft == 1
+
+    def get_descendant_count(self):
+        return (self.rght - self.lft - 1) // 2
+
+    def __str__(self):
+        return self.name
+
+    def __repr__(self):
+        return f'<CategoryNode {self.id}: {self.name}>'
+
+
+class CategoryTree:
+    """Category nodes in tree order with parent/children links"""
+
+    def __init__(self, rows, version=None):
+        self.version = version
+        self.nodes = [CategoryNode(**row) for row in rows]
+        self.by_id = {node.id: node for node in self.nodes}
+        self.position = {node.id: i for i, node in enumerate(self.nodes)}
+        self.roots = []
+        for node in self.nodes:
+            parent = self.by_id.get(node.parent_id)
+            if parent is None:
+                self.roots.append(node)
+            else:
+                node.parent = parent
+                parent.children.append(node)
+
+    def __iter__(self):
+        return iter(self.nodes)
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def __getitem__(self, index):
+        return self.nodes[index]
+
+    def get(self, category_id):
+        try:
+            return self.by_id.get(int(category_id))
+        except (TypeError, ValueError):
+            return None
+
+    def descendants(self, node, include_self=True):
+        # Nodes are ordered by (tree_id, lft), so a subtree is contiguous
+        start = self.position[node.id]
+        end = start + node.get_descendant_count() + 1
+        return self.nodes[start if include_self else start + 1:end]
+
+    def ancestors(self, node, include_self=False):
+        chain = [node] if include_self else []
+        parent = node.parent
+        while parent is not None:
+            chain.append(parent)
+            parent = parent.parent
+        chain.reverse()
+        return chain
+
+
+def get_version():
+    return get_namespace_version(NAMESPACE)
+
+
+def bump_version():
+    """Invalidate the cached tree, and fragments keyed on its version, everywhere"""
+    bump_namespace_version(NAMESPACE)
+
+
+def load_rows():
+    return list(Category.objects.order_by('tree_id', 'lft').values(*FIELDS))
+
+
+def get_tree():
+    global _snapshot
+    version = get_version()
+    snapshot = _snapshot
+    if snapshot is not None and snapshot.version == version:
+        return snapshot
+
+    rows = get_or_compute(make_key(NAMESPACE, 'tree', version), load_rows, TREE_TIMEOUT)
+    _snapshot = CategoryTree(rows, version)
+    return _snapshot
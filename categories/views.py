@@ -1,11 +1,59 @@
+from django.utils.cache import get_conditional_response, patch_cache_control
 from rest_framework import generics
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
-from .models import Category
+from project.cache import get_or_compute, make_key
+from .tree import NAMESPACE, TREE_TIMEOUT, get_tree
+
+SHAPES = ('flat', 'nested')
+
+
+def _node_data(node):
+    return {
+        'id': node.id,
+        'name': node.name,
+        'slug': node.slug,
+        'parent': node.parent_id,
+        'level': node.level,
+    }
+
+
+def flat_tree(tree):
+    return [_node_data(node) for node in tree]
+
+
+def nested_tree(tree):
+    def build(node):
+        data = _node_data(node)
+        data['children'] = [build(child) for child in node.children]
+        return data
+    return [build(root) for root in tree.roots]
+
 
 class CategoryListView(generics.ListAPIView):
-    queryset = Category.objects.all()
-    
+    """The whole category tree, in tree order.
+
+    ``shape=flat`` (default) lists every category with ``parent`` and
+    ``level``; ``shape=nested`` nests ``children`` under each root. The
+    output is cached per tree version, which is also the ETag, so polling
+    clients get a 304 until a category changes.
+    """
+
     def list(self, request, *args, **kwargs):
-        categories = self.get_queryset()
-        data = [{'id': cat.id, 'name': cat.name, 'slug': cat.slug} for cat in categories]
-        return Response(data)
\ No newline at end of file
+        shape = request.query_params.get('shape', 'flat')
+        if shape not in SHAPES:
+            raise ValidationError({'shape': f"Choose from {', '.join(SHAPES)}"})
+
+        # Warm, the tree costs one cache read for its version
+        tree = get_tree()
+        etag = f'"{tree.version}-{shape}"'
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            build = nested_tree if shape == 'nested' else flat_tree
+            data = get_or_compute(
+                make_key(NAMESPACE, 'api', tree.version, shape), lambda: build(tree), TREE_TIMEOUT
+            )
+            response = Response(data)
+        response['ETag'] = etag
+        patch_cache_control(response, no_cache=True)
+        return response
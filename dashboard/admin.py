@@ -0,0 +1,13 @@
+from django.contrib import admin
+from .models import DashboardStats
+
+@admin.register(DashboardStats)
+class DashboardStatsAdmin(admin.ModelAdmin):
+    list_display = ('total_products', 'total_categories', 'total_orders', 'pending_orders',
+                    'total_customers', 'low_stock_products', 'updated_at')
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from dashboard.stats import recompute
+
+
+class Command(BaseCommand):
+    help = 'Recount the admin dashboard counters from the source tables'
+
+    def handle(self, *args, **options):
+        stats = recompute()
+        for field in ('total_products', 'total_categories', 'total_orders',
+                      'pending_orders', 'total_customers', 'low_stock_products'):
+            self.stdout.write(f'{field}: {getattr(stats, field)}')
+        self.stdout.write(self.style.SUCCESS('Dashboard stats recomputed.'))
@@ -0,0 +1,17 @@
+from django.db import models
+
+class DashboardStats(models.Model):
+    """Single row of admin dashboard counters, see ``dashboard.stats``"""
+    total_products = models.IntegerField(default=0)
+    total_categories = models.IntegerField(default=0)
+    total_orders = models.IntegerField(default=0)
+    pending_orders = models.IntegerField(default=0)
+    total_customers = models.IntegerField(default=0)
+    low_stock_products = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name_plural = 'dashboard stats'
+    
+    def __str__(self):
+        return f"Dashboard stats as of {self.updated_at}"
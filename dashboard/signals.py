@@ -0,0 +1,111 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from categories.models import Category
+from orders.models import Order
+from products.models import Product
+from . import stats
+
+User = get_user_model()
+
+
+def _remember_previous(sender, instance, update_fields, field):
+    # Only updates that may touch ``field`` need its stored value
+    instance._dashboard_previous = None
+    if instance._state.adding or instance.pk is None:
+        return
+    if update_fields is not None and field not in update_fields:
+        return
+    instance._dashboard_previous = (
+        sender.objects.filter(pk=instance.pk).values_list(field, flat=True).first()
+    )
+
+
+def _previous(instance):
+    return instance.__dict__.pop('_dashboard_previous', None)
+
+
+@receiver(pre_save, sender=Product)
+def remember_product_stock(sender, instance, raw=False, update_fields=None, **kwargs):
+    if not raw:
+        _remember_previous(sender, instance, update_fields, 'stock_quantity')
+
+
+@receiver(post_save, sender=Product)
+def count_saved_product(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    low_stock = stats.is_low_stock(instance.stock_quantity)
+    if created:
+        stats.adjust(total_products=1, low_stock_products=int(low_stock))
+        return
+    previous = _previous(instance)
+    if previous is not None:
+        stats.adjust(low_stock_products=int(low_stock) - int(stats.is_low_stock(previous)))
+
+
+@receiver(post_delete, sender=Product)
+def count_deleted_product(sender, instance, **kwargs):
+    stats.adjust(
+        total_products=-1,
+        low_stock_products=-int(stats.is_low_stock(instance.stock_quantity)),
+    )
+
+
+@receiver(pre_save, sender=Order)
+def remember_order_status(sender, instance, raw=False, update_fields=None, **kwargs):
+    if not raw:
+        _remember_previous(sender, instance, update_fields, 'status')
+
+
+@receiver(post_save, sender=Order)
+def count_saved_order(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    pending = instance.status == 'pending'
+    if created:
+        stats.adjust(total_orders=1, pending_orders=int(pending))
+        return
+    previous = _previous(instance)
+    if previous is not None:
+        stats.adjust(pending_orders=int(pending) - int(previous == 'pending'))
+
+
+@receiver(post_delete, sender=Order)
+def count_deleted_order(sender, instance, **kwargs):
+    stats.adjust(total_orders=-1, pending_orders=-int(instance.status == 'pending'))
+
+
+@receiver(post_save, sender=Category)
+def count_saved_category(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        stats.adjust(total_categories=1)
+
+
+@receiver(post_delete, sender=Category)
+def count_deleted_category(sender, instance, **kwargs):
+    stats.adjust(total_categories=-1)
+
+
+@receiver(pre_save, sender=User)
+def remember_user_role(sender, instance, raw=False, update_fields=None, **kwargs):
+    if not raw:
+        _remember_previous(sender, instance, update_fields, 'is_customer')
+
+
+@receiver(post_save, sender=User)
+def count_saved_user(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        stats.adjust(total_customers=int(instance.is_customer))
+        return
+    previous = _previous(instance)
+    if previous is not None:
+        stats.adjust(total_customers=int(instance.is_customer) - int(previous))
+
+
+@receiver(post_delete, sender=User)
+def count_deleted_user(sender, instance, **kwargs):
+    stats.adjust(total_customers=-int(instance.is_customer))
@@ -0,0 +1,73 @@
+"""Denormalized counters for the admin dashboard.
+
+The dashboard reads one ``DashboardStats`` row instead of counting the
+products, categories, orders and users tables on every view. Signal
+handlers (``dashboard.signals``) apply deltas as rows are created, changed
+or deleted; checkout reports low-stock crossings itself because it
+decrements stock with a queryset ``update``. Deltas are applied after
+commit as single ``UPDATE ... SET n = n + delta`` statements so they never
+hold the stats row lock inside a checkout transaction.
+
+Writes that bypass signals (``bulk_create``, queryset ``update``/``delete``,
+raw SQL) leave the counters stale until ``recompute`` runs, which the
+``recompute_dashboard_stats`` command does.
+"""
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from categories.models import Category
+from orders.models import Order
+from products.models import LOW_STOCK_THRESHOLD, Product
+from .models import DashboardStats
+
+STATS_ID = 1
+
+
+def is_low_stock(stock_quantity):
+    return stock_quantity < LOW_STOCK_THRESHOLD
+
+
+def compute():
+    """Count every counter from the source tables, four aggregate queries"""
+    User = get_user_model()
+    low_stock = Q(stock_quantity__lt=LOW_STOCK_THRESHOLD)
+    return {
+        **Product.objects.aggregate(
+            total_products=Count('id'),
+            low_stock_products=Count('id', filter=low_stock),
+        ),
+        **Order.objects.aggregate(
+            total_orders=Count('id'),
+            pending_orders=Count('id', filter=Q(status='pending')),
+        ),
+        'total_categories': Category.objects.count(),
+        'total_customers': User.objects.filter(is_customer=True).count(),
+    }
+
+
+def recompute():
+    stats, _ = DashboardStats.objects.update_or_create(id=STATS_ID, defaults=compute())
+    return stats
+
+
+def get_stats():
+    """Return the stats row, computing it on first use"""
+    return DashboardStats.objects.filter(id=STATS_ID).first() or recompute()
+
+
+def _apply(deltas):
+    updated = DashboardStats.objects.filter(id=STATS_ID).update(
+        updated_at=timezone.now(),
+        **{name: F(name) + delta for name, delta in deltas.items()}
+    )
+    if not updated:
+        recompute()
+
+
+def adjust(**deltas):
+    """Add ``deltas`` to the counters once the current transaction commits"""
+    deltas = {name: delta for name, delta in deltas.items() if delta}
+    if deltas:
+        transaction.on_commit(lambda: _apply(deltas))
@@ -0,0 +1,92 @@
+from django.test import TestCase, Client
+from django.core.management import call_command
+from django.urls import reverse
+from decimal import Decimal
+from io import StringIO
+from categories.models import Category
+from products.models import Product
+from orders.models import Order
+from orders.checkout import place_order, OutOfStockError
+from project.testing import QueryBudgetTestMixin
+from .models import DashboardStats
+from .stats import compute, get_stats, recompute
+from django.contrib.auth import get_user_model
+
+User = get_user_model()
+
+
+class DashboardStatsTest(QueryBudgetTestMixin, TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name='Vitamins', slug='vitamins')
+        self.product = self.create_product('VIT001', stock_quantity=12)
+        self.low = self.create_product('VIT002', stock_quantity=3)
+        User.objects.create_user(username='customer', password='testpass123', is_customer=True)
+        recompute()
+
+    def create_product(self, sku, stock_quantity):
+        return Product.objects.create(
+            name=f'Product {sku}',
+            sku=sku,
+            description='Test Description',
+            price=Decimal('2.00'),
+            stock_quantity=stock_quantity
+        )
+
+    def stats(self):
+        stats = DashboardStats.objects.get()
+        return {field: getattr(stats, field) for field in compute()}
+
+    def test_signals_keep_counters_in_sync(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_product('VIT003', stock_quantity=1)
+            self.product.stock_quantity = 5
+            self.product.save()
+            self.low.delete()
+            Category.objects.create(name='Devices', slug='devices')
+            order = Order.objects.create(guest_name='Guest', total_amount=Decimal('1.00'))
+            Order.objects.create(guest_name='Guest', total_amount=Decimal('1.00'))
+            order.status = 'shipped'
+            order.save(update_fields=['status', 'updated_at'])
+            staff = User.objects.create_user(username='staff', password='testpass123')
+            staff.is_customer = True
+            staff.save()
+        self.assertEqual(self.stats(), compute())
+        self.assertEqual(self.stats()['pending_orders'], 1)
+        self.assertEqual(self.stats()['total_customers'], 2)
+
+    def test_checkout_counts_low_stock_crossings(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            place_order([(self.product.id, 3), (self.low.id, 1)])
+        self.assertEqual(self.stats()['low_stock_products'], 2)
+        self.assertEqual(self.stats(), compute())
+
+    def test_rolled_back_changes_are_not_counted(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(OutOfStockError):
+                place_order([(self.product.id, 100)])
+        self.assertEqual(self.stats(), compute())
+
+    def test_unrelated_saves_skip_the_lookup(self):
+        user = User.objects.get(username='customer')
+        with self.assertNumQueries(1):
+            user.save(update_fields=['last_login'])
+
+    def test_recompute_command_fixes_drift(self):
+        Product.objects.bulk_create([Product(sku='BULK', name='Bulk', description='', price=Decimal('1.00'))])
+        self.assertNotEqual(self.stats(), compute())
+        out = StringIO()
+        call_command('recompute_dashboard_stats', stdout=out)
+        self.assertEqual(self.stats(), compute())
+        self.assertIn('total_products: 3', out.getvalue())
+
+    def test_first_use_computes_the_row(self):
+        DashboardStats.objects.all().delete()
+        self.assertEqual(get_stats().total_products, 2)
+
+    def test_dashboard_reads_the_stats_row(self):
+        User.objects.create_user(username='admin', password='adminpass123')
+        client = Client()
+        client.login(username='admin', password='adminpass123')
+        response = client.get(reverse('frontend:admin_dashboard'))
+        self.assertEqual(response.context['stats'].total_products, 2)
+        self.assertWithinQueryBudget(response)
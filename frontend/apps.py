@@ -2,4 +2,7 @@ from django.apps import AppConfig
 
 class FrontendConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'frontend'
\ No newline at end of file
+    name = 'frontend'
+
+    def ready(self):
+        from . import signals  # noqa: F401
\ No newline at end of file
@@ -0,0 +1,32 @@
+"""Async version of the product page, served under ASGI.
+
+``project.asgi`` turns on ``ASYNC_VIEWS``, which routes ``product_detail``
+here instead of ``frontend.views``. It looks the product up with the async
+ORM and builds the same context; the template, which evaluates the lazy
+related products and the signed-in user, is rendered with
+``sync_to_async``.
+
+``home`` and ``product_list`` stay synchronous in both modes: they need
+the category tree, a keyset page and the catalog version, none of which
+has an async API, and a chain of ``sync_to_async`` hops to the one
+thread-sensitive executor only added overhead over Django running the sync
+view in that thread.
+"""
+from asgiref.sync import sync_to_async
+from django.http import Http404
+from django.shortcuts import render
+
+from products.models import Product
+from .page_cache import anonymous_page_cache
+from .views import product_detail_context
+
+render_async = sync_to_async(render)
+
+
+@anonymous_page_cache
+async def product_detail(request, product_id):
+    try:
+        product = await Product.objects.aget(id=product_id, is_active=True)
+    except Product.DoesNotExist:
+        raise Http404('No Product matches the given query.')
+    return await render_async(request, 'frontend/product_detail.html', product_detail_context(product))
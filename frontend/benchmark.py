@@ -0,0 +1,208 @@
+"""Concurrent shopper simulation used by the ``benchmark_checkout`` command.
+
+Each simulated shopper runs in its own thread with its own test client and
+database connection, browses ``product_list``, adds a random product to the
+cart and checks out. Latency and query counts are recorded per endpoint and
+the stock ledger is verified at the end.
+"""
+import math
+import random
+import threading
+import time
+from decimal import Decimal
+
+from django.db import connection
+from django.db.models import Sum
+from django.test import Client
+from django.urls import reverse
+
+from products.models import Product
+from orders.models import OrderItem
+
+SKU_PREFIX = 'BENCH-'
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of ``samples``"""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    rank = max(math.ceil(pct / 100.0 * len(ordered)) - 1, 0)
+    return ordered[rank]
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class EndpointStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = []
+        self.queries = []
+        self.errors = 0
+
+    def record(self, seconds, queries, ok):
+        with self.lock:
+            self.latencies.append(seconds * 1000)
+            self.queries.append(queries)
+            if not ok:
+                self.errors += 1
+
+    def summary(self):
+        count = len(self.latencies)
+        return {
+            'requests': count,
+            'errors': self.errors,
+            'p50_ms': _round(percentile(self.latencies, 50)),
+            'p95_ms': _round(percentile(self.latencies, 95)),
+            'p99_ms': _round(percentile(self.latencies, 99)),
+            'max_ms': _round(max(self.latencies) if count else None),
+            'queries_per_request': _round(sum(self.queries) / count if count else None),
+            'max_queries': max(self.queries) if count else None,
+        }
+
+
+def _round(value):
+    return None if value is None else round(value, 3)
+
+
+def seed_products(count, stock, price=Decimal('5.00')):
+    """Create ``count`` benchmark products with ``stock`` units each"""
+    products = [
+        Product(
+            sku=f'{SKU_PREFIX}{i:06d}',
+            name=f'Benchmark Product {i}',
+            description='Load test product',
+            price=price,
+            stock_quantity=stock,
+        )
+        for i in range(count)
+    ]
+    Product.objects.bulk_create(products)
+    return {p.id: p.stock_quantity for p in Product.objects.filter(sku__startswith=SKU_PREFIX)}
+
+
+def check_stock(initial_stock):
+    """Compare remaining stock plus sold units against the initial stock.
+
+    Returns an entry for every product whose ledger does not balance.
+    """
+    sold = dict(
+        OrderItem.objects.filter(product_id__in=initial_stock.keys())
+        .values_list('product_id')
+        .annotate(total=Sum('quantity'))
+    )
+    remaining = dict(
+        Product.objects.filter(id__in=initial_stock.keys()).values_list('id', 'stock_quantity')
+    )
+    oversold = []
+    for product_id, initial in initial_stock.items():
+        units = sold.get(product_id, 0)
+        if units > initial or remaining.get(product_id, 0) + units != initial:
+            oversold.append({
+                'product_id': product_id,
+                'initial_stock': initial,
+                'sold': units,
+                'remaining': remaining.get(product_id),
+            })
+    return oversold
+
+
+class Shopper(threading.Thread):
+    def __init__(self, index, product_ids, iterations, max_quantity, stats, seed, barrier):
+        super().__init__(name=f'shopper-{index}')
+        self.index = index
+        self.product_ids = product_ids
+        self.iterations = iterations
+        self.max_quantity = max_quantity
+        self.stats = stats
+        self.random = random.Random(seed + index)
+        self.barrier = barrier
+        self.orders = 0
+        self.rejected = 0
+
+    def request(self, endpoint, method, path, data=None):
+        counter = QueryCounter()
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(counter):
+                response = getattr(self.client, method)(path, data or {}, secure=True)
+        except Exception:
+            self.stats[endpoint].record(time.perf_counter() - start, counter.count, False)
+            return None
+        elapsed = time.perf_counter() - start
+        self.stats[endpoint].record(elapsed, counter.count, response.status_code < 400)
+        return response
+
+    def run(self):
+        self.client = Client()
+        checkout_url = reverse('frontend:checkout')
+        try:
+            self.barrier.wait()
+            for _ in range(self.iterations):
+                self.request('product_list', 'get', reverse('frontend:product_list'))
+
+                product_id = self.random.choice(self.product_ids)
+                self.request('add_to_cart', 'post', reverse('frontend:add_to_cart', args=[product_id]), {
+                    'quantity': self.random.randint(1, self.max_quantity),
+                })
+
+                response = self.request('checkout', 'post', checkout_url, {
+                    'customer_name': f'Shopper {self.index}',
+                    'customer_email': f'shopper{self.index}@example.com',
+                })
+                if response is not None and response.status_code == 302:
+                    if '/confirmation/' in response['Location']:
+                        self.orders += 1
+                    else:
+                        # Start over with a fresh session and an empty cart
+                        self.rejected += 1
+                        self.client.cookies.clear()
+        finally:
+            connection.close()
+
+
+def run_benchmark(shoppers=10, iterations=5, products=20, stock=10, max_quantity=3, seed=0):
+    """Run the shopper simulation against the current database.
+
+    Returns a JSON-serializable report.
+    """
+    initial_stock = seed_products(products, stock)
+    product_ids = sorted(initial_stock)
+    stats = {name: EndpointStats() for name in ('product_list', 'add_to_cart', 'checkout')}
+    barrier = threading.Barrier(shoppers)
+
+    threads = [
+        Shopper(i, product_ids, iterations, max_quantity, stats, seed, barrier)
+        for i in range(shoppers)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duration = time.perf_counter() - start
+
+    orders = sum(t.orders for t in threads)
+    oversold = check_stock(initial_stock)
+
+    return {
+        'database': connection.vendor,
+        'shoppers': shoppers,
+        'iterations': iterations,
+        'products': products,
+        'stock_per_product': stock,
+        'seed': seed,
+        'duration_s': _round(duration),
+        'orders': orders,
+        'rejected_checkouts': sum(t.rejected for t in threads),
+        'orders_per_second': _round(orders / duration if duration else 0),
+        'endpoints': {name: s.summary() for name, s in stats.items()},
+        'oversold': oversold,
+    }
@@ -0,0 +1,179 @@
+import secrets
+from decimal import Decimal
+
+from products.models import Product
+from .cart_stores import get_cart_store
+
+CART_TOKEN_SESSION_KEY = 'cart_token'
+
+
+def user_cart_key(user_id):
+    return f'user:{user_id}'
+
+
+def anonymous_cart_key(token):
+    return f'anon:{token}'
+
+
+def get_cart_key(request, create=False):
+    """Return the key of the request's cart, or None if it has none yet.
+
+    Signed-in users' carts are keyed by user id. Anonymous carts get a random
+    token stored in the session once, when the first line is added; cart
+    writes after that leave the session untouched.
+    """
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user_cart_key(user.pk)
+    token = request.session.get(CART_TOKEN_SESSION_KEY)
+    if token is None:
+        if not create:
+            return None
+        token = request.session[CART_TOKEN_SESSION_KEY] = secrets.token_urlsafe(16)
+    return anonymous_cart_key(token)
+
+
+def _product_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class Cart:
+    """Shopping cart as {product_id: quantity}, kept in the ``CART_STORE``.
+
+    The cart is read from the store once, lazily, and with the database
+    store its products come in the same query. Writes go straight to the
+    store one line at a time, and lines pointing at missing or inactive
+    products are pruned when the lines are resolved.
+    """
+
+    def __init__(self, request, store=None):
+        self.request = request
+        self.store = store or get_cart_store()
+        self.key = get_cart_key(request)
+        self._data = None
+        self._products = None
+        self._lines = None
+        self._total = None
+
+    def __len__(self):
+        return len(self.data)
+
+    def __bool__(self):
+        return bool(self.data)
+
+    def __iter__(self):
+        return iter(self.lines)
+
+    @property
+    def data(self):
+        if self._data is None:
+            if self.key is None:
+                self._data, self._products = {}, {}
+            else:
+                self._data, self._products = self.store.load(self.key)
+        return self._data
+
+    def items(self):
+        return self.data.items()
+
+    def quantity(self, product_id):
+        return self.data.get(_product_id(product_id), 0)
+
+    def _write_key(self):
+        if self.key is None:
+            self.key = get_cart_key(self.request, create=True)
+        return self.key
+
+    def set(self, product_id, quantity):
+        product_id = int(product_id)
+        self.store.set(self._write_key(), product_id, quantity)
+        self._update(product_id, quantity)
+
+    def add(self, product_id, quantity):
+        product_id = int(product_id)
+        quantity = self.store.add(self._write_key(), product_id, quantity)
+        self._update(product_id, quantity)
+        return quantity
+
+    def remove(self, product_id):
+        product_id = _product_id(product_id)
+        if product_id is None or self.key is None:
+            return False
+        removed = self.store.remove(self.key, product_id)
+        self._update(product_id, None)
+        return removed
+
+    def clear(self):
+        if self.key is not None:
+            self.store.clear(self.key)
+            # Without a token the visitor gets cached catalog pages again
+            if self.request.session.pop(CART_TOKEN_SESSION_KEY, None):
+                self.key = None
+        self._data, self._products = {}, {}
+        self._invalidate()
+
+    def product_ids(self):
+        return list(self.data)
+
+    def load_products(self):
+        """Return {id: Product} for every active product in the cart"""
+        ids = self.product_ids()
+        if self._products is None:
+            self._products = Product.objects.filter(is_active=True).in_bulk(ids) if ids else {}
+        return {product_id: self._products[product_id] for product_id in ids if product_id in self._products}
+
+    @property
+    def lines(self):
+        if self._lines is None:
+            self._resolve()
+        return self._lines
+
+    @property
+    def total(self):
+        if self._total is None:
+            self._resolve()
+        return self._total
+
+    def _update(self, product_id, quantity):
+        if self._data is not None:
+            if quantity is None:
+                self._data.pop(product_id, None)
+            else:
+                self._data[product_id] = quantity
+        if quantity is not None and self._products is not None and product_id not in self._products:
+            # Products are loaded again the next time the lines are needed
+            self._products = None
+        self._invalidate()
+
+    def _invalidate(self):
+        self._lines = None
+        self._total = None
+
+    def _resolve(self):
+        products = self.load_products()
+        lines = []
+        total = Decimal('0.00')
+        dead = []
+
+        for product_id, quantity in self.data.items():
+            product = products.get(product_id)
+            if product is None:
+                dead.append(product_id)
+                continue
+            subtotal = product.price * quantity
+            lines.append({
+                'product': product,
+                'quantity': quantity,
+                'subtotal': subtotal,
+            })
+            total += subtotal
+
+        for product_id in dead:
+            self.store.remove(self.key, product_id)
+            del self.data[product_id]
+
+        self._lines = lines
+        self._total = total
@@ -0,0 +1,177 @@
+"""Cart storage backends, selected with the ``CART_STORE`` setting.
+
+A store maps a cart key (see ``frontend.cart.user_cart_key`` and
+``anonymous_cart_key``) to ``{product_id: quantity}``. Every write touches a
+single line, and ``add`` increments it atomically in the backend, so a cart
+write costs the same whatever the cart holds and never rewrites the session.
+
+* ``DatabaseCartStore`` keeps one ``CartLine`` row per product, and reads a
+  cart together with its products in one joined query.
+* ``CacheCartStore`` keeps one ``cache.incr`` counter per line plus a list
+  of the cart's product ids, and never hits the database.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import CartLine
+
+
+def get_cart_store():
+    return import_string(settings.CART_STORE)()
+
+
+class BaseCartStore:
+    def get(self, key):
+        """Return ``{product_id: quantity}`` for the cart ``key``"""
+        raise NotImplementedError
+
+    def load(self, key):
+        """Return ``(quantities, products)``; ``products`` is ``{id: Product}``
+        of the active products, or None if the store does not load them"""
+        return self.get(key), None
+
+    def add(self, key, product_id, quantity):
+        """Increment a line and return its new quantity"""
+        raise NotImplementedError
+
+    def set(self, key, product_id, quantity):
+        raise NotImplementedError
+
+    def remove(self, key, product_id):
+        """Delete a line; return whether it existed"""
+        raise NotImplementedError
+
+    def clear(self, key):
+        raise NotImplementedError
+
+    def merge(self, source, target):
+        """Add every line of ``source`` to ``target`` and empty ``source``"""
+        for product_id, quantity in self.get(source).items():
+            self.add(target, product_id, quantity)
+        self.clear(source)
+
+
+class DatabaseCartStore(BaseCartStore):
+    def lines(self, key):
+        return CartLine.objects.filter(cart_key=key)
+
+    def get(self, key):
+        return dict(self.lines(key).values_list('product_id', 'quantity'))
+
+    def load(self, key):
+        quantities, products = {}, {}
+        for line in self.lines(key).select_related('product'):
+            quantities[line.product_id] = line.quantity
+            if line.product.is_active:
+                products[line.product_id] = line.product
+        return quantities, products
+
+    def add(self, key, product_id, quantity):
+        line = self.lines(key).filter(product_id=product_id)
+        increment = {'quantity': F('quantity') + quantity, 'updated_at': timezone.now()}
+        if not line.update(**increment):
+            try:
+                with transaction.atomic():
+                    CartLine.objects.create(cart_key=key, product_id=product_id, quantity=quantity)
+                return quantity
+            except IntegrityError:
+                # A concurrent request created the line first
+                line.update(**increment)
+        return line.values_list('quantity', flat=True).first() or 0
+
+    def set(self, key, product_id, quantity):
+        CartLine.objects.bulk_create(
+            [CartLine(cart_key=key, product_id=product_id, quantity=quantity)],
+            update_conflicts=True,
+            unique_fields=['cart_key', 'product'],
+            update_fields=['quantity', 'updated_at'],
+        )
+
+    def remove(self, key, product_id):
+        deleted, _ = self.lines(key).filter(product_id=product_id).delete()
+        return bool(deleted)
+
+    def clear(self, key):
+        self.lines(key).delete()
+
+    def merge(self, source, target):
+        with transaction.atomic():
+            super().merge(source, target)
+
+    def purge(self, days):
+        """Delete anonymous carts untouched for ``days``; return the line count"""
+        cutoff = timezone.now() - timedelta(days=days)
+        deleted, _ = CartLine.objects.filter(
+            cart_key__startswith='anon:', updated_at__lt=cutoff
+        ).delete()
+        return deleted
+
+
+class CacheCartStore(BaseCartStore):
+    """Lines live in ``CART_CACHE_ALIAS`` for ``CART_CACHE_TIMEOUT`` seconds.
+
+    Increments are atomic on Redis and Memcached. The list of a cart's
+    product ids is rewritten only when a new product is added, so two
+    concurrent adds of different new products to one cart may lose one of
+    them; quantities of existing lines are never lost.
+    """
+
+    def __init__(self, alias=None, timeout=None):
+        self.cache = caches[alias or settings.CART_CACHE_ALIAS]
+        self.timeout = settings.CART_CACHE_TIMEOUT if timeout is None else timeout
+
+    def _line_key(self, key, product_id):
+        return f'cart:{key}:{product_id}'
+
+    def _index_key(self, key):
+        return f'cart:{key}'
+
+    def _product_ids(self, key):
+        return self.cache.get(self._index_key(key)) or []
+
+    def _index(self, key, product_id):
+        product_ids = self._product_ids(key)
+        if product_id not in product_ids:
+            self.cache.set(self._index_key(key), product_ids + [product_id], self.timeout)
+
+    def get(self, key):
+        product_ids = self._product_ids(key)
+        if not product_ids:
+            return {}
+        keys = {self._line_key(key, product_id): product_id for product_id in product_ids}
+        return {keys[line]: quantity for line, quantity in self.cache.get_many(keys).items()}
+
+    def add(self, key, product_id, quantity):
+        product_id = int(product_id)
+        line = self._line_key(key, product_id)
+        if not self.cache.add(line, quantity, self.timeout):
+            try:
+                return self.cache.incr(line, quantity)
+            except ValueError:
+                # Expired between add() and incr()
+                self.cache.set(line, quantity, self.timeout)
+        self._index(key, product_id)
+        return quantity
+
+    def set(self, key, product_id, quantity):
+        product_id = int(product_id)
+        self.cache.set(self._line_key(key, product_id), quantity, self.timeout)
+        self._index(key, product_id)
+
+    def remove(self, key, product_id):
+        product_id = int(product_id)
+        product_ids = self._product_ids(key)
+        if product_id in product_ids:
+            product_ids.remove(product_id)
+            self.cache.set(self._index_key(key), product_ids, self.timeout)
+        return self.cache.delete(self._line_key(key, product_id))
+
+    def clear(self, key):
+        keys = [self._line_key(key, product_id) for product_id in self._product_ids(key)]
+        self.cache.delete_many(keys + [self._index_key(key)])
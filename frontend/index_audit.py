@@ -0,0 +1,146 @@
+"""EXPLAIN the storefront's hot queries and flag full table scans.
+
+Each entry in ``HOT_QUERIES`` builds a query the way the storefront does,
+with placeholder parameters: the catalog pages' queries come from the
+context builders ``frontend.views`` renders with, and the sidebar counts
+from ``category_counts_sql``, so the audit follows the views as they
+change. On PostgreSQL the plans are taken with ``enable_seqscan`` off, so a
+sequential scan in the plan means no index can serve the query at all
+rather than that the table is currently small.
+"""
+import re
+from datetime import datetime, timezone
+from urllib.parse import urlencode
+
+from django.db import connections, transaction
+from django.http import HttpRequest, QueryDict
+
+from categories.models import Category
+from orders.models import Order, OrderItem
+from products.filters import category_counts_sql
+from products.models import LOW_STOCK_THRESHOLD, Product
+from project.pagination import KeysetPaginator, encode_cursor, NEXT
+from .views import home_context, product_detail_context, product_list_context
+
+USER_ID = 1
+CREATED_AT = datetime(2024, 1, 1, tzinfo=timezone.utc)
+SEARCH = 'aspirin'
+
+# The previous page's last row: (name, id) or (created_at, id)
+NAME_CURSOR = encode_cursor(['M', 1], NEXT)
+CREATED_CURSOR = encode_cursor([CREATED_AT, 1], NEXT)
+
+
+def _page(queryset, per_page, cursor=None):
+    return _paginated(KeysetPaginator(queryset, per_page), cursor)
+
+
+def _paginated(paginator, cursor=None):
+    queryset, _ = paginator.page_queryset(cursor)
+    return queryset[:paginator.per_page + 1]
+
+
+class PlaceholderTree:
+    """Stands in for the cached category tree; every id is one placeholder category"""
+    version = 0
+
+    def get(self, category_id):
+        return Category(id=1, tree_id=1, lft=1, rght=2)
+
+    def __iter__(self):
+        return iter(())
+
+    def __getitem__(self, index):
+        return []
+
+
+def _product_list(cursor=None, **params):
+    request = HttpRequest()
+    request.GET = QueryDict(urlencode(params))
+    paginator, _ = product_list_context(request, PlaceholderTree())
+    return _paginated(paginator, cursor)
+
+
+HOT_QUERIES = {
+    'home featured products': lambda: home_context(PlaceholderTree())['featured_products'],
+    'product_list first page': lambda: _product_list(),
+    'product_list next page': lambda: _product_list(NAME_CURSOR),
+    'product_list category': lambda: _product_list(category=1),
+    'product_list search': lambda: _product_list(search=SEARCH),
+    'product_list category search': lambda: _product_list(category=1, search=SEARCH),
+    # (sql, params): raw SQL behind the cached sidebar fragment
+    'product_list category counts': lambda: category_counts_sql(),
+    'product_detail related': lambda: product_detail_context(Product(id=1))['related_products'],
+    'admin_products next page': lambda: _page(
+        Product.objects.order_by('-created_at', '-id'), 20, CREATED_CURSOR
+    ),
+    'admin_dashboard low stock': lambda: Product.objects.filter(
+        stock_quantity__lt=LOW_STOCK_THRESHOLD
+    )[:5],
+    'admin_dashboard recent orders': lambda: Order.objects.order_by('-created_at')[:5],
+    'user_orders next page': lambda: _page(
+        Order.objects.filter(user_id=USER_ID).order_by('-created_at', '-id'), 10, CREATED_CURSOR
+    ),
+    'admin_orders next page': lambda: _page(
+        Order.objects.order_by('-created_at', '-id'), 20, CREATED_CURSOR
+    ),
+    'admin_orders by status': lambda: _page(
+        Order.objects.filter(status='pending').order_by('-created_at', '-id'), 20, CREATED_CURSOR
+    ),
+    'orders API sync': lambda: _page(
+        Order.objects.filter(user_id=USER_ID, updated_at__gte=CREATED_AT).order_by('updated_at', 'id'), 20
+    ),
+    'order items': lambda: OrderItem.objects.filter(order_id__in=[1]),
+}
+# Tables a query reads in full by design, under their name or the alias
+# SQLite reports: the counts aggregate every category link
+EXPECTED_SCANS = {
+    'product_list category counts': {'products_product_categories', 'link'},
+}
+
+FULL_SCAN_PATTERNS = {
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+    'sqlite': re.compile(r'\bSCAN (\w+)$', re.MULTILINE),
+}
+# An index walked end to end only to get its order is a full scan too,
+# unless a LIMIT stops it after the first rows
+INDEX_WALK_PATTERNS = {
+    'sqlite': re.compile(r'\bSCAN (\w+) USING (?:COVERING )?INDEX \w+$', re.MULTILINE),
+}
+
+
+def full_scans(plan, vendor, limited=False):
+    """Return the tables ``plan`` reads with a full scan"""
+    patterns = [FULL_SCAN_PATTERNS.get(vendor)]
+    if not limited:
+        patterns.append(INDEX_WALK_PATTERNS.get(vendor))
+    tables = set()
+    for pattern in filter(None, patterns):
+        tables.update(pattern.findall(plan))
+    return sorted(tables)
+
+
+def explain(query, using='default'):
+    """EXPLAIN a queryset or an ``(sql, params)`` pair"""
+    connection = connections[using]
+    with transaction.atomic(using=using):
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        if not isinstance(query, tuple):
+            return query.using(using).explain()
+        sql, params = query
+        with connection.cursor() as cursor:
+            cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}', params)
+            return '\n'.join(' '.join(str(column) for column in row) for row in cursor.fetchall())
+
+
+def audit(using='default'):
+    """Yield ``(name, plan, full_scan_tables)`` for every hot query"""
+    vendor = connections[using].vendor
+    for name, build in HOT_QUERIES.items():
+        query = build()
+        plan = explain(query, using)
+        limited = not isinstance(query, tuple) and query.query.high_mark is not None
+        expected = EXPECTED_SCANS.get(name, ())
+        yield name, plan, [table for table in full_scans(plan, vendor, limited) if table not in expected]
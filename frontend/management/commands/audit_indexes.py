@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from frontend.index_audit import audit
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN the hot storefront queries and flag full table scans'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help='Database alias to audit')
+        parser.add_argument('--plans', action='store_true', help='Print every query plan')
+        parser.add_argument(
+            '--fail-on-scan', action='store_true',
+            help='Exit with an error if any query needs a full table scan',
+        )
+
+    def handle(self, *args, **options):
+        flagged = []
+        for name, plan, tables in audit(options['database']):
+            if tables:
+                flagged.append(name)
+                self.stdout.write(self.style.WARNING(f'SCAN  {name}: {", ".join(tables)}'))
+            else:
+                self.stdout.write(f'ok    {name}')
+            if tables or options['plans']:
+                self.stdout.write(''.join(f'        {line}\n' for line in plan.splitlines()))
+
+        if not flagged:
+            self.stdout.write(self.style.SUCCESS('Every hot query is served by an index.'))
+        elif options['fail_on_scan']:
+            raise CommandError(f'{len(flagged)} hot queries need a full table scan')
@@ -0,0 +1,86 @@
+import json
+import os
+import shutil
+import tempfile
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from frontend.benchmark import run_benchmark
+
+
+def _begin_immediate(sender, connection, **kwargs):
+    # Take the write lock when a transaction starts so concurrent checkouts
+    # wait on the busy timeout instead of failing to upgrade a read lock
+    # (what Django 5.1 exposes as OPTIONS['transaction_mode']).
+    if connection.vendor == 'sqlite':
+        connection._start_transaction_under_autocommit = (
+            lambda: connection.cursor().execute('BEGIN IMMEDIATE')
+        )
+
+
+class Command(BaseCommand):
+    help = 'Load test product_list, add_to_cart and checkout with concurrent shoppers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--shoppers', type=int, default=10, help='Concurrent simulated shoppers')
+        parser.add_argument('--iterations', type=int, default=5, help='Checkouts attempted per shopper')
+        parser.add_argument('--products', type=int, default=20, help='Products to seed')
+        parser.add_argument('--stock', type=int, default=10, help='Initial stock per product')
+        parser.add_argument('--max-quantity', type=int, default=3, help='Maximum quantity per cart line')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed')
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout')
+        parser.add_argument(
+            '--noinput', '--no-input', action='store_false', dest='interactive',
+            help='Destroy an existing benchmark database without asking',
+        )
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        test_settings = connection.settings_dict.setdefault('TEST', {})
+        tmp_dir = None
+        if connection.vendor == 'sqlite' and not test_settings.get('NAME'):
+            # In-memory SQLite cannot be shared by concurrent writers
+            tmp_dir = tempfile.mkdtemp()
+            test_settings['NAME'] = os.path.join(tmp_dir, 'benchmark.sqlite3')
+            connection.settings_dict.setdefault('OPTIONS', {}).setdefault('timeout', 30)
+            connection_created.connect(_begin_immediate)
+
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=not options['interactive'], serialize=False,
+        )
+        if connection.vendor == 'sqlite':
+            # Let readers proceed while a checkout holds the write lock
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA journal_mode=WAL')
+        try:
+            report = run_benchmark(
+                shoppers=options['shoppers'],
+                iterations=options['iterations'],
+                products=options['products'],
+                stock=options['stock'],
+                max_quantity=options['max_quantity'],
+                seed=options['seed'],
+            )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+            connection_created.disconnect(_begin_immediate)
+            if tmp_dir:
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+            self.stdout.write(f"Report written to {options['output']}")
+        else:
+            self.stdout.write(output)
+
+        if report['oversold']:
+            raise CommandError(f"Stock oversold for {len(report['oversold'])} product(s)")
+        self.stdout.write(self.style.SUCCESS(
+            f"{report['orders']} orders at {report['orders_per_second']} orders/sec, no overselling"
+        ))
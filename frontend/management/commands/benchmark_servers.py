@@ -0,0 +1,55 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from frontend.server_benchmark import PATHS, SERVERS, ServerError, run_benchmark
+
+
+class Command(BaseCommand):
+    help = 'Compare catalog throughput under gunicorn WSGI workers and uvicorn (ASGI) workers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modes', default='wsgi,asgi', help=f"Comma separated, from {', '.join(SERVERS)}")
+        parser.add_argument('--paths', default=','.join(PATHS), help='Comma separated paths to request')
+        parser.add_argument('--concurrency', type=int, default=50, help='Concurrent client threads')
+        parser.add_argument('--duration', type=float, default=10.0, help='Seconds to load each server')
+        parser.add_argument('--workers', type=int, default=2, help='Server worker processes')
+        parser.add_argument('--port', type=int, default=8100, help='First local port to bind')
+        parser.add_argument(
+            '--page-cache', action='store_true',
+            help="Keep the anonymous page cache on (by default the views themselves are measured)",
+        )
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout')
+
+    def handle(self, *args, **options):
+        modes = [mode.strip() for mode in options['modes'].split(',') if mode.strip()]
+        unknown = [mode for mode in modes if mode not in SERVERS]
+        if unknown or not modes:
+            raise CommandError(f"Unknown modes {unknown}; choose from {', '.join(SERVERS)}")
+        paths = [path.strip() for path in options['paths'].split(',') if path.strip()]
+
+        try:
+            report = run_benchmark(
+                modes=modes,
+                paths=paths,
+                concurrency=options['concurrency'],
+                duration=options['duration'],
+                workers=options['workers'],
+                port=options['port'],
+                page_cache=options['page_cache'],
+            )
+        except ServerError as e:
+            raise CommandError(str(e))
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+            self.stdout.write(f"Report written to {options['output']}")
+        else:
+            self.stdout.write(output)
+
+        for mode, result in report['modes'].items():
+            self.stdout.write(self.style.SUCCESS(
+                f"{mode}: {result['requests_per_second']} requests/sec, {result['errors']} errors"
+            ))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from frontend.cart_stores import get_cart_store
+
+
+class Command(BaseCommand):
+    help = 'Delete anonymous carts that have not been touched for a number of days'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30)
+
+    def handle(self, *args, **options):
+        store = get_cart_store()
+        if not hasattr(store, 'purge'):
+            raise CommandError(f'{type(store).__name__} expires carts by itself')
+        deleted = store.purge(options['days'])
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} cart lines.'))
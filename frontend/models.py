@@ -0,0 +1,21 @@
+from django.db import models
+from products.models import Product
+
+
+class CartLine(models.Model):
+    """One product in a cart; ``cart_key`` is ``user:<id>`` or ``anon:<token>``"""
+    cart_key = models.CharField(max_length=64)
+    product = models.ForeignKey(Product, on_delete=models.CASCADE)
+    quantity = models.PositiveIntegerField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.quantity} x {self.product_id} in {self.cart_key}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['cart_key', 'product'], name='cartline_unique_product'),
+        ]
+        indexes = [
+            models.Index(fields=['updated_at'], name='cartline_updated_idx'),
+        ]
@@ -0,0 +1,106 @@
+"""Full-page cache for anonymous catalog traffic.
+
+``anonymous_page_cache`` serves a stored copy of a catalog page to visitors
+who are not signed in and have no cart, without running the view. Pages are
+keyed on the view, its arguments and the ``category``, ``search``,
+``cursor`` and ``page`` query parameters. Any other parameter bypasses the
+cache, as a page rendered for it could carry it into its links. Keys also
+embed the category tree and catalog versions, so product and category
+changes invalidate every page at once. Stock decrements at checkout do not
+bump the catalog version, so ``PAGE_CACHE_TIMEOUT`` bounds how stale a
+product page's stock level can get.
+
+Every response says ``X-Cache: HIT``, ``MISS`` or ``BYPASS``. Set
+``PAGE_CACHE_TIMEOUT`` to 0 to turn the cache off. Async views are
+decorated the same way; the session, user and cache lookups then run
+through ``sync_to_async``.
+"""
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.cache import cache
+from django.http import HttpResponse
+
+from categories.tree import get_version as tree_version
+from products.cache import catalog_version
+from project.cache import make_key, record
+from .cart import CART_TOKEN_SESSION_KEY
+
+NAMESPACE = 'pages'
+VARY_PARAMS = ('category', 'search', 'cursor', 'page')
+
+
+def is_cacheable(request):
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    if any(param not in VARY_PARAMS for param in request.GET):
+        return False
+    # Pending flash messages would be rendered into the page
+    if request.COOKIES.get(CookieStorage.cookie_name):
+        return False
+    if settings.SESSION_COOKIE_NAME not in request.COOKIES:
+        # Without a session there is no user and no cart to look up
+        return True
+    session = request.session
+    if CART_TOKEN_SESSION_KEY in session or '_messages' in session:
+        return False
+    return not request.user.is_authenticated
+
+
+def page_key(request, view_name, kwargs):
+    params = sorted((name, value) for name in VARY_PARAMS for value in request.GET.getlist(name))
+    return make_key(
+        NAMESPACE, view_name, tree_version(), catalog_version(),
+        repr(sorted(kwargs.items())), repr(params),
+    )
+
+
+def lookup(request, view_name, kwargs):
+    """Return ``(key, cached response)``; the key is None when bypassing"""
+    if not settings.PAGE_CACHE_TIMEOUT or not is_cacheable(request):
+        return None, None
+
+    key = page_key(request, view_name, kwargs)
+    entry = cache.get(key)
+    if entry is None:
+        record(NAMESPACE, 'miss')
+        return key, None
+    record(NAMESPACE, 'hit')
+    content, content_type = entry
+    response = HttpResponse(content, content_type=content_type)
+    response['X-Cache'] = 'HIT'
+    return key, response
+
+
+def store(request, key, response):
+    if key is None:
+        response['X-Cache'] = 'BYPASS'
+        return response
+    response['X-Cache'] = 'MISS'
+    # A page holding a CSRF token belongs to the visitor it was made for
+    if (response.status_code == 200 and not response.streaming and not response.cookies
+            and not request.META.get('CSRF_COOKIE_NEEDS_UPDATE')):
+        cache.set(key, (response.content, response['Content-Type']), settings.PAGE_CACHE_TIMEOUT)
+    return response
+
+
+def anonymous_page_cache(view):
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapped(request, *args, **kwargs):
+            key, cached = await sync_to_async(lookup)(request, view.__name__, kwargs)
+            if cached is not None:
+                return cached
+            response = await view(request, *args, **kwargs)
+            return await sync_to_async(store)(request, key, response)
+        return async_wrapped
+
+    @wraps(view)
+    def wrapped(request, *args, **kwargs):
+        key, cached = lookup(request, view.__name__, kwargs)
+        if cached is not None:
+            return cached
+        return store(request, key, view(request, *args, **kwargs))
+    return wrapped
@@ -0,0 +1,151 @@
+"""WSGI vs ASGI throughput comparison used by the ``benchmark_servers`` command.
+
+For each mode a gunicorn server is started on a local port (the workers
+configured in ``gunicorn.conf.py`` on ``project.wsgi``, or uvicorn workers
+on ``project.asgi``) with the same number of workers and the same
+database. ``concurrency`` client threads then request the catalog paths
+round robin for ``duration`` seconds, each request on a new connection. Latency, errors and the query count from the
+``Server-Timing`` header are recorded per path.
+"""
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from .benchmark import EndpointStats, _round
+
+PATHS = ('/', '/products/', '/api/products/', '/api/categories/')
+SERVERS = {
+    'wsgi': ['project.wsgi:application'],
+    'asgi': ['--worker-class', 'uvicorn.workers.UvicornWorker', 'project.asgi:application'],
+}
+READY_TIMEOUT = 30
+QUERIES_RE = re.compile(r'desc="(\d+) queries"')
+
+
+class ServerError(Exception):
+    pass
+
+
+def start_server(mode, port, workers, env=None):
+    command = [
+        sys.executable, '-m', 'gunicorn',
+        '--bind', f'127.0.0.1:{port}',
+        '--workers', str(workers),
+        *SERVERS[mode],
+    ]
+    # A file rather than a pipe, which would block the server once full
+    log = tempfile.TemporaryFile()
+    process = subprocess.Popen(
+        command, env={**os.environ, **(env or {})},
+        stdout=subprocess.DEVNULL, stderr=log,
+    )
+    deadline = time.monotonic() + READY_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            log.seek(0)
+            raise ServerError(f'{mode} server exited: {log.read().decode()[-2000:]}')
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/api/health/', timeout=1).close()
+            return process
+        except (urllib.error.URLError, OSError):
+            time.sleep(0.2)
+    stop_server(process)
+    raise ServerError(f'{mode} server did not answer on port {port} within {READY_TIMEOUT}s')
+
+
+def stop_server(process):
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+class Visitor(threading.Thread):
+    def __init__(self, index, base_url, paths, stats, barrier, stop_at):
+        super().__init__(name=f'visitor-{index}')
+        self.index = index
+        self.base_url = base_url
+        self.paths = paths
+        self.stats = stats
+        self.barrier = barrier
+        self.stop_at = stop_at
+
+    def request(self, path):
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(self.base_url + path, timeout=30) as response:
+                response.read()
+                timing = response.headers.get('Server-Timing', '')
+                ok = response.status < 400
+        except (urllib.error.URLError, OSError):
+            self.stats[path].record(time.perf_counter() - start, 0, False)
+            return
+        match = QUERIES_RE.search(timing)
+        self.stats[path].record(time.perf_counter() - start, int(match.group(1)) if match else 0, ok)
+
+    def run(self):
+        self.barrier.wait()
+        i = self.index
+        while time.monotonic() < self.stop_at[0]:
+            self.request(self.paths[i % len(self.paths)])
+            i += 1
+
+
+def measure(base_url, paths=PATHS, concurrency=50, duration=10.0):
+    """Load ``base_url`` for ``duration`` seconds; return a report dict"""
+    stats = {path: EndpointStats() for path in paths}
+    # Filled in just before the barrier releases the visitors, so thread
+    # startup is not timed
+    stop_at = [0.0]
+    barrier = threading.Barrier(concurrency + 1)
+    visitors = [Visitor(i, base_url, paths, stats, barrier, stop_at) for i in range(concurrency)]
+    for visitor in visitors:
+        visitor.start()
+    stop_at[0] = time.monotonic() + duration
+    start = time.perf_counter()
+    barrier.wait()
+    for visitor in visitors:
+        visitor.join()
+    elapsed = time.perf_counter() - start
+
+    requests = sum(len(s.latencies) for s in stats.values())
+    return {
+        'duration_s': _round(elapsed),
+        'requests': requests,
+        'errors': sum(s.errors for s in stats.values()),
+        'requests_per_second': _round(requests / elapsed if elapsed else 0),
+        'paths': {path: s.summary() for path, s in stats.items()},
+    }
+
+
+def run_benchmark(modes=('wsgi', 'asgi'), paths=PATHS, concurrency=50, duration=10.0,
+                  workers=2, port=8100, page_cache=False):
+    """Start each mode's server in turn and load it; return a JSON-serializable report"""
+    env = {} if page_cache else {'PAGE_CACHE_TIMEOUT': '0'}
+    report = {
+        'concurrency': concurrency,
+        'workers': workers,
+        'page_cache': page_cache,
+        'modes': {},
+    }
+    for offset, mode in enumerate(modes):
+        process = start_server(mode, port + offset, workers, env)
+        try:
+            report['modes'][mode] = measure(f'http://127.0.0.1:{port + offset}', paths, concurrency, duration)
+        finally:
+            stop_server(process)
+
+    results = report['modes']
+    if 'wsgi' in results and 'asgi' in results and results['wsgi']['requests_per_second']:
+        report['asgi_speedup'] = _round(
+            results['asgi']['requests_per_second'] / results['wsgi']['requests_per_second']
+        )
+    return report
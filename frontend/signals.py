@@ -0,0 +1,14 @@
+from django.contrib.auth.signals import user_logged_in
+from django.dispatch import receiver
+
+from .cart import CART_TOKEN_SESSION_KEY, anonymous_cart_key, user_cart_key
+from .cart_stores import get_cart_store
+
+
+@receiver(user_logged_in)
+def merge_anonymous_cart(sender, request, user, **kwargs):
+    """Move what was added before signing in into the user's own cart"""
+    session = getattr(request, 'session', None)
+    token = session.pop(CART_TOKEN_SESSION_KEY, None) if session is not None else None
+    if token:
+        get_cart_store().merge(anonymous_cart_key(token), user_cart_key(user.pk))
@@ -0,0 +1,48 @@
+from django import template
+from django.conf import settings
+
+from django.core.cache import cache
+
+from project.cache import make_key, record
+
+register = template.Library()
+NAMESPACE = 'fragments'
+
+
+class FragmentNode(template.Node):
+    def __init__(self, nodelist, name, vary_on):
+        self.nodelist = nodelist
+        self.name = name
+        self.vary_on = vary_on
+
+    def render(self, context):
+        parts = [value.resolve(context) for value in self.vary_on]
+        key = make_key(NAMESPACE, self.name.resolve(context), *parts)
+        content = cache.get(key)
+        if content is not None:
+            record(NAMESPACE, 'hit')
+            return content
+        record(NAMESPACE, 'miss')
+        content = self.nodelist.render(context)
+        cache.set(key, content, settings.FRAGMENT_CACHE_TIMEOUT)
+        return content
+
+
+@register.tag
+def fragment(parser, token):
+    """Cache the enclosed markup under a name and the values it varies on::
+
+        {% fragment 'product_card' product.id product.updated_at %}...{% endfragment %}
+
+    Unlike ``{% cache %}`` this builds keys with ``project.cache`` and shows
+    up in its hit/miss counts. It takes no stampede lock: rendering markup
+    is cheaper than waiting for another worker to finish it, so expensive
+    data behind a fragment is cached with ``get_or_compute`` where it is
+    computed. Keys never expire by content; vary on a version or timestamp.
+    """
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' tag requires a fragment name")
+    nodelist = parser.parse(('endfragment',))
+    parser.delete_first_token()
+    return FragmentNode(nodelist, parser.compile_filter(bits[1]), [parser.compile_filter(bit) for bit in bits[2:]])
@@ -0,0 +1,15 @@
+from django import template
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def cursor_query(context, cursor):
+    """Current query string with ``cursor`` replaced, e.g. ``?search=x&cursor=...``"""
+    query = context['request'].GET.copy()
+    query.pop('page', None)
+    if cursor:
+        query['cursor'] = cursor
+    else:
+        query.pop('cursor', None)
+    return '?' + query.urlencode()
@@ -0,0 +1,70 @@
+import re
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import include, path, reverse
+
+from categories.models import Category
+from products.models import Product
+from . import async_views, urls as frontend_urls
+
+CATALOG = {
+    'product_detail': async_views.product_detail,
+}
+
+# The frontend URLs as served with ASYNC_VIEWS on
+urlpatterns = [
+    path('', include(([
+        path(str(pattern.pattern), CATALOG.get(pattern.name, pattern.callback), name=pattern.name)
+        for pattern in frontend_urls.urlpatterns
+    ], 'frontend'))),
+]
+
+
+def query_count(response):
+    return int(re.search(r'desc="(\d+) queries"', response['Server-Timing']).group(1))
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncCatalogViewsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(name='Vitamins', slug='vitamins')
+        self.product = Product.objects.create(
+            name='Vitamin C', sku='ASYNC001', price=Decimal('4.00'), stock_quantity=5
+        )
+        self.product.categories.add(self.category)
+
+    async def test_catalog_pages(self):
+        """Test the catalog pages render under ASGI"""
+        for url, data in [
+            (reverse('frontend:home'), {}),
+            (reverse('frontend:product_list'), {'category': self.category.id}),
+            (reverse('frontend:product_list'), {'search': 'vitamin'}),
+            (reverse('frontend:product_detail', args=[self.product.id]), {}),
+        ]:
+            response = await self.async_client.get(url, data)
+            self.assertContains(response, 'Vitamin C')
+
+    async def test_missing_product(self):
+        response = await self.async_client.get(reverse('frontend:product_detail', args=[self.product.id + 1]))
+        self.assertEqual(response.status_code, 404)
+
+    async def test_page_cache(self):
+        url = reverse('frontend:product_detail', args=[self.product.id])
+        self.assertEqual((await self.async_client.get(url))['X-Cache'], 'MISS')
+        response = await self.async_client.get(url)
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(query_count(response), 0)
+
+    @override_settings(PAGE_CACHE_TIMEOUT=0)
+    async def test_query_counts_match_sync_views(self):
+        """Test queries run through the async ORM are counted by QueryBudgetMiddleware"""
+        url = reverse('frontend:product_detail', args=[self.product.id])
+        async_count = query_count(await self.async_client.get(url))
+        with override_settings(ROOT_URLCONF='project.urls'):
+            sync_count = query_count(await sync_to_async(self.client.get)(url))
+        self.assertGreater(sync_count, 0)
+        self.assertEqual(async_count, sync_count)
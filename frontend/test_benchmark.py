@@ -0,0 +1,43 @@
+from django.test import TestCase, TransactionTestCase
+from decimal import Decimal
+from products.models import Product
+from orders.models import Order, OrderItem
+from .benchmark import percentile, check_stock, run_benchmark
+
+
+class BenchmarkHelpersTest(TestCase):
+    def test_percentile_nearest_rank(self):
+        samples = list(range(1, 101))
+        self.assertEqual(percentile(samples, 50), 50)
+        self.assertEqual(percentile(samples, 95), 95)
+        self.assertEqual(percentile(samples, 99), 99)
+        self.assertEqual(percentile([7], 99), 7)
+        self.assertIsNone(percentile([], 50))
+
+    def test_check_stock_detects_oversell(self):
+        product = Product.objects.create(
+            name='Test Product',
+            sku='TEST001',
+            description='Test Description',
+            price=Decimal('1.00'),
+            stock_quantity=0
+        )
+        order = Order.objects.create(total_amount=Decimal('3.00'))
+        OrderItem.objects.create(order=order, product=product, quantity=3, price=Decimal('1.00'))
+
+        self.assertEqual(check_stock({product.id: 3}), [])
+        oversold = check_stock({product.id: 2})
+        self.assertEqual(oversold[0]['sold'], 3)
+
+
+class RunBenchmarkTest(TransactionTestCase):
+    def test_report(self):
+        report = run_benchmark(shoppers=1, iterations=3, products=2, stock=2, max_quantity=1)
+
+        self.assertEqual(report['oversold'], [])
+        self.assertEqual(report['orders'] + report['rejected_checkouts'], 3)
+        for name in ('product_list', 'add_to_cart', 'checkout'):
+            endpoint = report['endpoints'][name]
+            self.assertEqual(endpoint['requests'], 3)
+            self.assertEqual(endpoint['errors'], 0)
+            self.assertIsNotNone(endpoint['p99_ms'])
@@ -0,0 +1,137 @@
+import time
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from categories.models import Category
+from categories.tree import get_tree
+from products.cache import cached_category_counts, catalog_version
+from products.models import Product
+from project import cache as cache_helpers
+from project.cache import cache_stats, get_or_compute, make_key, reset_cache_stats, track_requests
+
+
+class CacheHelpersTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        reset_cache_stats()
+        self.calls = 0
+
+    def compute(self):
+        self.calls += 1
+        return f'value {self.calls}'
+
+    def test_make_key(self):
+        self.assertEqual(make_key('catalog', 'product', 7), 'catalog:product:7')
+        for key in (make_key('catalog', 'x' * 300), make_key('catalog', 'two words')):
+            self.assertRegex(key, r'^catalog:[0-9a-f]{40}$')
+
+    def test_miss_then_hit(self):
+        """Test a value is computed once and counted per namespace"""
+        key = make_key('catalog', 'home')
+        with track_requests() as counts:
+            self.assertEqual(get_or_compute(key, self.compute, 60), 'value 1')
+            self.assertEqual(get_or_compute(key, self.compute, 60), 'value 1')
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(counts, {'miss': 1, 'hit': 1})
+        self.assertEqual(cache_stats()['catalog'], {'hit': 1, 'miss': 1, 'early': 0, 'wait': 0})
+
+    def test_early_recompute(self):
+        """Test an expiring value is refreshed by the process that takes the lock"""
+        key = make_key('catalog', 'home')
+        cache.set(key, ('old', 1.0, time.time() - 1), 60)
+        self.assertEqual(get_or_compute(key, self.compute, 60), 'value 1')
+        self.assertEqual(get_or_compute(key, self.compute, 60), 'value 1')
+        self.assertEqual(cache_stats()['catalog']['early'], 1)
+
+    def test_early_recompute_is_single_flight(self):
+        """Test others keep serving the current value while one recomputes"""
+        key = make_key('catalog', 'home')
+        cache.set(key, ('old', 1.0, time.time() - 1), 60)
+        cache.add(f'{key}:lock', 1)
+        self.assertEqual(get_or_compute(key, self.compute, 60), 'old')
+        self.assertEqual(self.calls, 0)
+
+    def test_miss_waits_for_lock_holder(self):
+        """Test a miss behind someone else's lock waits, then computes unstored"""
+        key = make_key('catalog', 'home')
+        cache.add(f'{key}:lock', 1)
+        with mock.patch.object(cache_helpers, 'WAIT_TIMEOUT', 0.1):
+            self.assertEqual(get_or_compute(key, self.compute, 60), 'value 1')
+        self.assertIsNone(cache.get(key))
+
+    @override_settings(PAGE_CACHE_TIMEOUT=0)
+    def test_stats_header(self):
+        """Test responses report the request's cache events"""
+        Category.objects.create(name='Vitamins', slug='vitamins')
+        # The category tree, the sidebar fragment and its category counts
+        response = self.client.get(reverse('frontend:product_list'))
+        self.assertEqual(response['X-Cache-Stats'], 'miss=3')
+        response = self.client.get(reverse('frontend:product_list'))
+        self.assertEqual(response['X-Cache-Stats'], 'hit=1')
+
+
+@override_settings(PAGE_CACHE_TIMEOUT=0)
+class FragmentCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(name='Vitamins', slug='vitamins')
+        self.products = [
+            Product.objects.create(name=f'Product {i}', sku=f'FRAG{i}', price=Decimal('2.00'), stock_quantity=5)
+            for i in range(3)
+        ]
+        self.products[0].categories.add(self.category)
+
+    def test_warm_product_list_skips_category_counts(self):
+        """Test a warm page renders the sidebar and cards from cache"""
+        url = reverse('frontend:product_list')
+        self.client.get(url)
+        # Only the product page itself
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(response['X-Cache-Stats'], 'hit=4')
+        self.assertContains(response, 'Product 0')
+
+    def test_product_save_rerenders_card(self):
+        """Test a saved product gets a new card"""
+        url = reverse('frontend:home')
+        self.client.get(url)
+        product = self.products[0]
+        product.price = Decimal('9.99')
+        product.save()
+        self.assertContains(self.client.get(url), '$9.99')
+
+    def test_membership_change_refreshes_sidebar_counts(self):
+        """Test category counts follow product changes"""
+        url = reverse('frontend:product_list')
+        badge = '<span class="badge bg-secondary rounded-pill">{}</span>'
+        self.assertContains(self.client.get(url), badge.format(1), html=True)
+        self.products[1].categories.add(self.category)
+        self.assertContains(self.client.get(url), badge.format(2), html=True)
+
+    def test_fragment_does_not_wait_for_a_lock(self):
+        """Test a cold fragment renders at once while another worker renders it"""
+        key = make_key('fragments', 'category_sidebar', get_tree().version, catalog_version(), None)
+        cache.add(f'{key}:lock', 1)
+        with mock.patch.object(cache_helpers.time, 'sleep', side_effect=AssertionError('waited')):
+            self.assertContains(self.client.get(reverse('frontend:product_list')), 'Vitamins')
+
+    def test_category_counts_are_single_flight(self):
+        """Test the counts behind the sidebar keep the stampede lock"""
+        key = make_key('catalog', 'category_counts', get_tree().version, catalog_version())
+        cache.add(f'{key}:lock', 1)
+        with mock.patch.object(cache_helpers, 'WAIT_TIMEOUT', 0.1), \
+                mock.patch.object(cache_helpers.time, 'sleep') as sleep:
+            self.assertEqual(cached_category_counts(), {self.category.id: 1})
+        self.assertTrue(sleep.called)
+
+    def test_category_rename_refreshes_sidebar(self):
+        """Test the sidebar follows the category tree version"""
+        url = reverse('frontend:product_list')
+        self.client.get(url)
+        self.category.name = 'Supplements'
+        self.category.save()
+        self.assertContains(self.client.get(url), 'Supplements')
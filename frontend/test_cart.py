@@ -0,0 +1,192 @@
+from django.test import TestCase, Client, override_settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from products.models import Product
+from users.models import CustomUser
+from .cart import CART_TOKEN_SESSION_KEY, anonymous_cart_key, user_cart_key
+from .cart_stores import CacheCartStore, DatabaseCartStore, get_cart_store
+from .models import CartLine
+
+CART_KEY = anonymous_cart_key('test')
+
+
+class CartViewsTest(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.products = [
+            Product.objects.create(
+                name=f'Product {i}',
+                sku=f'CART{i:03d}',
+                description='Test Description',
+                price=Decimal('2.50'),
+                stock_quantity=50
+            )
+            for i in range(10)
+        ]
+
+    def set_cart(self, cart):
+        session = self.client.session
+        session[CART_TOKEN_SESSION_KEY] = 'test'
+        session.save()
+        for product_id, quantity in cart.items():
+            get_cart_store().set(CART_KEY, product_id, quantity)
+
+    def test_cart_view_resolves_products_in_one_query(self):
+        """Test cart page cost does not grow with the number of lines"""
+        self.set_cart({p.id: 2 for p in self.products})
+        # session load + cart lines joined with their products
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('frontend:cart'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['cart_items']), 10)
+        self.assertEqual(response.context['total'], Decimal('50.00'))
+
+    def test_cart_view_prunes_inactive_products(self):
+        """Test dead cart lines are removed from the store"""
+        inactive = self.products[1]
+        inactive.is_active = False
+        inactive.save()
+        self.set_cart({self.products[0].id: 1, inactive.id: 1})
+
+        response = self.client.get(reverse('frontend:cart'))
+        self.assertEqual(len(response.context['cart_items']), 1)
+        self.assertEqual(get_cart_store().get(CART_KEY), {self.products[0].id: 1})
+
+    def test_empty_cart_without_token(self):
+        """Test a visitor who never added anything causes no queries"""
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('frontend:cart'))
+        self.assertEqual(response.context['cart_items'], [])
+
+    def test_checkout_get_uses_resolved_cart(self):
+        """Test checkout page totals the cart with a single product query"""
+        self.set_cart({p.id: 1 for p in self.products[:4]})
+        response = self.client.get(reverse('frontend:checkout'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['total'], Decimal('10.00'))
+
+    def test_add_to_cart_increments_line(self):
+        """Test repeated adds increment one row and set the token once"""
+        product = self.products[0]
+        url = reverse('frontend:add_to_cart', args=[product.id])
+        self.client.post(url, {'quantity': 1})
+        token = self.client.session[CART_TOKEN_SESSION_KEY]
+        self.client.post(url, {'quantity': 2})
+        self.assertEqual(self.client.session[CART_TOKEN_SESSION_KEY], token)
+        line = CartLine.objects.get()
+        self.assertEqual((line.cart_key, line.quantity), (anonymous_cart_key(token), 3))
+
+    def test_add_to_cart_caps_at_stock(self):
+        """Test adding more than available stock caps the cart quantity"""
+        product = self.products[0]
+        self.set_cart({product.id: 45})
+        self.client.post(reverse('frontend:add_to_cart', args=[product.id]), {'quantity': 10})
+        self.assertEqual(get_cart_store().get(CART_KEY)[product.id], 50)
+
+    def test_update_cart_removes_line(self):
+        """Test setting quantity to zero removes the line"""
+        product = self.products[0]
+        self.set_cart({product.id: 2})
+        self.client.post(reverse('frontend:update_cart'), {'product_id': product.id, 'quantity': 0})
+        self.assertEqual(get_cart_store().get(CART_KEY), {})
+
+    def test_signed_in_cart_is_keyed_by_user(self):
+        """Test a signed-in user's cart follows the user, not the session"""
+        user = CustomUser.objects.create_user(username='shopper', password='testpass123')
+        self.client.login(username='shopper', password='testpass123')
+        self.client.post(reverse('frontend:add_to_cart', args=[self.products[0].id]), {'quantity': 2})
+        self.client.logout()
+        self.client.login(username='shopper', password='testpass123')
+        response = self.client.get(reverse('frontend:cart'))
+        self.assertEqual(len(response.context['cart_items']), 1)
+        self.assertEqual(get_cart_store().get(user_cart_key(user.pk)), {self.products[0].id: 2})
+
+    def test_login_merges_anonymous_cart(self):
+        """Test lines added before signing in are added to the user's cart"""
+        user = CustomUser.objects.create_user(username='shopper', password='testpass123')
+        store = get_cart_store()
+        store.set(user_cart_key(user.pk), self.products[0].id, 1)
+        self.set_cart({self.products[0].id: 2, self.products[1].id: 1})
+
+        self.client.login(username='shopper', password='testpass123')
+        self.assertNotIn(CART_TOKEN_SESSION_KEY, self.client.session)
+        self.assertEqual(store.get(CART_KEY), {})
+        self.assertEqual(
+            store.get(user_cart_key(user.pk)),
+            {self.products[0].id: 3, self.products[1].id: 1},
+        )
+
+
+class CartStoreTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.products = [
+            Product.objects.create(
+                name=f'Product {i}', sku=f'STORE{i}', price=Decimal('1.00'), stock_quantity=5
+            )
+            for i in range(3)
+        ]
+        self.ids = [p.id for p in self.products]
+
+    def check_store(self, store):
+        self.assertEqual(store.add('a', self.ids[0], 2), 2)
+        self.assertEqual(store.add('a', self.ids[0], 3), 5)
+        store.set('a', self.ids[1], 4)
+        store.set('a', self.ids[1], 1)
+        self.assertEqual(store.get('a'), {self.ids[0]: 5, self.ids[1]: 1})
+
+        self.assertTrue(store.remove('a', self.ids[1]))
+        self.assertFalse(store.remove('a', self.ids[1]))
+        self.assertEqual(store.get('a'), {self.ids[0]: 5})
+
+        store.set('b', self.ids[0], 1)
+        store.set('b', self.ids[2], 1)
+        store.merge('b', 'a')
+        self.assertEqual(store.get('a'), {self.ids[0]: 6, self.ids[2]: 1})
+        self.assertEqual(store.get('b'), {})
+
+        store.clear('a')
+        self.assertEqual(store.get('a'), {})
+
+    def test_database_store(self):
+        self.check_store(DatabaseCartStore())
+
+    def test_database_add_is_a_single_update(self):
+        """Test incrementing an existing line does not read it first"""
+        store = DatabaseCartStore()
+        store.add('a', self.ids[0], 1)
+        # UPDATE ... SET quantity = quantity + n, then the new quantity
+        with self.assertNumQueries(2):
+            store.add('a', self.ids[0], 1)
+
+    def test_cache_store(self):
+        self.check_store(CacheCartStore(timeout=60))
+
+    @override_settings(CART_STORE='frontend.cart_stores.CacheCartStore')
+    def test_cache_store_views(self):
+        """Test the cart pages run on the cache store without cart queries"""
+        client = Client()
+        client.post(reverse('frontend:add_to_cart', args=[self.ids[0]]), {'quantity': 2})
+        self.assertFalse(CartLine.objects.exists())
+        response = client.get(reverse('frontend:cart'))
+        self.assertEqual([line['quantity'] for line in response.context['cart_items']], [2])
+
+    def test_purge_carts(self):
+        """Test stale anonymous carts are purged and user carts are kept"""
+        store = DatabaseCartStore()
+        store.set(anonymous_cart_key('old'), self.ids[0], 1)
+        store.set(anonymous_cart_key('new'), self.ids[0], 1)
+        store.set(user_cart_key(1), self.ids[0], 1)
+        CartLine.objects.exclude(cart_key=anonymous_cart_key('new')).update(
+            updated_at=timezone.now() - timedelta(days=40)
+        )
+        call_command('purge_carts', days=30, stdout=StringIO())
+        self.assertEqual(
+            sorted(CartLine.objects.values_list('cart_key', flat=True)),
+            [anonymous_cart_key('new'), user_cart_key(1)],
+        )
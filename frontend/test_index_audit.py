@@ -0,0 +1,46 @@
+from django.core.management import call_command, CommandError
+from django.test import TestCase
+from io import StringIO
+from unittest import mock
+from orders.models import Order
+from .index_audit import HOT_QUERIES, audit, full_scans
+
+
+class IndexAuditTest(TestCase):
+    def test_hot_queries_use_indexes(self):
+        results = list(audit())
+        self.assertTrue(results)
+        self.assertEqual([(name, tables) for name, plan, tables in results if tables], [])
+
+    def test_audits_search_and_category_counts(self):
+        """Test the audit covers the full-text search join and the sidebar counts"""
+        plans = {name: plan for name, plan, tables in audit()}
+        self.assertIn('productfts', plans['product_list search'])
+        self.assertIn('GROUP BY', plans['product_list category counts'])
+
+    def test_full_scan_detection(self):
+        sqlite_plan = '\n'.join([
+            '5 0 0 SCAN products_product USING INDEX product_active_name_idx',
+            '8 0 0 SCAN orders_order',
+            '9 0 0 SCAN CONSTANT ROW',
+        ])
+        self.assertEqual(full_scans(sqlite_plan, 'sqlite', limited=True), ['orders_order'])
+        self.assertEqual(full_scans(sqlite_plan, 'sqlite'), ['orders_order', 'products_product'])
+        postgres_plan = (
+            'Limit  (cost=0.00..1.02 rows=1 width=8)\n'
+            '  ->  Seq Scan on orders_order  (cost=0.00..1.02 rows=1 width=8)\n'
+            '  ->  Index Scan using product_created_idx on products_product'
+        )
+        self.assertEqual(full_scans(postgres_plan, 'postgresql'), ['orders_order'])
+
+    def test_command_fails_on_scan(self):
+        out = StringIO()
+        call_command('audit_indexes', '--fail-on-scan', stdout=out)
+        self.assertIn('Every hot query is served by an index.', out.getvalue())
+
+        unindexed = {'orders by guest email': lambda: Order.objects.filter(guest_email='a@example.com')}
+        with mock.patch.dict(HOT_QUERIES, unindexed):
+            out = StringIO()
+            with self.assertRaises(CommandError):
+                call_command('audit_indexes', '--fail-on-scan', stdout=out)
+        self.assertIn('SCAN  orders by guest email: orders_order', out.getvalue())
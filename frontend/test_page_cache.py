@@ -0,0 +1,80 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from categories.models import Category
+from products.models import Product
+from users.models import CustomUser
+
+
+class AnonymousPageCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(name='Vitamins', slug='vitamins')
+        self.product = Product.objects.create(
+            name='Vitamin C', sku='PAGE001', price=Decimal('4.00'), stock_quantity=5
+        )
+        self.product.categories.add(self.category)
+
+    def test_hit_runs_no_queries(self):
+        """Test a repeated anonymous request is served from the cache"""
+        url = reverse('frontend:product_detail', args=[self.product.id])
+        self.assertEqual(self.client.get(url)['X-Cache'], 'MISS')
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertContains(response, 'Vitamin C')
+
+    def test_varies_on_catalog_params(self):
+        url = reverse('frontend:product_list')
+        self.client.get(url)
+        self.assertEqual(self.client.get(url, {'category': self.category.id})['X-Cache'], 'MISS')
+        self.assertEqual(self.client.get(url, {'category': self.category.id})['X-Cache'], 'HIT')
+        self.assertEqual(self.client.get(url, {'search': 'vitamin'})['X-Cache'], 'MISS')
+
+    def test_unknown_params_bypass(self):
+        """Test pages are not stored for query strings they could leak into links"""
+        url = reverse('frontend:product_list')
+        self.assertEqual(self.client.get(url, {'utm_source': 'mail'})['X-Cache'], 'BYPASS')
+
+    def test_authenticated_bypass(self):
+        CustomUser.objects.create_user(username='shopper', password='testpass123')
+        self.client.login(username='shopper', password='testpass123')
+        url = reverse('frontend:home')
+        self.assertEqual(self.client.get(url)['X-Cache'], 'BYPASS')
+        self.assertContains(self.client.get(url), 'shopper')
+
+    def test_cart_bypass(self):
+        """Test visitors with a cart see live pages until their cart is cleared"""
+        self.client.post(reverse('frontend:add_to_cart', args=[self.product.id]), {'quantity': 1})
+        self.assertEqual(self.client.get(reverse('frontend:home'))['X-Cache'], 'BYPASS')
+        self.client.post(reverse('frontend:checkout'), {
+            'customer_name': 'Guest',
+            'customer_email': 'guest@example.com',
+        })
+        # The confirmation message is still pending
+        self.assertEqual(self.client.get(reverse('frontend:home'))['X-Cache'], 'BYPASS')
+        self.assertEqual(self.client.get(reverse('frontend:home'))['X-Cache'], 'MISS')
+
+    def test_product_change_invalidates(self):
+        url = reverse('frontend:product_detail', args=[self.product.id])
+        self.client.get(url)
+        self.product.price = Decimal('5.50')
+        self.product.save()
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertContains(response, '$5.50')
+
+    def test_category_change_invalidates(self):
+        url = reverse('frontend:home')
+        self.client.get(url)
+        self.category.name = 'Supplements'
+        self.category.save()
+        self.assertContains(self.client.get(url), 'Supplements')
+
+    def test_not_found_is_not_stored(self):
+        url = reverse('frontend:product_detail', args=[999999])
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(self.client.get(url).status_code, 404)
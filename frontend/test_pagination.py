@@ -0,0 +1,110 @@
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.utils import timezone
+from decimal import Decimal
+from products.models import Product
+from orders.models import Order
+from project.pagination import KeysetPaginator, InvalidCursor, encode_cursor, NEXT
+from django.contrib.auth import get_user_model
+
+User = get_user_model()
+
+
+class KeysetPaginatorTest(TestCase):
+    def setUp(self):
+        # Every order shares one timestamp, so only the id tiebreaker orders them
+        self.orders = [Order.objects.create(total_amount=Decimal('1.00')) for _ in range(7)]
+        Order.objects.update(created_at=timezone.now())
+        self.queryset = Order.objects.order_by('-created_at')
+
+    def walk(self, paginator):
+        pages, cursor = [], None
+        while True:
+            page = paginator.page(cursor)
+            pages.append([order.id for order in page])
+            cursor = page.next_cursor
+            if cursor is None:
+                return pages
+
+    def test_forward_traversal_has_no_gaps_or_duplicates(self):
+        pages = self.walk(KeysetPaginator(self.queryset, 3))
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertEqual(sum(pages, []), sorted((o.id for o in self.orders), reverse=True))
+
+    def test_previous_returns_the_prior_page(self):
+        paginator = KeysetPaginator(self.queryset, 3)
+        first = paginator.page()
+        second = paginator.page(first.next_cursor)
+        self.assertTrue(second.has_previous())
+        back = paginator.page(second.previous_cursor)
+        self.assertEqual(list(back), list(first))
+        self.assertFalse(back.has_previous())
+        self.assertTrue(back.has_next())
+
+    def test_page_is_one_query_without_count(self):
+        paginator = KeysetPaginator(self.queryset, 3)
+        cursor = paginator.page().next_cursor
+        with self.assertNumQueries(1):
+            page = paginator.page(cursor)
+            list(page)
+        self.assertIsNone(paginator.count)
+
+    def test_counts(self):
+        self.assertEqual(KeysetPaginator(self.queryset, 3, count='exact').count, 7)
+        paginator = KeysetPaginator(self.queryset, 3, count='approximate')
+        self.assertEqual(paginator.count, 7)
+        self.assertTrue(paginator.count_is_exact)
+
+    def test_invalid_cursor(self):
+        paginator = KeysetPaginator(self.queryset, 3)
+        for cursor in ('garbage', encode_cursor([1], NEXT), encode_cursor(['x', 'y'], NEXT)):
+            self.assertRaises(InvalidCursor, paginator.page, cursor)
+        self.assertEqual(len(paginator.get_page('garbage')), 3)
+
+
+class KeysetViewsTest(TestCase):
+    def setUp(self):
+        self.client = Client()
+        for i in range(15):
+            Product.objects.create(
+                name=f'Product {i:02d}',
+                sku=f'KP{i:03d}',
+                description='Test Description',
+                price=Decimal('1.00'),
+                is_active=i != 0
+            )
+
+    def test_product_list_next_link_keeps_filters(self):
+        response = self.client.get(reverse('frontend:product_list'), {'search': 'product'})
+        page_obj = response.context['page_obj']
+        self.assertEqual(len(page_obj), 12)
+        self.assertContains(response, f'?search=product&amp;cursor={page_obj.next_cursor}')
+
+        response = self.client.get(reverse('frontend:product_list'), {
+            'search': 'product', 'cursor': page_obj.next_cursor
+        })
+        self.assertEqual(len(response.context['page_obj']), 2)
+
+    def test_user_orders(self):
+        user = User.objects.create_user(username='buyer', password='testpass123')
+        other = User.objects.create_user(username='other', password='testpass123')
+        mine = Order.objects.create(user=user, total_amount=Decimal('3.00'))
+        Order.objects.create(user=other, total_amount=Decimal('4.00'))
+        self.client.login(username='buyer', password='testpass123')
+        response = self.client.get(reverse('frontend:user_orders'))
+        self.assertEqual(list(response.context['page_obj']), [mine])
+
+    def test_api_cursor_pagination(self):
+        response = self.client.get('/api/products/', {'page_size': 10})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 10)
+        self.assertIsNone(response.data['previous'])
+        self.assertNotIn('count', response.data)
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual([p['name'] for p in response.data['results']], [f'Product {i:02d}' for i in range(11, 15)])
+        self.assertIsNone(response.data['next'])
+        self.assertIsNotNone(response.data['previous'])
+
+        response = self.client.get('/api/products/', {'cursor': 'garbage'})
+        self.assertEqual(response.status_code, 404)
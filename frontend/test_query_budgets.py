@@ -0,0 +1,119 @@
+from django.core.cache import cache
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from decimal import Decimal
+from products.models import Product
+from categories.models import Category
+from orders.checkout import place_order
+from project.db import connection_stats, reset_connection_stats
+from project.testing import QueryBudgetTestMixin
+from frontend.cart import CART_TOKEN_SESSION_KEY, anonymous_cart_key
+from frontend.cart_stores import get_cart_store
+from django.contrib.auth import get_user_model
+
+User = get_user_model()
+
+
+class QueryBudgetTest(QueryBudgetTestMixin, TestCase):
+    """Catalog and cart pages must not scale their query count with data"""
+
+    def setUp(self):
+        self.client = Client()
+        self.categories = [
+            Category.objects.create(name=f'Category {i}', slug=f'category-{i}')
+            for i in range(5)
+        ]
+        self.products = []
+        for i in range(20):
+            product = Product.objects.create(
+                name=f'Product {i}',
+                sku=f'QB{i:03d}',
+                description='Test Description',
+                price=Decimal('1.00'),
+                stock_quantity=50
+            )
+            product.categories.set(self.categories[:2])
+            self.products.append(product)
+
+    def fill_cart(self):
+        session = self.client.session
+        session[CART_TOKEN_SESSION_KEY] = 'budget'
+        session.save()
+        for p in self.products:
+            get_cart_store().set(anonymous_cart_key('budget'), p.id, 1)
+
+    def test_home(self):
+        self.assertWithinQueryBudget(self.client.get(reverse('frontend:home')))
+
+    def test_product_list(self):
+        self.assertWithinQueryBudget(self.client.get(reverse('frontend:product_list')))
+        self.assertWithinQueryBudget(self.client.get(
+            reverse('frontend:product_list') + f'?category={self.categories[0].id}&search=Product'
+        ))
+
+    def test_product_detail(self):
+        response = self.client.get(reverse('frontend:product_detail', args=[self.products[0].id]))
+        self.assertWithinQueryBudget(response)
+
+    def test_cart(self):
+        self.fill_cart()
+        self.assertWithinQueryBudget(self.client.get(reverse('frontend:cart')))
+
+    def test_checkout(self):
+        self.fill_cart()
+        self.assertWithinQueryBudget(self.client.get(reverse('frontend:checkout')))
+        response = self.client.post(reverse('frontend:checkout'), {
+            'customer_name': 'Guest',
+            'customer_email': 'guest@example.com'
+        })
+        self.assertWithinQueryBudget(response)
+
+    def test_order_pages(self):
+        user = User.objects.create_user(username='buyer', password='testpass123', is_staff=True)
+        order = place_order([(p.id, 1) for p in self.products], user=user)
+        self.client.login(username='buyer', password='testpass123')
+        for name in ('order_confirmation', 'order_detail', 'admin_order_detail'):
+            response = self.client.get(reverse(f'frontend:{name}', args=[order.id]))
+            self.assertEqual(len(response.context['order'].items.all()), 20)
+            self.assertWithinQueryBudget(response)
+
+
+class QueryBudgetMiddlewareTest(TestCase):
+    def setUp(self):
+        # A page cached by an earlier test would be served without queries
+        cache.clear()
+
+    def test_server_timing_header(self):
+        response = self.client.get(reverse('frontend:home'))
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="\d+ queries"$')
+
+    @override_settings(QUERY_BUDGETS={'frontend:home': 0})
+    def test_logs_requests_over_budget(self):
+        with self.assertLogs('project.middleware', level='WARNING') as logs:
+            self.client.get(reverse('frontend:home'))
+        self.assertIn('Query budget exceeded for frontend:home', logs.output[0])
+
+    @override_settings(QUERY_BUDGET_SERVER_TIMING=False)
+    def test_server_timing_can_be_disabled(self):
+        response = self.client.get(reverse('frontend:home'))
+        self.assertFalse(response.has_header('Server-Timing'))
+
+
+class ConnectionStatsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        reset_connection_stats()
+
+    def test_counts_opened_and_reused(self):
+        """Test requests starting on an open connection count as reuse"""
+        connection_created.send(sender=connection.__class__, connection=connection)
+        self.client.get(reverse('frontend:home'))
+        self.assertEqual(
+            connection_stats()['default'],
+            {'opened': 1, 'reused': 1, 'reuse_ratio': 0.5},
+        )
+
+    def test_empty(self):
+        self.assertEqual(connection_stats(), {})
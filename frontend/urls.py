@@ -1,13 +1,17 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
 
 app_name = 'frontend'
 
+# The product page is async under ASGI (see project.asgi)
+catalog = async_views if settings.ASYNC_VIEWS else views
+
 urlpatterns = [
     # Public pages
     path('', views.home, name='home'),
     path('products/', views.product_list, name='product_list'),
-    path('products/<int:product_id>/', views.product_detail, name='product_detail'),
+    path('products/<int:product_id>/', catalog.product_detail, name='product_detail'),
     
     # Authentication
     path('login/', views.user_login, name='login'),
@@ -29,6 +33,7 @@ urlpatterns = [
     path('admin/', views.admin_dashboard, name='admin_dashboard'),
     path('admin/products/', views.admin_products, name='admin_products'),
     path('admin/products/create/', views.admin_product_create, name='admin_product_create'),
+    path('admin/products/import/', views.admin_product_import, name='admin_product_import'),
     path('admin/products/<int:product_id>/edit/', views.admin_product_edit, name='admin_product_edit'),
     path('admin/products/<int:product_id>/delete/', views.admin_product_delete, name='admin_product_delete'),
     path('admin/categories/', views.admin_categories, name='admin_categories'),
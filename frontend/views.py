@@ -4,66 +4,95 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.views.decorators.http import require_POST
 from django.http import JsonResponse
-from django.core.paginator import Paginator
+from django.utils.functional import SimpleLazyObject
 from decimal import Decimal
-from django.db import transaction
+import io
 
 from products.models import Product
+from products.cache import cached_category_counts, catalog_version
+from products.recommendations import related_products
+from products.search import search_products
+from products.filters import filter_by_category
+from products.importer import FORMATS as IMPORT_FORMATS, guess_format, import_products
 from categories.models import Category
-from orders.models import Order, OrderItem
+from categories.tree import get_tree
+from orders.models import Order
+from orders.queries import get_order_details
+from dashboard.stats import get_stats, LOW_STOCK_THRESHOLD
+from orders.checkout import place_order, OutOfStockError, EmptyOrderError
 from users.forms import CustomUserCreationForm
+from project.pagination import KeysetPaginator
+from .cart import Cart
+from .page_cache import anonymous_page_cache
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
 # Public views
-def home(request):
-    featured_products = Product.objects.filter(is_active=True)[:8]
-    categories = Category.objects.all()[:6]
-    
-    context = {
-        'featured_products': featured_products,
-        'categories': categories,
+# The context builders are shared with frontend.async_views and
+# frontend.index_audit; queries left in the context stay lazy, and run (if
+# at all) while the template renders
+def home_context(tree):
+    return {
+        'featured_products': Product.objects.filter(is_active=True)[:8],
+        'categories': tree[:6],
+        'tree_version': tree.version,
     }
-    return render(request, 'frontend/home.html', context)
 
-def product_list(request):
+def product_list_context(request, tree):
+    """Return the list page's paginator and its context, less the page itself"""
     products = Product.objects.filter(is_active=True)
     category_id = request.GET.get('category')
     search = request.GET.get('search')
+    category = None
     
     if category_id:
-        products = products.filter(categories__id=category_id)
+        category = tree.get(category_id)
+        if category is None:
+            products = products.none()
+        else:
+            products = filter_by_category(products, category)
     
     if search:
-        products = products.filter(name__icontains=search)
-    
-    paginator = Paginator(products, 12)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+        products = search_products(products, search)
     
-    categories = Category.objects.all()
+    def category_counts():
+        counts = cached_category_counts()
+        return [(node, counts.get(node.id, 0)) for node in tree]
     
     context = {
-        'page_obj': page_obj,
-        'categories': categories,
-        'current_category': category_id,
+        # Counted only when the cached sidebar fragment is missing
+        'categories': SimpleLazyObject(category_counts),
+        # Normalized so the sidebar does not vary on arbitrary query strings
+        'selected_category': category.id if category else ('invalid' if category_id else None),
+        'tree_version': tree.version,
         'search_query': search,
     }
+    # Keyed on (name, id), or (search_rank, name, id) for searches
+    return KeysetPaginator(products, 12), context
+
+def product_detail_context(product):
+    return {
+        'product': product,
+        # Precomputed by refresh_related_products
+        'related_products': related_products(product),
+    }
+
+@anonymous_page_cache
+def home(request):
+    return render(request, 'frontend/home.html', home_context(get_tree()))
+
+@anonymous_page_cache
+def product_list(request):
+    paginator, context = product_list_context(request, get_tree())
+    context['page_obj'] = paginator.get_page(request.GET.get('cursor'))
+    context['catalog_version'] = catalog_version()
     return render(request, 'frontend/product_list.html', context)
 
+@anonymous_page_cache
 def product_detail(request, product_id):
     product = get_object_or_404(Product, id=product_id, is_active=True)
-    related_products = Product.objects.filter(
-        categories__in=product.categories.all(),
-        is_active=True
-    ).exclude(id=product_id)[:4]
-    
-    context = {
-        'product': product,
-        'related_products': related_products,
-    }
-    return render(request, 'frontend/product_detail.html', context)
+    return render(request, 'frontend/product_detail.html', product_detail_context(product))
 
 # Authentication views
 def user_login(request):
@@ -112,28 +141,11 @@ def user_logout(request):
 
 # Cart and checkout views (no login required)
 def cart_view(request):
-    cart = request.session.get('cart', {})
-    cart_items = []
-    total = Decimal('0.00')
-    
-    for product_id, quantity in cart.items():
-        try:
-            product = Product.objects.get(id=product_id, is_active=True)
-            subtotal = product.price * quantity
-            cart_items.append({
-                'product': product,
-                'quantity': quantity,
-                'subtotal': subtotal
-            })
-            total += subtotal
-        except Product.DoesNotExist:
-            # Remove invalid product from cart
-            del cart[product_id]
-            request.session['cart'] = cart
+    cart = Cart(request)
     
     context = {
-        'cart_items': cart_items,
-        'total': total,
+        'cart_items': cart.lines,
+        'total': cart.total,
     }
     return render(request, 'frontend/cart.html', context)
 
@@ -146,33 +158,24 @@ def add_to_cart(request, product_id):
         messages.error(request, f'Only {product.stock_quantity} items available in stock.')
         return redirect('frontend:product_detail', product_id=product_id)
     
-    # Get or create cart in session
-    cart = request.session.get('cart', {})
-    product_id_str = str(product_id)
-    
-    if product_id_str in cart:
-        cart[product_id_str] += quantity
-    else:
-        cart[product_id_str] = quantity
+    cart = Cart(request)
     
     # Check if total quantity exceeds stock
-    if cart[product_id_str] > product.stock_quantity:
-        cart[product_id_str] = product.stock_quantity
+    if cart.add(product_id, quantity) > product.stock_quantity:
+        cart.set(product_id, product.stock_quantity)
         messages.warning(request, f'Cart updated to maximum available quantity: {product.stock_quantity}')
     
-    request.session['cart'] = cart
     messages.success(request, f'{product.name} added to cart!')
     return redirect('frontend:product_detail', product_id=product_id)
 
 @require_POST
 def update_cart(request):
-    cart = request.session.get('cart', {})
+    cart = Cart(request)
     product_id = request.POST.get('product_id')
     quantity = int(request.POST.get('quantity', 0))
     
     if quantity <= 0:
-        if product_id in cart:
-            del cart[product_id]
+        if cart.remove(product_id):
             messages.success(request, 'Item removed from cart.')
     else:
         try:
@@ -180,15 +183,14 @@ def update_cart(request):
             if quantity > product.stock_quantity:
                 quantity = product.stock_quantity
                 messages.warning(request, f'Quantity adjusted to available stock: {quantity}')
-            cart[product_id] = quantity
+            cart.set(product_id, quantity)
         except Product.DoesNotExist:
             messages.error(request, 'Product not found.')
     
-    request.session['cart'] = cart
     return redirect('frontend:cart')
 
 def checkout(request):
-    cart = request.session.get('cart', {})
+    cart = Cart(request)
     if not cart:
         messages.error(request, 'Your cart is empty.')
         return redirect('frontend:cart')
@@ -202,83 +204,47 @@ def checkout(request):
             messages.error(request, 'Please provide your name and email address.')
             return redirect('frontend:checkout')
         
-        with transaction.atomic():
-            # Create order
-            order = Order.objects.create(
-                user=request.user if request.user.is_authenticated else None,
-                status='pending',
-                total_amount=Decimal('0.00'),
-                guest_email=customer_email if not request.user.is_authenticated else None,
-                guest_name=customer_name if not request.user.is_authenticated else None
-            )
-            
-            total_amount = Decimal('0.00')
-            
-            for product_id, quantity in cart.items():
-                try:
-                    product = Product.objects.get(id=product_id, is_active=True)
-                    
-                    # Check stock availability
-                    if product.stock_quantity < quantity:
-                        messages.error(request, f'Insufficient stock for {product.name}. Only {product.stock_quantity} available.')
-                        order.delete()
-                        return redirect('frontend:cart')
-                    
-                    # Create order item
-                    order_item = OrderItem.objects.create(
-                        order=order,
-                        product=product,
-                        quantity=quantity,
-                        price=product.price
-                    )
-                    
-                    # Reduce stock
-                    product.stock_quantity -= quantity
-                    product.save()
-                    total_amount += order_item.price * order_item.quantity
-                    
-                except Product.DoesNotExist:
-                    continue
-            
-            # Update order total
-            order.total_amount = total_amount
-            order.save()
-            
-            # Clear cart
-            request.session['cart'] = {}
-            
-            messages.success(request, f'Order #{order.id} placed successfully!')
-            return redirect('frontend:order_confirmation', order_id=order.id)
-    
-    # Calculate cart total for display
-    cart_items = []
-    total = Decimal('0.00')
-    
-    for product_id, quantity in cart.items():
+        is_guest = not request.user.is_authenticated
         try:
-            product = Product.objects.get(id=product_id, is_active=True)
-            subtotal = product.price * quantity
-            cart_items.append({
-                'product': product,
-                'quantity': quantity,
-                'subtotal': subtotal
-            })
-            total += subtotal
-        except Product.DoesNotExist:
-            continue
+            order = place_order(
+                cart.items(),
+                user=None if is_guest else request.user,
+                guest_email=customer_email if is_guest else None,
+                guest_name=customer_name if is_guest else None
+            )
+        except OutOfStockError as e:
+            for product, requested in e.shortages:
+                messages.error(request, f'Insufficient stock for {product.name}. Only {product.stock_quantity} available.')
+            if not e.shortages:
+                messages.error(request, 'Stock changed while placing your order. Please try again.')
+            return redirect('frontend:cart')
+        except EmptyOrderError:
+            cart.clear()
+            messages.error(request, 'Your cart is empty.')
+            return redirect('frontend:cart')
+        
+        # Clear cart
+        cart.clear()
+        
+        # Lets guests view their confirmation page
+        if is_guest:
+            request.session['last_order_id'] = order.id
+        
+        messages.success(request, f'Order #{order.id} placed successfully!')
+        return redirect('frontend:order_confirmation', order_id=order.id)
     
     context = {
-        'cart_items': cart_items,
-        'total': total,
+        'cart_items': cart.lines,
+        'total': cart.total,
     }
     return render(request, 'frontend/checkout.html', context)
 
 def order_confirmation(request, order_id):
     """Order confirmation page for both authenticated and guest users"""
-    order = get_object_or_404(Order, id=order_id)
+    order = get_order_details(id=order_id)
     
     # Allow access if user owns the order or it's a guest order from same session
-    if request.user.is_authenticated and order.user == request.user:
+    if request.user.is_authenticated and order.user_id == request.user.id:
         pass  # User owns the order
     elif not order.user and request.session.get('last_order_id') == order.id:
         pass  # Guest order from same session
@@ -295,32 +261,22 @@ def order_confirmation(request, order_id):
 # User order views (login required)
 @login_required
 def user_orders(request):
-    orders = Order.objects.filter(user=request.user).order_by('-created_at')
-    paginator = Paginator(orders, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    orders = Order.objects.filter(user=request.user).order_by('-created_at', '-id')
+    page_obj = KeysetPaginator(orders, 10).get_page(request.GET.get('cursor'))
     
     return render(request, 'frontend/user_orders.html', {'page_obj': page_obj})
 
 @login_required
 def order_detail(request, order_id):
-    order = get_object_or_404(Order, id=order_id, user=request.user)
+    order = get_order_details(id=order_id, user=request.user)
     return render(request, 'frontend/order_detail.html', {'order': order})
 
 # Admin views (login required, no role restrictions)
 @login_required
 def admin_dashboard(request):
-    stats = {
-        'total_products': Product.objects.count(),
-        'total_categories': Category.objects.count(),
-        'total_orders': Order.objects.count(),
-        'pending_orders': Order.objects.filter(status='pending').count(),
-        'total_customers': User.objects.filter(is_customer=True).count(),
-        'low_stock_products': Product.objects.filter(stock_quantity__lt=10).count(),
-    }
-    
-    recent_orders = Order.objects.order_by('-created_at')[:5]
-    low_stock_products = Product.objects.filter(stock_quantity__lt=10)[:5]
+    stats = get_stats()
+    recent_orders = Order.objects.select_related('user').order_by('-created_at')[:5]
+    low_stock_products = Product.objects.filter(stock_quantity__lt=LOW_STOCK_THRESHOLD)[:5]
     
     context = {
         'stats': stats,
@@ -331,10 +287,8 @@ def admin_dashboard(request):
 
 @login_required
 def admin_products(request):
-    products = Product.objects.all().order_by('-created_at')
-    paginator = Paginator(products, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    products = Product.objects.prefetch_related('categories').order_by('-created_at', '-id')
+    page_obj = KeysetPaginator(products, 20, count='approximate').get_page(request.GET.get('cursor'))
     
     return render(request, 'frontend/admin_products.html', {'page_obj': page_obj})
 
@@ -363,12 +317,33 @@ def admin_product_create(request):
         messages.success(request, f'Product "{product.name}" created successfully!')
         return redirect('frontend:admin_products')
     
-    categories = Category.objects.all()
     return render(request, 'frontend/admin_product_form.html', {
-        'categories': categories,
+        'categories': get_tree(),
         'action': 'Create'
     })
 
+@login_required
+def admin_product_import(request):
+    result = None
+    
+    if request.method == 'POST':
+        upload = request.FILES.get('file')
+        if upload is None:
+            messages.error(request, 'Choose a file to import.')
+        else:
+            file_format = request.POST.get('format') or guess_format(upload.name)
+            stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+            result = import_products(stream, file_format)
+            messages.success(
+                request,
+                f'{result.created} products created, {result.updated} updated, {len(result.errors)} rows rejected.'
+            )
+    
+    return render(request, 'frontend/admin_product_import.html', {
+        'result': result,
+        'formats': IMPORT_FORMATS,
+    })
+
 @login_required
 def admin_product_edit(request, product_id):
     product = get_object_or_404(Product, id=product_id)
@@ -390,10 +365,10 @@ def admin_product_edit(request, product_id):
         messages.success(request, f'Product "{product.name}" updated successfully!')
         return redirect('frontend:admin_products')
     
-    categories = Category.objects.all()
     return render(request, 'frontend/admin_product_form.html', {
         'product': product,
-        'categories': categories,
+        'categories': get_tree(),
+        'selected_category_ids': set(product.categories.values_list('id', flat=True)),
         'action': 'Edit'
     })
 
@@ -464,15 +439,13 @@ def admin_category_delete(request, category_id):
 
 @login_required
 def admin_orders(request):
-    orders = Order.objects.all().order_by('-created_at')
+    orders = Order.objects.select_related('user').order_by('-created_at', '-id')
     status_filter = request.GET.get('status')
     
     if status_filter:
         orders = orders.filter(status=status_filter)
     
-    paginator = Paginator(orders, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = KeysetPaginator(orders, 20, count='approximate').get_page(request.GET.get('cursor'))
     
     status_choices = Order.STATUS_CHOICES
     
@@ -484,13 +457,13 @@ def admin_orders(request):
 
 @login_required
 def admin_order_detail(request, order_id):
-    order = get_object_or_404(Order, id=order_id)
+    order = get_order_details(id=order_id)
     
     if request.method == 'POST':
         new_status = request.POST.get('status')
         if new_status in dict(Order.STATUS_CHOICES):
             order.status = new_status
-            order.save()
+            order.save(update_fields=['status', 'updated_at'])
             messages.success(request, f'Order #{order.id} status updated to {order.get_status_display()}!')
     
     return render(request, 'frontend/admin_order_detail.html', {
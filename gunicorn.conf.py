@@ -0,0 +1,194 @@
+"""Gunicorn settings, read from the working directory by default.
+
+Workers and threads are sized from the CPUs the container may use (its
+affinity mask, capped by a cgroup CPU quota):
+
+* ``gthread`` (default): ``cores + 1`` workers of 4 threads each, so
+  threads waiting on the database do not leave a core idle;
+* ``sync``: ``2 * cores + 1`` single-threaded workers;
+* ``uvicorn.workers.UvicornWorker`` (``project.asgi``): one worker per core.
+
+``WEB_CONCURRENCY`` and ``GUNICORN_THREADS`` override the sizing. The app is
+loaded once in the master and forked (``GUNICORN_PRELOAD``), so workers
+share its memory copy-on-write and start quickly. Workers are recycled
+after ``GUNICORN_MAX_REQUESTS`` requests, give or take a random jitter so
+they do not all restart at once.
+
+Database connections: every worker thread that runs a query holds its own
+connection, kept open for ``DB_CONN_MAX_AGE`` seconds. One instance can
+therefore hold up to ``workers * threads`` connections. Summed over all
+instances, that has to fit under the server's ``max_connections``
+(Postgres defaults to 100, a few of them reserved) or PgBouncer's
+``max_client_conn``. Behind PgBouncer, ``default_pool_size`` then caps the
+real server connections. Set ``DB_MAX_CONNECTIONS`` to this instance's
+share and startup warns when the worker settings exceed it. Uvicorn
+workers open one connection per in-flight request instead, and close it
+afterwards, so put PgBouncer in front of them.
+
+Workers only see each other's cache invalidations through a shared cache:
+startup warns when several workers run on the default per-process
+``locmemcache://`` (``CACHE_URL``).
+
+Each worker counts its requests, 5xx responses and request time, and logs
+them with its connection reuse counts every ``GUNICORN_STATS_INTERVAL``
+requests (0 turns the periodic line off) and when it exits. Uvicorn
+workers do not run the request hooks, so they only log connection counts.
+"""
+import math
+import os
+import threading
+import time
+
+WORKER_SIZING = {
+    # worker class: (workers per core, extra workers, threads)
+    'sync': (2, 1, 1),
+    'gthread': (1, 1, 4),
+    'uvicorn.workers.UvicornWorker': (1, 0, 1),
+}
+
+
+def cpu_count():
+    """CPUs available to this process, honouring a cgroup v2 CPU quota"""
+    if hasattr(os, 'sched_getaffinity'):
+        count = len(os.sched_getaffinity(0))
+    else:
+        count = os.cpu_count() or 1
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()
+        if quota != 'max':
+            count = min(count, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return count
+
+
+def env_bool(name, default):
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+per_core, extra, default_threads = WORKER_SIZING.get(worker_class, (1, 0, 1))
+workers = int(os.environ.get('WEB_CONCURRENCY', per_core * cpu_count() + extra))
+threads = int(os.environ.get('GUNICORN_THREADS', default_threads))
+
+# Hosting platforms (Render, Heroku) pass the port to listen on in PORT
+bind = os.environ.get('GUNICORN_BIND', f"0.0.0.0:{os.environ.get('PORT', 8000)}")
+preload_app = env_bool('GUNICORN_PRELOAD', True)
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', max_requests // 10))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+stats_interval = int(os.environ.get('GUNICORN_STATS_INTERVAL', 0))
+# Worker heartbeats go to a file; keep it off a possibly slow container disk
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+
+
+class WorkerStats:
+    """Request counters of one worker, shared by its threads"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.requests = 0
+        self.errors = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+
+    def start(self):
+        self.local.started = time.perf_counter()
+
+    def finish(self, status):
+        elapsed = time.perf_counter() - getattr(self.local, 'started', time.perf_counter())
+        with self.lock:
+            self.requests += 1
+            if status >= 500:
+                self.errors += 1
+            self.total_time += elapsed
+            self.max_time = max(self.max_time, elapsed)
+            return self.requests
+
+    def summary(self):
+        with self.lock:
+            mean = self.total_time / self.requests if self.requests else 0.0
+            return {
+                'requests': self.requests,
+                'errors': self.errors,
+                'mean_ms': round(mean * 1000, 3),
+                'max_ms': round(self.max_time * 1000, 3),
+            }
+
+
+def log_stats(worker):
+    from project.db import connection_stats
+
+    worker.log.info('Worker %s requests: %s', worker.pid, worker.stats.summary())
+    for alias, counts in connection_stats().items():
+        worker.log.info(
+            'Worker %s database %r: %d opened, %d reused (reuse ratio %s)',
+            worker.pid, alias, counts['opened'], counts['reused'], counts['reuse_ratio'],
+        )
+
+
+def default_cache_is_local():
+    # Settings only (no app loading), so this also works without preload
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'project.settings')
+    from django.conf import settings
+
+    return settings.CACHES['default']['BACKEND'].endswith('LocMemCache')
+
+
+def connection_budget(workers, threads):
+    """Most database connections one instance holds at once"""
+    return workers * threads
+
+
+def when_ready(server):
+    server.log.info(
+        'Serving with %d %s workers x %d threads on %d CPUs',
+        server.cfg.workers, server.cfg.worker_class_str, server.cfg.threads, cpu_count(),
+    )
+    if server.cfg.workers > 1 and default_cache_is_local():
+        server.log.warning(
+            'CACHE_URL is a per-process locmem cache: category, catalog and page invalidations '
+            'only reach the worker that made the change. Set CACHE_URL to a shared cache, '
+            'e.g. filecache:///tmp/django_cache?max_entries=50000 or redis://host:6379/0',
+        )
+    budget = connection_budget(server.cfg.workers, server.cfg.threads)
+    limit = os.environ.get('DB_MAX_CONNECTIONS')
+    if limit and budget > int(limit):
+        server.log.warning(
+            'Up to %d database connections (%d workers x %d threads) exceed DB_MAX_CONNECTIONS=%s; '
+            'lower WEB_CONCURRENCY or GUNICORN_THREADS, or pool with PgBouncer',
+            budget, server.cfg.workers, server.cfg.threads, limit,
+        )
+    else:
+        server.log.info('Up to %d database connections per instance', budget)
+
+
+def post_fork(server, worker):
+    # A connection opened while preloading would be shared by every worker
+    if server.cfg.preload_app:
+        from django.db import connections
+
+        connections.close_all()
+    worker.stats = WorkerStats()
+
+
+def pre_request(worker, req):
+    worker.stats.start()
+
+
+def post_request(worker, req, environ, resp):
+    requests = worker.stats.finish(resp.status_code or 0)
+    if stats_interval and requests % stats_interval == 0:
+        log_stats(worker)
+
+
+def worker_exit(server, worker):
+    log_stats(worker)
@@ -0,0 +1,141 @@
+from decimal import Decimal
+from functools import reduce
+import operator
+
+from django.db import transaction
+from django.db.models import Case, F, Q, When
+from django.db.models.functions import Now
+
+from dashboard import stats
+from products.models import Product
+from .models import Order, OrderItem
+
+
+class CheckoutError(Exception):
+    pass
+
+
+class EmptyOrderError(CheckoutError):
+    def __init__(self):
+        super().__init__('No purchasable products in the order.')
+
+
+class _StockChanged(Exception):
+    pass
+
+
+class OutOfStockError(CheckoutError):
+    """Raised with every line that cannot be fulfilled, not just the first"""
+
+    def __init__(self, shortages):
+        self.shortages = shortages
+        names = ', '.join(product.name for product, requested in shortages)
+        super().__init__(f'Insufficient stock for: {names}')
+
+
+def _parse_quantities(items):
+    quantities = {}
+    for product_id, quantity in items:
+        try:
+            product_id = int(product_id)
+            quantity = int(quantity)
+        except (TypeError, ValueError):
+            continue
+        if quantity > 0:
+            quantities[product_id] = quantities.get(product_id, 0) + quantity
+    return quantities
+
+
+def place_order(items, user=None, guest_name=None, guest_email=None):
+    """Create an order for ``items`` ((product_id, quantity) pairs).
+
+    Products are locked in one ``SELECT ... FOR UPDATE`` ordered by id, so
+    concurrent checkouts always acquire row locks in the same order. Stock
+    is decremented by a single conditional ``UPDATE`` and all order lines
+    are inserted with one ``bulk_create``. Missing or inactive products are
+    skipped. Raises ``OutOfStockError`` listing every short line.
+    """
+    quantities = _parse_quantities(items)
+
+    try:
+        return _place_order(quantities, user, guest_name, guest_email)
+    except _StockChanged:
+        # Another checkout took the stock between our read and our update
+        # (only possible where SELECT FOR UPDATE is a no-op, e.g. SQLite).
+        products = Product.objects.filter(id__in=quantities.keys(), is_active=True).order_by('id')
+        raise OutOfStockError([
+            (product, quantities[product.id])
+            for product in products
+            if product.stock_quantity < quantities[product.id]
+        ])
+
+
+def _place_order(quantities, user, guest_name, guest_email):
+    with transaction.atomic():
+        products = list(
+            Product.objects.select_for_update()
+            .filter(id__in=quantities.keys(), is_active=True)
+            .order_by('id')
+        )
+        if not products:
+            raise EmptyOrderError()
+
+        shortages = [
+            (product, quantities[product.id])
+            for product in products
+            if product.stock_quantity < quantities[product.id]
+        ]
+        if shortages:
+            raise OutOfStockError(shortages)
+
+        _decrement_stock(products, quantities)
+        # The stock update bypasses Product signals
+        stats.adjust(low_stock_products=sum(
+            not stats.is_low_stock(product.stock_quantity + quantities[product.id])
+            and stats.is_low_stock(product.stock_quantity)
+            for product in products
+        ))
+
+        total_amount = sum(
+            (product.price * quantities[product.id] for product in products),
+            Decimal('0.00'),
+        )
+        order = Order.objects.create(
+            user=user,
+            status='pending',
+            total_amount=total_amount,
+            guest_email=guest_email,
+            guest_name=guest_name,
+        )
+        OrderItem.objects.bulk_create([
+            OrderItem(
+                order=order,
+                product=product,
+                quantity=quantities[product.id],
+                price=product.price,
+            )
+            for product in products
+        ])
+
+    return order
+
+
+def _decrement_stock(products, quantities):
+    # Each row only matches while it still has enough stock, so on backends
+    # without row locks a concurrent checkout shows up as a short row count.
+    condition = reduce(operator.or_, (
+        Q(id=product.id, stock_quantity__gte=quantities[product.id])
+        for product in products
+    ))
+    new_stock = Case(*(
+        When(id=product.id, then=F('stock_quantity') - quantities[product.id])
+        for product in products
+    ))
+    # Stock is part of the product API's rows, so bump updated_at with it:
+    # their ETags and the product card fragments are keyed on it
+    updated = Product.objects.filter(condition).update(stock_quantity=new_stock, updated_at=Now())
+    if updated != len(products):
+        raise _StockChanged()
+
+    for product in products:
+        product.stock_quantity -= quantities[product.id]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 02:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0003_order_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['user', 'updated_at', 'id'], name='order_user_updated_idx'),
+        ),
+    ]
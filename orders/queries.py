@@ -0,0 +1,36 @@
+"""Read path for order pages.
+
+``order_details`` loads an order with its user in one joined query and all
+of its items with their products in a second, so rendering an order costs
+two queries however many lines it has. Only the columns the order pages
+display are fetched.
+"""
+from django.db.models import Prefetch
+from django.shortcuts import get_object_or_404
+
+from .models import Order, OrderItem
+
+ORDER_FIELDS = (
+    'id', 'user', 'status', 'total_amount', 'created_at', 'updated_at',
+    'guest_email', 'guest_name',
+    'user__id', 'user__username', 'user__display_name', 'user__email',
+)
+ITEM_FIELDS = (
+    'id', 'order', 'product', 'quantity', 'price',
+    'product__id', 'product__name', 'product__sku',
+)
+
+
+def order_details(queryset=None):
+    """``queryset`` of orders with user, items and products preloaded"""
+    if queryset is None:
+        queryset = Order.objects.all()
+    items = OrderItem.objects.select_related('product').only(*ITEM_FIELDS).order_by('id')
+    return queryset.select_related('user').only(*ORDER_FIELDS).prefetch_related(
+        Prefetch('items', queryset=items)
+    )
+
+
+def get_order_details(**lookup):
+    """Fetch one order for display, raising ``Http404`` if it doesn't exist"""
+    return get_object_or_404(order_details(), **lookup)
@@ -0,0 +1,177 @@
+from datetime import timedelta
+from django.test import TestCase, Client
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from django.urls import reverse
+from django.contrib.messages import get_messages
+from decimal import Decimal
+from products.models import Product
+from project.testing import QueryBudgetTestMixin
+from frontend.cart import CART_TOKEN_SESSION_KEY, anonymous_cart_key
+from frontend.cart_stores import get_cart_store
+from .models import Order, OrderItem
+from .checkout import place_order, OutOfStockError, EmptyOrderError
+
+User = get_user_model()
+
+
+class PlaceOrderTest(TestCase):
+    def setUp(self):
+        self.products = [
+            Product.objects.create(
+                name=f'Product {i}',
+                sku=f'CHK{i:03d}',
+                description='Test Description',
+                price=Decimal('4.00'),
+                stock_quantity=5
+            )
+            for i in range(6)
+        ]
+
+    def test_place_order_creates_items_and_decrements_stock(self):
+        items = [(str(p.id), 2) for p in self.products]
+        order = place_order(items, guest_name='Guest', guest_email='guest@example.com')
+
+        self.assertEqual(order.total_amount, Decimal('48.00'))
+        self.assertEqual(order.items.count(), 6)
+        for product in Product.objects.all():
+            self.assertEqual(product.stock_quantity, 3)
+
+    def test_place_order_query_count_is_constant(self):
+        """Test checkout cost does not grow with the number of lines"""
+        items = [(str(p.id), 1) for p in self.products]
+        # savepoint, lock, update, order insert, bulk insert, release
+        with self.assertNumQueries(6):
+            place_order(items, guest_name='Guest', guest_email='guest@example.com')
+
+    def test_place_order_reports_every_short_line(self):
+        items = [(str(p.id), 1) for p in self.products]
+        items[0] = (str(self.products[0].id), 6)
+        items[3] = (str(self.products[3].id), 9)
+
+        with self.assertRaises(OutOfStockError) as ctx:
+            place_order(items)
+
+        short = [product.id for product, requested in ctx.exception.shortages]
+        self.assertEqual(short, [self.products[0].id, self.products[3].id])
+        self.assertFalse(Order.objects.exists())
+        self.assertFalse(OrderItem.objects.exists())
+        self.assertEqual(
+            set(Product.objects.values_list('stock_quantity', flat=True)), {5}
+        )
+
+    def test_place_order_skips_inactive_products(self):
+        inactive = self.products[1]
+        inactive.is_active = False
+        inactive.save()
+
+        order = place_order([(self.products[0].id, 1), (inactive.id, 1)])
+        self.assertEqual(list(order.items.values_list('product_id', flat=True)), [self.products[0].id])
+
+    def test_place_order_without_products(self):
+        with self.assertRaises(EmptyOrderError):
+            place_order([('999999', 1)])
+
+
+class CheckoutViewTest(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.product = Product.objects.create(
+            name='Aspirin',
+            sku='ASP001',
+            description='Test Description',
+            price=Decimal('3.00'),
+            stock_quantity=2
+        )
+
+    def set_cart(self, cart):
+        session = self.client.session
+        session[CART_TOKEN_SESSION_KEY] = 'checkout'
+        session.save()
+        for product_id, quantity in cart.items():
+            get_cart_store().set(anonymous_cart_key('checkout'), product_id, quantity)
+
+    def test_guest_checkout(self):
+        self.set_cart({self.product.id: 2})
+        response = self.client.post(reverse('frontend:checkout'), {
+            'customer_name': 'Guest',
+            'customer_email': 'guest@example.com'
+        })
+        order = Order.objects.get()
+        self.assertRedirects(response, reverse('frontend:order_confirmation', args=[order.id]))
+        self.assertEqual(get_cart_store().get(anonymous_cart_key('checkout')), {})
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock_quantity, 0)
+
+    def test_checkout_out_of_stock(self):
+        self.set_cart({self.product.id: 3})
+        response = self.client.post(reverse('frontend:checkout'), {
+            'customer_name': 'Guest',
+            'customer_email': 'guest@example.com'
+        })
+        self.assertRedirects(response, reverse('frontend:cart'), fetch_redirect_response=False)
+        messages = list(get_messages(response.wsgi_request))
+        self.assertIn('Insufficient stock for Aspirin. Only 2 available.', str(messages[0]))
+        self.assertFalse(Order.objects.exists())
+
+
+class OrderAPITest(QueryBudgetTestMixin, TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='buyer', password='testpass123')
+        self.products = [
+            Product.objects.create(
+                name=f'Product {i}', sku=f'API{i:03d}', price=Decimal('2.00'), stock_quantity=100
+            )
+            for i in range(3)
+        ]
+        self.orders = [
+            place_order([(p.id, 1) for p in self.products[:i + 1]], user=self.user)
+            for i in range(3)
+        ]
+        place_order([(self.products[0].id, 1)], guest_name='Guest', guest_email='guest@example.com')
+        self.client.login(username='buyer', password='testpass123')
+        self.url = reverse('order-list')
+
+    def test_requires_authentication(self):
+        self.client.logout()
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_lists_own_orders_with_items(self):
+        """Test orders come newest first with nested items in constant queries"""
+        response = self.client.get(self.url)
+        self.assertWithinQueryBudget(response)
+        results = response.json()['results']
+        self.assertEqual([o['id'] for o in results], [o.id for o in reversed(self.orders)])
+        self.assertEqual(results[0]['total_amount'], '6.00')
+        self.assertEqual(
+            results[-1]['items'],
+            [{'product_id': self.products[0].id, 'sku': 'API000', 'name': 'Product 0', 'quantity': 1, 'price': '2.00'}],
+        )
+
+    def test_pagination(self):
+        response = self.client.get(self.url, {'page_size': 2})
+        self.assertEqual(len(response.json()['results']), 2)
+        response = self.client.get(response.json()['next'])
+        self.assertEqual([o['id'] for o in response.json()['results']], [self.orders[0].id])
+
+    def test_summary(self):
+        results = self.client.get(self.url, {'summary': 'true'}).json()['results']
+        self.assertEqual([o['item_count'] for o in results], [3, 2, 1])
+        self.assertNotIn('items', results[0])
+
+    def test_updated_since(self):
+        """Test incremental sync returns changed orders, oldest change first"""
+        Order.objects.filter(id=self.orders[0].id).update(updated_at=timezone.now() - timedelta(days=2))
+        since = timezone.now() - timedelta(days=1)
+        response = self.client.get(self.url, {'updated_since': since.isoformat()})
+        self.assertEqual([o['id'] for o in response.json()['results']], [self.orders[1].id, self.orders[2].id])
+
+        order = self.orders[0]
+        order.status = 'shipped'
+        order.save(update_fields=['status', 'updated_at'])
+        response = self.client.get(self.url, {'updated_since': since.isoformat()})
+        self.assertEqual(response.json()['results'][-1]['id'], order.id)
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.client.get(self.url, {'updated_since': 'yesterday'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'summary': 'maybe'}).status_code, 400)
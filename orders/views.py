@@ -1,15 +1,93 @@
+from datetime import timezone as dt_timezone
+
+from django.db.models import Count
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from rest_framework import generics
-from rest_framework.response import Response
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
-from .models import Order
+from project.pagination import KeysetCursorPagination
+from .models import Order, OrderItem
+
+ORDER_FIELDS = ['id', 'status', 'total_amount', 'created_at', 'updated_at']
+ITEM_FIELDS = ['order_id', 'product_id', 'product__sku', 'product__name', 'quantity', 'price']
+BOOLEAN_VALUES = {'true': True, '1': True, 'yes': True, 'false': False, '0': False, 'no': False}
+
 
 class OrderListView(generics.ListAPIView):
+    """The signed-in user's orders, cursor paginated, newest first.
+
+    Each page costs two queries, one for the orders and one for all of
+    their items, read with values(). Query parameters:
+
+    * ``updated_since`` (ISO 8601): only orders updated at or after it,
+      oldest change first, for incremental sync. Clients pass the largest
+      ``updated_at`` they have seen and upsert by ``id``.
+    * ``summary=true``: ``item_count`` instead of nested ``items``.
+    * ``cursor`` and ``page_size``.
+    """
     permission_classes = [IsAuthenticated]
-    
+    pagination_class = KeysetCursorPagination
+    keyset_ordering = ['-created_at', '-id']
+
+    def get_updated_since(self):
+        value = self.request.query_params.get('updated_since')
+        if not value:
+            return None
+        try:
+            since = parse_datetime(value)
+        except ValueError:
+            since = None
+        if since is None:
+            raise ValidationError({'updated_since': 'Expected an ISO 8601 date and time'})
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since, dt_timezone.utc)
+        return since
+
+    def is_summary(self):
+        value = self.request.query_params.get('summary', 'false').lower()
+        if value not in BOOLEAN_VALUES:
+            raise ValidationError({'summary': 'Expected true or false'})
+        return BOOLEAN_VALUES[value]
+
     def get_queryset(self):
-        return Order.objects.filter(customer=self.request.user)
-    
+        orders = Order.objects.filter(user=self.request.user)
+        since = self.get_updated_since()
+        if since is None:
+            self.keyset_ordering = ['-created_at', '-id']
+        else:
+            orders = orders.filter(updated_at__gte=since)
+            self.keyset_ordering = ['updated_at', 'id']
+        return orders
+
     def list(self, request, *args, **kwargs):
-        orders = self.get_queryset()
-        data = [{'id': o.id, 'total': str(o.total), 'status': o.status} for o in orders]
-        return Response(data)
\ No newline at end of file
+        summary = self.is_summary()
+        rows = self.paginate_queryset(self.get_queryset().values(*ORDER_FIELDS))
+        ids = [row['id'] for row in rows]
+
+        # An empty id list runs no query
+        lines = OrderItem.objects.filter(order_id__in=ids)
+        if summary:
+            counts = dict(
+                lines.order_by().values('order_id').annotate(count=Count('id')).values_list('order_id', 'count')
+            )
+        else:
+            items = {}
+            for line in lines.order_by('id').values(*ITEM_FIELDS):
+                items.setdefault(line['order_id'], []).append({
+                    'product_id': line['product_id'],
+                    'sku': line['product__sku'],
+                    'name': line['product__name'],
+                    'quantity': line['quantity'],
+                    'price': str(line['price']),
+                })
+
+        data = []
+        for row in rows:
+            order = dict(row, total_amount=str(row['total_amount']))
+            if summary:
+                order['item_count'] = counts.get(row['id'], 0)
+            else:
+                order['items'] = items.get(row['id'], [])
+            data.append(order)
+        return self.get_paginated_response(data)
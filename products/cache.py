@@ -0,0 +1,33 @@
+"""Version of the cached catalog.
+
+Fragments and pages showing product data embed ``catalog_version()`` in
+their cache keys. Product signals bump it on every save, delete and change
+of category membership; bulk writes that bypass signals must call
+``bump_catalog_version`` themselves. Stock decrements at checkout are
+queryset updates and deliberately leave it alone; they bump the rows'
+``updated_at``, which product card fragments are keyed on.
+
+``cached_category_counts()`` keeps the per-category product counts behind
+the catalog sidebar under the catalog and category tree versions.
+"""
+from categories.tree import get_version as tree_version
+from project.cache import bump_namespace_version, get_namespace_version, get_or_compute, make_key
+from .filters import category_product_counts
+
+NAMESPACE = 'catalog'
+# Keys embed both versions, so this only bounds how long superseded counts linger
+COUNTS_TIMEOUT = 60 * 60 * 24
+
+
+def catalog_version():
+    return get_namespace_version(NAMESPACE)
+
+
+def bump_catalog_version():
+    bump_namespace_version(NAMESPACE)
+
+
+def cached_category_counts():
+    """``category_product_counts()``, computed by one process at a time"""
+    key = make_key(NAMESPACE, 'category_counts', tree_version(), catalog_version())
+    return get_or_compute(key, category_product_counts, COUNTS_TIMEOUT)
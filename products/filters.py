@@ -0,0 +1,56 @@
+"""Category filtering over MPTT intervals.
+
+A category's subtree is every node with the same ``tree_id`` whose ``lft``
+lies within the category's ``[lft, rght]`` interval, so "products in this
+category or any of its descendants" is a single range join instead of a
+recursive walk over ``children``.
+"""
+from django.db import connection
+
+from categories.models import Category
+from .models import Product
+
+ProductCategory = Product.categories.through
+
+
+def filter_by_category(queryset, category):
+    """Restrict ``queryset`` to products in ``category`` or its descendants.
+
+    ``category`` may be a ``Category`` or a cached ``CategoryNode``.
+    """
+    links = ProductCategory.objects.filter(
+        category__tree_id=category.tree_id,
+        category__lft__gte=category.lft,
+        category__lft__lte=category.rght,
+    ).values('product_id')
+    return queryset.filter(id__in=links)
+
+
+def category_counts_sql(active_only=True):
+    """Return the ``(sql, params)`` of ``category_product_counts``"""
+    category_table = connection.ops.quote_name(Category._meta.db_table)
+    link_table = connection.ops.quote_name(ProductCategory._meta.db_table)
+    product_table = connection.ops.quote_name(Product._meta.db_table)
+    sql = f"""
+        SELECT anc.id, COUNT(DISTINCT link.product_id)
+        FROM {category_table} anc
+        JOIN {category_table} node
+          ON node.tree_id = anc.tree_id AND node.lft >= anc.lft AND node.lft <= anc.rght
+        JOIN {link_table} link ON link.category_id = node.id
+        JOIN {product_table} product ON product.id = link.product_id
+        {'WHERE product.is_active = %s' if active_only else ''}
+        GROUP BY anc.id
+    """
+    return sql, [True] if active_only else []
+
+
+def category_product_counts(active_only=True):
+    """Return {category_id: product count including descendants}.
+
+    Computed with one aggregated query; a product filed under several
+    categories of the same subtree is counted once. Categories without
+    products are omitted.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(*category_counts_sql(active_only))
+        return dict(cursor.fetchall())
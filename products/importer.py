@@ -0,0 +1,236 @@
+"""Bulk product import with upsert by SKU.
+
+Rows are read lazily from CSV, NDJSON or a JSON array (the columns of
+``products.export``, so an export can be re-imported), validated one by
+one, and written in batches:
+
+* ``bulk_create(update_conflicts=True)`` upserts the batch on ``sku``.
+  Existing products are only updated with the columns the file carries
+  (``sku``, ``name`` and ``price`` are required), so a partial file does
+  not reset their stock, description or active flag;
+* category slugs are resolved against the cached category tree;
+* category links of rows that carry a ``categories`` column are replaced
+  with one delete and one ``bulk_create`` on the through table, and
+  ``categories_changed_at`` is set on the products whose links changed.
+
+Invalid rows are reported with their line number and skipped; the rest of
+their batch is still imported. Bulk writes bypass model signals, so the
+search index is refreshed per batch and the dashboard counters and catalog
+cache version once at the end.
+"""
+import csv
+import json
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.db import transaction
+from django.utils import timezone
+
+from categories.tree import get_tree
+from dashboard.stats import recompute
+from .cache import bump_catalog_version
+from .models import Product
+from .search import index_products
+
+BATCH_SIZE = 1000
+FORMATS = ('csv', 'ndjson', 'json')
+UPDATE_FIELDS = ['name', 'price', 'updated_at']
+# Written on update only when the row carries them
+OPTIONAL_FIELDS = ['description', 'stock_quantity', 'is_active']
+TRUE_VALUES = {'1', 'true', 'yes', 'y'}
+FALSE_VALUES = {'0', 'false', 'no', 'n'}
+
+ProductCategory = Product.categories.through
+
+
+class RowError(ValueError):
+    pass
+
+
+@dataclass
+class ImportResult:
+    created: int = 0
+    updated: int = 0
+    errors: list = field(default_factory=list)
+
+    @property
+    def imported(self):
+        return self.created + self.updated
+
+
+def guess_format(filename):
+    extension = filename.rsplit('.', 1)[-1].lower()
+    return extension if extension in FORMATS else 'csv'
+
+
+def read_rows(stream, file_format):
+    """Yield ``(line_number, row)`` from a text ``stream``"""
+    if file_format == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    elif file_format == 'ndjson':
+        for line_number, line in enumerate(stream, 1):
+            if line.strip():
+                try:
+                    yield line_number, json.loads(line)
+                except ValueError as exc:
+                    yield line_number, RowError(f'Invalid JSON: {exc}')
+    else:
+        # A JSON array has to be parsed whole; prefer NDJSON for large files
+        for index, row in enumerate(json.load(stream), 1):
+            yield index, row
+
+
+def _text(row, name, max_length=None, required=False):
+    value = row.get(name)
+    value = '' if value is None else str(value).strip()
+    if required and not value:
+        raise RowError(f'{name} is required')
+    if max_length and len(value) > max_length:
+        raise RowError(f'{name} is longer than {max_length} characters')
+    return value
+
+
+def _price(row):
+    try:
+        price = Decimal(str(row.get('price')).strip())
+    except (InvalidOperation, TypeError):
+        raise RowError(f"Invalid price {row.get('price')!r}")
+    if not price.is_finite() or price < 0 or price.as_tuple().exponent < -2 or price >= 10 ** 8:
+        raise RowError(f"Invalid price {row.get('price')!r}")
+    return price
+
+
+def _stock(row):
+    value = row.get('stock_quantity')
+    if value in (None, ''):
+        return 0
+    try:
+        stock = int(str(value).strip())
+    except ValueError:
+        raise RowError(f'Invalid stock_quantity {value!r}')
+    if stock < 0:
+        raise RowError('stock_quantity cannot be negative')
+    return stock
+
+
+def _is_active(row):
+    value = row.get('is_active')
+    if value in (None, ''):
+        return True
+    if isinstance(value, bool):
+        return value
+    value = str(value).strip().lower()
+    if value in TRUE_VALUES:
+        return True
+    if value in FALSE_VALUES:
+        return False
+    raise RowError(f'Invalid is_active {value!r}')
+
+
+def _categories(row, category_ids):
+    value = row.get('categories')
+    if value is None:
+        return None
+    slugs = value if isinstance(value, list) else str(value).split('|')
+    slugs = [str(slug).strip() for slug in slugs if str(slug).strip()]
+    unknown = [slug for slug in slugs if slug not in category_ids]
+    if unknown:
+        raise RowError(f"Unknown categories: {', '.join(unknown)}")
+    return {category_ids[slug] for slug in slugs}
+
+
+def present_fields(row):
+    """The optional columns ``row`` carries, in ``OPTIONAL_FIELDS`` order"""
+    return tuple(name for name in OPTIONAL_FIELDS if row.get(name) is not None)
+
+
+def parse_row(row, category_ids):
+    """Return ``(Product, category ids or None)``; raises ``RowError``"""
+    if isinstance(row, RowError):
+        raise row
+    if not isinstance(row, dict):
+        raise RowError('Expected an object')
+    product = Product(
+        sku=_text(row, 'sku', max_length=50, required=True),
+        name=_text(row, 'name', max_length=200, required=True),
+        description=_text(row, 'description'),
+        price=_price(row),
+        stock_quantity=_stock(row),
+        is_active=_is_active(row),
+    )
+    return product, _categories(row, category_ids)
+
+
+def import_products(stream, file_format='csv', batch_size=BATCH_SIZE):
+    """Upsert products from ``stream`` and return an ``ImportResult``"""
+    result = ImportResult()
+    category_ids = {node.slug: node.id for node in get_tree()}
+    rows = read_rows(stream, file_format)
+    try:
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            _import_batch(batch, category_ids, result)
+    except (csv.Error, ValueError, UnicodeDecodeError) as exc:
+        # The file itself is unreadable from here on
+        result.errors.append((None, None, f'Could not read file: {exc}'))
+    bump_catalog_version()
+    recompute()
+    return result
+
+
+def _import_batch(batch, category_ids, result):
+    parsed = {}
+    for line_number, row in batch:
+        try:
+            product, categories = parse_row(row, category_ids)
+        except RowError as exc:
+            sku = row.get('sku') if isinstance(row, dict) else None
+            result.errors.append((line_number, sku, str(exc)))
+            continue
+        # A SKU repeated within a batch: the last row wins
+        parsed[product.sku] = (product, categories, present_fields(row))
+    if not parsed:
+        return
+
+    skus = list(parsed)
+    with transaction.atomic():
+        existing = set(Product.objects.filter(sku__in=skus).values_list('sku', flat=True))
+        # One upsert per set of columns; a CSV file has a single one
+        groups = {}
+        for product, _, fields in parsed.values():
+            groups.setdefault(fields, []).append(product)
+        for fields, products in groups.items():
+            Product.objects.bulk_create(
+                products,
+                update_conflicts=True,
+                unique_fields=['sku'],
+                update_fields=[*UPDATE_FIELDS, *fields],
+            )
+        ids = dict(Product.objects.filter(sku__in=skus).values_list('sku', 'id'))
+
+        relinked = {
+            ids[sku]: categories for sku, (_, categories, _) in parsed.items() if categories is not None
+        }
+        if relinked:
+            links = ProductCategory.objects.filter(product_id__in=relinked)
+            current = {}
+            for product_id, category_id in links.values_list('product_id', 'category_id'):
+                current.setdefault(product_id, set()).add(category_id)
+            links.delete()
+            ProductCategory.objects.bulk_create([
+                ProductCategory(product_id=product_id, category_id=category_id)
+                for product_id, categories in relinked.items()
+                for category_id in categories
+            ])
+            # Read by products.recommendations, as set by the membership signals
+            changed = [pid for pid, categories in relinked.items() if current.get(pid, set()) != categories]
+            Product.objects.filter(id__in=changed).update(categories_changed_at=timezone.now())
+        index_products(ids.values())
+
+    result.updated += len(existing)
+    result.created += len(parsed) - len(existing)
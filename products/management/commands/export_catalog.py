@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from products.export import CHUNK_SIZE, FORMATS, export_lines, iter_products
+
+
+class Command(BaseCommand):
+    help = 'Stream the active catalog as NDJSON or CSV with flat memory use'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', dest='file_format', choices=sorted(FORMATS), default='ndjson')
+        parser.add_argument('--output', help='Write to this file instead of stdout')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Rows fetched per round trip')
+
+    def handle(self, *args, **options):
+        lines = export_lines(options['file_format'], iter_products(chunk_size=options['chunk_size']))
+        if not options['output']:
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+
+        count = -1 if options['file_format'] == 'csv' else 0
+        with open(options['output'], 'w', encoding='utf-8', newline='') as output:
+            for line in lines:
+                output.write(line)
+                count += 1
+        self.stderr.write(self.style.SUCCESS(f"Exported {count} products to {options['output']}"))
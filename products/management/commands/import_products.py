@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from products.importer import BATCH_SIZE, FORMATS, guess_format, import_products
+
+
+class Command(BaseCommand):
+    help = 'Upsert products by SKU from a CSV, NDJSON or JSON file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to import')
+        parser.add_argument('--format', dest='file_format', choices=FORMATS, help='Defaults to the file extension')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Rows written per batch')
+
+    def handle(self, *args, **options):
+        file_format = options['file_format'] or guess_format(options['path'])
+        try:
+            with open(options['path'], encoding='utf-8-sig', newline='') as stream:
+                result = import_products(stream, file_format, options['batch_size'])
+        except OSError as exc:
+            raise CommandError(exc)
+
+        for line_number, sku, message in result.errors:
+            location = f'line {line_number}' if line_number else 'file'
+            self.stderr.write(f"{location}{f' ({sku})' if sku else ''}: {message}")
+        summary = f'{result.created} created, {result.updated} updated, {len(result.errors)} errors'
+        if result.errors:
+            self.stdout.write(self.style.WARNING(summary))
+        else:
+            self.stdout.write(self.style.SUCCESS(summary))
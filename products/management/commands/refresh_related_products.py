@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from products.recommendations import BATCH_SIZE, TOP_K, refresh
+
+
+class Command(BaseCommand):
+    help = 'Recompute precomputed related products (incrementally unless --full)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Rescore every product')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument('--top-k', type=int, default=TOP_K)
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        refreshed = refresh(full=options['full'], batch_size=options['batch_size'], top_k=options['top_k'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Related products refreshed for {refreshed} products in {time.monotonic() - started:.1f}s'
+        ))
@@ -0,0 +1,67 @@
+from django.db import migrations
+
+# The DDL and the initial fill are frozen here rather than imported from
+# products.search, so later changes to the search code do not rewrite
+# migration history. product_id has no foreign key: no model owns the side
+# table, so `flush` would truncate products_product without it (see 0006).
+INSTALL_SQL = {
+    'postgresql': [
+        """
+        CREATE TABLE IF NOT EXISTS products_productsearch (
+            product_id bigint PRIMARY KEY,
+            document tsvector NOT NULL
+        )
+        """,
+        'CREATE INDEX IF NOT EXISTS products_productsearch_document_gin '
+        'ON products_productsearch USING gin (document)',
+        """
+        INSERT INTO products_productsearch (product_id, document)
+        SELECT p.id,
+               setweight(to_tsvector('simple', p.name), 'A')
+               || setweight(to_tsvector('simple', p.sku), 'A')
+               || setweight(to_tsvector('simple', coalesce(string_agg(c.name, ' '), '')), 'B')
+               || setweight(to_tsvector('simple', p.description), 'C')
+        FROM products_product p
+        LEFT JOIN products_product_categories pc ON pc.product_id = p.id
+        LEFT JOIN categories_category c ON c.id = pc.category_id
+        GROUP BY p.id
+        ON CONFLICT (product_id) DO UPDATE SET document = EXCLUDED.document
+        """,
+    ],
+    'sqlite': [
+        'CREATE VIRTUAL TABLE IF NOT EXISTS products_productfts '
+        'USING fts5(name, sku, categories, description)',
+        """
+        INSERT INTO products_productfts (rowid, name, sku, categories, description)
+        SELECT p.id, p.name, p.sku, coalesce(group_concat(c.name, ' '), ''), p.description
+        FROM products_product p
+        LEFT JOIN products_product_categories pc ON pc.product_id = p.id
+        LEFT JOIN categories_category c ON c.id = pc.category_id
+        GROUP BY p.id
+        """,
+    ],
+}
+UNINSTALL_SQL = {
+    'postgresql': ['DROP TABLE IF EXISTS products_productsearch'],
+    'sqlite': ['DROP TABLE IF EXISTS products_productfts'],
+}
+
+
+def run(statements):
+    def operation(apps, schema_editor):
+        with schema_editor.connection.cursor() as cursor:
+            for sql in statements.get(schema_editor.connection.vendor, []):
+                cursor.execute(sql)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0002_alter_product_options_product_is_active_and_more'),
+        ('categories', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(run(INSTALL_SQL), run(UNINSTALL_SQL)),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.30 on 2026-10-18 03:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0006_search_index_without_fk'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='categories_changed_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['categories_changed_at'], name='product_categories_changed_idx'),
+        ),
+    ]
@@ -2,6 +2,8 @@ from django.db import models
 from mptt.models import MPTTModel, TreeForeignKey
 from categories.models import Category
 
+LOW_STOCK_THRESHOLD = 10
+
 class Product(models.Model):
     sku = models.CharField(max_length=50, unique=True)
     name = models.CharField(max_length=200)
@@ -11,6 +13,9 @@ class Product(models.Model):
     categories = models.ManyToManyField(Category, related_name='products')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Set when the product joins or leaves a category; read by
+    # products.recommendations, which cannot go by updated_at alone
+    categories_changed_at = models.DateTimeField(null=True, blank=True, editable=False)
     is_active = models.BooleanField(default=True)
 
     def __str__(self):
@@ -29,3 +34,42 @@ class Product(models.Model):
 
     class Meta:
         ordering = ['name']
+        indexes = [
+            # Catalog listing: active products in keyset order
+            models.Index(fields=['name', 'id'], condition=models.Q(is_active=True), name='product_active_name_idx'),
+            # Admin listing, newest first
+            models.Index(fields=['-created_at', '-id'], name='product_created_idx'),
+            # Low-stock lists only ever touch the few rows below the threshold
+            models.Index(
+                fields=['stock_quantity'],
+                condition=models.Q(stock_quantity__lt=LOW_STOCK_THRESHOLD),
+                name='product_low_stock_idx'
+            ),
+            models.Index(fields=['categories_changed_at'], name='product_categories_changed_idx'),
+        ]
+
+
+class RelatedProduct(models.Model):
+    """A precomputed recommendation: ``related`` is ranked ``rank`` for ``product``.
+
+    Maintained by ``products.recommendations``; see ``refresh_related_products``.
+    """
+    # Indexed by the (product, rank) constraint
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+', db_index=False)
+    related = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='recommended_for')
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+    computed_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.related_id} #{self.rank} for {self.product_id}"
+
+    class Meta:
+        ordering = ['product', 'rank']
+        constraints = [
+            # Also the index the product page reads its list from
+            models.UniqueConstraint(fields=['product', 'rank'], name='relatedproduct_product_rank'),
+        ]
+        indexes = [
+            models.Index(fields=['computed_at'], name='relatedproduct_computed_idx'),
+        ]
@@ -0,0 +1,181 @@
+"""Precomputed related products.
+
+Every active product that shares an order or a category with a product is a
+candidate, scored as::
+
+    orders containing both + CATEGORY_WEIGHT * categories in common
+
+The ``TOP_K`` best are stored as ``RelatedProduct`` rows ranked from 0, so
+the product page reads its list with one lookup on the ``(product, rank)``
+index. Co-purchases come from an aggregated self-join of order items on
+order, run for ``batch_size`` products at a time. A category self-join
+would return every member of a broad category for every product in it,
+so category candidates are limited to the ``CATEGORY_CANDIDATES`` lowest
+ids among each category's active members (the same ids score ties go to),
+read once per run. Categories in common are then counted exactly for every
+candidate from the category links of both products. A product that only
+shares categories outside those candidates is not ranked, which only
+matters in categories much larger than ``TOP_K``.
+
+``refresh()`` is incremental. It rescores both products of every
+co-purchase since the last run, and the products whose category score
+against another product may have changed: a product that joined or left
+a category (``categories_changed_at``, set by the membership signals and
+the importer), the other members of its categories, and the products
+whose list ranks it. Lists ranking a deactivated product are rescored
+too. Checkouts and stock edits bump ``updated_at`` as well, so it is not
+used to find category changes. A reactivated product only re-enters
+other products' lists once they are rescored; run ``full=True``
+periodically (e.g. nightly) to catch those.
+"""
+import heapq
+from itertools import islice
+
+from django.db import connection, transaction
+from django.db.models import F, Max, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from orders.models import OrderItem
+from .models import Product, RelatedProduct
+
+TOP_K = 8
+CATEGORY_WEIGHT = 2.0
+CATEGORY_CANDIDATES = 50
+BATCH_SIZE = 500
+
+ProductCategory = Product.categories.through
+
+
+def _pair_counts(table, group_column, product_ids):
+    """Return ``{(product_id, other_id): count}`` for rows sharing ``group_column``"""
+    table = connection.ops.quote_name(table)
+    product_table = connection.ops.quote_name(Product._meta.db_table)
+    placeholders = ', '.join(['%s'] * len(product_ids))
+    sql = f"""
+        SELECT a.product_id, b.product_id, COUNT(DISTINCT a.{group_column})
+        FROM {table} a
+        JOIN {table} b ON b.{group_column} = a.{group_column} AND b.product_id <> a.product_id
+        JOIN {product_table} other ON other.id = b.product_id
+        WHERE a.product_id IN ({placeholders}) AND other.is_active = %s
+        GROUP BY a.product_id, b.product_id
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [*product_ids, True])
+        return {(product_id, other_id): count for product_id, other_id, count in cursor.fetchall()}
+
+
+def _chunks(ids, size):
+    # Keeps the IN lists under the backends' parameter limits
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def _categories_of(product_ids, chunk_size=BATCH_SIZE):
+    """Return ``{product_id: {category_id, ...}}``"""
+    product_ids = list(product_ids)
+    categories = {}
+    for chunk in _chunks(product_ids, chunk_size):
+        links = ProductCategory.objects.filter(product_id__in=chunk).values_list('product_id', 'category_id')
+        for product_id, category_id in links:
+            categories.setdefault(product_id, set()).add(category_id)
+    return categories
+
+
+def _category_candidates(category_ids, limit=CATEGORY_CANDIDATES):
+    """Return ``{category_id: [product_id, ...]}``, up to ``limit`` active members each"""
+    candidates = {category_id: [] for category_id in category_ids}
+    members = ProductCategory.objects.filter(
+        category_id__in=category_ids, product__is_active=True
+    ).annotate(
+        position=Window(RowNumber(), partition_by=F('category_id'), order_by=F('product_id').asc())
+    ).filter(position__lte=limit).values_list('category_id', 'product_id')
+    for category_id, product_id in members:
+        candidates[category_id].append(product_id)
+    return candidates
+
+
+def score(product_ids, top_k=TOP_K, category_candidates=None):
+    """Return ``{product_id: [(related_id, score), ...]}``, best first
+
+    ``category_candidates`` caches ``_category_candidates()`` across batches.
+    """
+    if category_candidates is None:
+        category_candidates = {}
+    scores = {
+        pair: float(count)
+        for pair, count in _pair_counts(OrderItem._meta.db_table, 'order_id', product_ids).items()
+    }
+    categories = _categories_of(product_ids)
+    missing = {c for linked in categories.values() for c in linked} - category_candidates.keys()
+    for chunk in _chunks(sorted(missing), BATCH_SIZE):
+        category_candidates.update(_category_candidates(chunk))
+    for product_id, linked in categories.items():
+        for category_id in linked:
+            for other_id in category_candidates[category_id]:
+                if other_id != product_id:
+                    scores.setdefault((product_id, other_id), 0.0)
+
+    others = {other_id for _, other_id in scores} - categories.keys()
+    categories.update(_categories_of(others))
+    candidates = {}
+    for (product_id, other_id), value in scores.items():
+        common = categories.get(product_id, set()) & categories.get(other_id, set())
+        candidates.setdefault(product_id, []).append((other_id, value + CATEGORY_WEIGHT * len(common)))
+    # Ties go to the lower id so reruns give the same ranking
+    return {
+        product_id: heapq.nsmallest(top_k, pairs, key=lambda pair: (-pair[1], pair[0]))
+        for product_id, pairs in candidates.items()
+    }
+
+
+def stale_product_ids(since, chunk_size=BATCH_SIZE):
+    """Return the ids of products whose related list may have changed since ``since``"""
+    stale = set(OrderItem.objects.filter(order__created_at__gte=since).values_list('product_id', flat=True))
+    relinked = list(Product.objects.filter(categories_changed_at__gte=since).values_list('id', flat=True))
+    deactivated = list(
+        Product.objects.filter(updated_at__gte=since, is_active=False).values_list('id', flat=True)
+    )
+    stale.update(relinked)
+    for chunk in _chunks(relinked + deactivated, chunk_size):
+        stale.update(RelatedProduct.objects.filter(related_id__in=chunk).values_list('product_id', flat=True))
+    for chunk in _chunks(relinked, chunk_size):
+        categories = ProductCategory.objects.filter(product_id__in=chunk).values('category_id')
+        stale.update(ProductCategory.objects.filter(category_id__in=categories).values_list('product_id', flat=True))
+    return sorted(stale)
+
+
+def refresh(full=False, batch_size=BATCH_SIZE, top_k=TOP_K):
+    """Recompute related products; return the number of products rescored"""
+    started = timezone.now()
+    since = None if full else RelatedProduct.objects.aggregate(since=Max('computed_at'))['since']
+    if since is None:
+        product_ids = iter(list(Product.objects.order_by('id').values_list('id', flat=True)))
+    else:
+        product_ids = iter(stale_product_ids(since, batch_size))
+
+    refreshed = 0
+    category_candidates = {}
+    while True:
+        batch = list(islice(product_ids, batch_size))
+        if not batch:
+            return refreshed
+        ranked = score(batch, top_k, category_candidates)
+        with transaction.atomic():
+            RelatedProduct.objects.filter(product_id__in=batch).delete()
+            RelatedProduct.objects.bulk_create([
+                RelatedProduct(
+                    product_id=product_id, related_id=related_id, rank=rank,
+                    score=value, computed_at=started,
+                )
+                for product_id, pairs in ranked.items()
+                for rank, (related_id, value) in enumerate(pairs)
+            ])
+        refreshed += len(batch)
+
+
+def related_products(product, limit=4):
+    """Active related products of ``product``, best first"""
+    return Product.objects.filter(
+        is_active=True, recommended_for__product=product
+    ).order_by('recommended_for__rank')[:limit]
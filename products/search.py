@@ -0,0 +1,212 @@
+"""Full-text product search.
+
+Products are indexed over name, SKU, category names and description in a
+side table maintained by signals (see ``products.signals``):
+
+* PostgreSQL: ``products_productsearch`` holding a weighted ``tsvector``
+  with a GIN index, ranked with ``ts_rank``.
+* SQLite: ``products_productfts``, an FTS5 virtual table ranked with
+  ``bm25``.
+
+Other backends fall back to ``icontains`` matching. Signals do not fire for
+``bulk_create``/``update``; call ``index_products`` after bulk writes or run
+``manage.py rebuild_search_index``.
+
+The side tables are created by migrations and have no foreign key to
+``products_product``, so ``flush`` can truncate products without them.
+Documents of deleted products are removed by the ``post_delete`` signal,
+and ``prune_index`` (run after every flush and migrate) drops any left
+behind by raw deletes.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+PG_TABLE = 'products_productsearch'
+FTS_TABLE = 'products_productfts'
+
+
+def tokenize(query):
+    return TOKEN_RE.findall((query or '').lower())
+
+
+class SearchBackend:
+    table = None
+
+    def index(self, cursor, product_ids):
+        pass
+
+    def remove(self, cursor, product_ids):
+        pass
+
+    def prune(self, cursor):
+        pass
+
+    def rebuild(self, cursor):
+        pass
+
+    def search(self, queryset, tokens):
+        condition = Q()
+        for token in tokens:
+            condition &= (
+                Q(name__icontains=token)
+                | Q(sku__icontains=token)
+                | Q(description__icontains=token)
+                | Q(categories__name__icontains=token)
+            )
+        return queryset.filter(id__in=queryset.model.objects.filter(condition).values('id'))
+
+
+class PostgresSearchBackend(SearchBackend):
+    table = PG_TABLE
+    DOCUMENT_SQL = f"""
+        INSERT INTO {PG_TABLE} (product_id, document)
+        SELECT p.id,
+               setweight(to_tsvector('simple', p.name), 'A')
+               || setweight(to_tsvector('simple', p.sku), 'A')
+               || setweight(to_tsvector('simple', coalesce(string_agg(c.name, ' '), '')), 'B')
+               || setweight(to_tsvector('simple', p.description), 'C')
+        FROM products_product p
+        LEFT JOIN products_product_categories pc ON pc.product_id = p.id
+        LEFT JOIN categories_category c ON c.id = pc.category_id
+        {{where}}
+        GROUP BY p.id
+        ON CONFLICT (product_id) DO UPDATE SET document = EXCLUDED.document
+    """
+
+    def index(self, cursor, product_ids):
+        cursor.execute(self.DOCUMENT_SQL.format(where='WHERE p.id = ANY(%s)'), [list(product_ids)])
+
+    def remove(self, cursor, product_ids):
+        cursor.execute(f'DELETE FROM {PG_TABLE} WHERE product_id = ANY(%s)', [list(product_ids)])
+
+    def prune(self, cursor):
+        cursor.execute(
+            f'DELETE FROM {PG_TABLE} s '
+            f'WHERE NOT EXISTS (SELECT 1 FROM products_product p WHERE p.id = s.product_id)'
+        )
+
+    def rebuild(self, cursor):
+        cursor.execute(f'TRUNCATE {PG_TABLE}')
+        cursor.execute(self.DOCUMENT_SQL.format(where=''))
+
+    def search(self, queryset, tokens):
+        tsquery = ' & '.join(f'{token}:*' for token in tokens)
+        table = queryset.model._meta.db_table
+        return queryset.filter(
+            id__in=RawSQL(
+                f"SELECT product_id FROM {PG_TABLE} WHERE document @@ to_tsquery('simple', %s)",
+                [tsquery],
+            )
+        ).annotate(
+            search_rank=RawSQL(
+                f"SELECT ts_rank(document, to_tsquery('simple', %s)) FROM {PG_TABLE} "
+                f'WHERE product_id = {table}.id',
+                [tsquery],
+            )
+        ).order_by('-search_rank', 'name', 'id')
+
+
+class SQLiteSearchBackend(SearchBackend):
+    table = FTS_TABLE
+    DOCUMENT_SQL = f"""
+        INSERT INTO {FTS_TABLE} (rowid, name, sku, categories, description)
+        SELECT p.id, p.name, p.sku, coalesce(group_concat(c.name, ' '), ''), p.description
+        FROM products_product p
+        LEFT JOIN products_product_categories pc ON pc.product_id = p.id
+        LEFT JOIN categories_category c ON c.id = pc.category_id
+        {{where}}
+        GROUP BY p.id
+    """
+    # bm25 column weights: name, sku, categories, description
+    RANK_SQL = f'bm25({FTS_TABLE}, 10.0, 10.0, 4.0, 1.0)'
+
+    def index(self, cursor, product_ids):
+        product_ids = list(product_ids)
+        placeholders = ', '.join(['%s'] * len(product_ids))
+        self.remove(cursor, product_ids)
+        cursor.execute(self.DOCUMENT_SQL.format(where=f'WHERE p.id IN ({placeholders})'), product_ids)
+
+    def remove(self, cursor, product_ids):
+        product_ids = list(product_ids)
+        placeholders = ', '.join(['%s'] * len(product_ids))
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})', product_ids)
+
+    def prune(self, cursor):
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid NOT IN (SELECT id FROM products_product)')
+
+    def rebuild(self, cursor):
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        cursor.execute(self.DOCUMENT_SQL.format(where=''))
+
+    def search(self, queryset, tokens):
+        match = ' '.join(f'"{token}"*' for token in tokens)
+        table = queryset.model._meta.db_table
+        return queryset.filter(
+            id__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match])
+        ).annotate(
+            search_rank=RawSQL(
+                f'SELECT {self.RANK_SQL} FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s AND rowid = {table}.id',
+                [match],
+            )
+        ).order_by('search_rank', 'name', 'id')
+
+
+BACKENDS = {
+    'postgresql': PostgresSearchBackend,
+    'sqlite': SQLiteSearchBackend,
+}
+
+
+def get_backend(conn=None):
+    conn = conn or connection
+    return BACKENDS.get(conn.vendor, SearchBackend)()
+
+
+# Product ids are indexed in chunks to stay under SQLite's parameter limit
+INDEX_CHUNK_SIZE = 500
+
+
+def index_products(product_ids):
+    """(Re)build the search documents for ``product_ids``"""
+    product_ids = list(product_ids)
+    backend = get_backend()
+    with connection.cursor() as cursor:
+        for i in range(0, len(product_ids), INDEX_CHUNK_SIZE):
+            backend.index(cursor, product_ids[i:i + INDEX_CHUNK_SIZE])
+
+
+def remove_products(product_ids):
+    product_ids = list(product_ids)
+    backend = get_backend()
+    with connection.cursor() as cursor:
+        for i in range(0, len(product_ids), INDEX_CHUNK_SIZE):
+            backend.remove(cursor, product_ids[i:i + INDEX_CHUNK_SIZE])
+
+
+def rebuild_index():
+    with connection.cursor() as cursor:
+        get_backend().rebuild(cursor)
+
+
+def prune_index(conn=None):
+    """Drop documents of products that no longer exist"""
+    conn = conn or connection
+    backend = get_backend(conn)
+    with conn.cursor() as cursor:
+        # Also runs on migrate, possibly before the side table exists
+        if backend.table and backend.table in conn.introspection.table_names(cursor):
+            backend.prune(cursor)
+
+
+def search_products(queryset, query):
+    """Filter ``queryset`` to products matching ``query``, best match first"""
+    tokens = tokenize(query)
+    if not tokens:
+        return queryset
+    return get_backend().search(queryset, tokens)
@@ -0,0 +1,70 @@
+from django.db import connections
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from categories.models import Category
+from .cache import bump_catalog_version
+from .models import Product
+from .search import index_products, prune_index, remove_products
+
+
+@receiver(post_save, sender=Product)
+def index_saved_product(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_products([instance.pk])
+        bump_catalog_version()
+
+
+@receiver(post_delete, sender=Product)
+def unindex_deleted_product(sender, instance, **kwargs):
+    remove_products([instance.pk])
+    bump_catalog_version()
+
+
+def products_changed(ids):
+    # Category membership is part of a product's API representation, so it
+    # counts as a modification for updated_at-based ETags
+    ids = list(ids)
+    if ids:
+        now = timezone.now()
+        Product.objects.filter(id__in=ids).update(updated_at=now, categories_changed_at=now)
+        index_products(ids)
+        bump_catalog_version()
+
+
+@receiver(m2m_changed, sender=Product.categories.through)
+def index_product_categories(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            products_changed([instance.pk])
+    elif action == 'pre_clear':
+        # category.products.clear() does not report the affected products
+        instance._search_reindex = list(instance.products.values_list('id', flat=True))
+    elif action == 'post_clear':
+        products_changed(instance.__dict__.pop('_search_reindex', []))
+    elif action in ('post_add', 'post_remove'):
+        products_changed(pk_set)
+
+
+@receiver(post_save, sender=Category)
+def index_category_products(sender, instance, created, raw=False, **kwargs):
+    # Category names are part of every member product's document
+    if not created and not raw:
+        index_products(instance.products.values_list('id', flat=True))
+
+
+@receiver(pre_delete, sender=Category)
+def collect_category_products(sender, instance, **kwargs):
+    instance._search_reindex = list(instance.products.values_list('id', flat=True))
+
+
+@receiver(post_delete, sender=Category)
+def index_deleted_category_products(sender, instance, **kwargs):
+    products_changed(instance.__dict__.pop('_search_reindex', []))
+
+
+def prune_search_index(sender, using, **kwargs):
+    # Connected to post_migrate in ProductsConfig.ready; flush sends it too,
+    # after emptying products_product but not the side table
+    prune_index(connections[using])
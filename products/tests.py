@@ -0,0 +1,580 @@
+import csv
+import io
+import json
+import os
+import tempfile
+from functools import partial
+from unittest import mock
+from django.test import TestCase, Client
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIHandler
+from django.core.signals import request_finished, request_started
+from django.db import close_old_connections
+from django.urls import reverse
+from decimal import Decimal
+from categories.models import Category
+from categories.tree import get_tree
+from project.middleware import get_query_budget
+from orders.checkout import place_order
+from orders.models import OrderItem
+from users import synthetic
+from .models import Product, RelatedProduct
+from .recommendations import (
+    CATEGORY_CANDIDATES, CATEGORY_WEIGHT, TOP_K, _category_candidates, refresh, related_products,
+)
+from .search import search_products, prune_index, rebuild_index
+from .filters import filter_by_category, category_product_counts
+from . import views as product_views
+from .export import async_lines, iter_products, ndjson_lines
+from .importer import import_products
+
+User = get_user_model()
+
+
+class ProductSearchTest(TestCase):
+    def setUp(self):
+        self.antibiotics = Category.objects.create(name='Antibiotics', slug='antibiotics')
+        self.amoxicillin = self.create_product(
+            'Amoxicillin 500mg', 'RX001', 'Broad-spectrum antibiotic for bacterial infections.'
+        )
+        self.amoxicillin.categories.add(self.antibiotics)
+        self.ibuprofen = self.create_product(
+            'Ibuprofen 200mg', 'OTC001', 'Pain reliever, not an amoxicillin substitute.'
+        )
+        self.thermometer = self.create_product(
+            'Digital Thermometer', 'DEV002', 'Quick-read thermometer with flexible tip.'
+        )
+
+    def create_product(self, name, sku, description):
+        return Product.objects.create(
+            name=name,
+            sku=sku,
+            description=description,
+            price=Decimal('5.00'),
+            stock_quantity=10
+        )
+
+    def search(self, query):
+        return list(search_products(Product.objects.all(), query))
+
+    def test_matches_name_prefix(self):
+        self.assertEqual(self.search('amox')[0], self.amoxicillin)
+
+    def test_matches_sku_description_and_category(self):
+        self.assertEqual(self.search('dev002'), [self.thermometer])
+        self.assertEqual(self.search('flexible'), [self.thermometer])
+        self.assertEqual(self.search('antibiotics'), [self.amoxicillin])
+
+    def test_all_terms_must_match(self):
+        self.assertEqual(self.search('digital tip'), [self.thermometer])
+        self.assertEqual(self.search('digital amoxicillin'), [])
+
+    def test_name_match_ranks_above_description_match(self):
+        self.assertEqual(self.search('amoxicillin'), [self.amoxicillin, self.ibuprofen])
+
+    def test_punctuation_is_ignored(self):
+        self.assertEqual(self.search('"thermometer"* (tip)'), [self.thermometer])
+        self.assertEqual(len(self.search('  ')), 3)
+
+    def test_index_follows_updates_and_deletes(self):
+        self.thermometer.name = 'Ear Thermometer'
+        self.thermometer.save()
+        self.assertEqual(self.search('ear'), [self.thermometer])
+
+        self.thermometer.delete()
+        self.assertEqual(self.search('thermometer'), [])
+
+    def test_category_rename_and_removal_reindex_products(self):
+        self.antibiotics.name = 'Antibacterials'
+        self.antibiotics.save()
+        self.assertEqual(self.search('antibacterials'), [self.amoxicillin])
+
+        self.amoxicillin.categories.remove(self.antibiotics)
+        self.assertEqual(self.search('antibacterials'), [])
+
+    def test_category_delete_reindexes_products(self):
+        self.antibiotics.delete()
+        self.assertEqual(self.search('antibiotics'), [])
+
+    def test_rebuild_index_picks_up_bulk_created_products(self):
+        Product.objects.bulk_create([
+            Product(sku='BULK001', name='Zinc Lozenges', description='Bulk', price=Decimal('1.00'))
+        ])
+        self.assertEqual(self.search('zinc'), [])
+        rebuild_index()
+        self.assertEqual(len(self.search('zinc')), 1)
+
+    def test_prune_drops_documents_of_deleted_products(self):
+        """Test documents left behind by a raw delete (e.g. flush) are pruned"""
+        product_id = self.ibuprofen.id
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM products_product_categories WHERE product_id = %s', [product_id])
+            cursor.execute('DELETE FROM products_product WHERE id = %s', [product_id])
+        prune_index()
+        # A product reusing the id (sequences restart after flush), bulk
+        # created without a document, must not inherit the old one
+        Product.objects.bulk_create([Product(id=product_id, sku='REUSED', name='Zinc', price=Decimal('1.00'))])
+        self.assertEqual(self.search('ibuprofen'), [])
+
+    def test_product_list_search(self):
+        self.ibuprofen.is_active = False
+        self.ibuprofen.save()
+        response = Client().get(reverse('frontend:product_list'), {'search': 'amoxicillin'})
+        self.assertEqual(list(response.context['page_obj']), [self.amoxicillin])
+
+
+class CategoryFilterTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.medicines = Category.objects.create(name='Medicines', slug='medicines')
+        self.pain = Category.objects.create(name='Pain Relief', slug='pain-relief', parent=self.medicines)
+        self.tablets = Category.objects.create(name='Tablets', slug='tablets', parent=self.pain)
+        self.devices = Category.objects.create(name='Devices', slug='devices')
+        for category in (self.medicines, self.pain, self.tablets, self.devices):
+            category.refresh_from_db()
+
+        self.aspirin = self.create_product('Aspirin', 'A1', [self.tablets, self.pain])
+        self.paracetamol = self.create_product('Paracetamol', 'A2', [self.pain])
+        self.syrup = self.create_product('Cough Syrup', 'A3', [self.medicines])
+        self.monitor = self.create_product('Monitor', 'A4', [self.devices])
+        self.retired = self.create_product('Retired', 'A5', [self.tablets], is_active=False)
+
+    def create_product(self, name, sku, categories, is_active=True):
+        product = Product.objects.create(
+            name=name,
+            sku=sku,
+            description='Test Description',
+            price=Decimal('1.00'),
+            is_active=is_active
+        )
+        product.categories.set(categories)
+        return product
+
+    def test_filter_includes_descendants(self):
+        active = Product.objects.filter(is_active=True)
+        self.assertEqual(
+            list(filter_by_category(active, self.medicines)),
+            [self.aspirin, self.syrup, self.paracetamol]
+        )
+        self.assertEqual(list(filter_by_category(active, self.pain)), [self.aspirin, self.paracetamol])
+        self.assertEqual(list(filter_by_category(active, self.devices)), [self.monitor])
+
+    def test_filter_is_a_single_query(self):
+        node = get_tree().get(self.medicines.id)
+        with self.assertNumQueries(1):
+            list(filter_by_category(Product.objects.all(), node))
+
+    def test_counts_include_descendants_once(self):
+        with self.assertNumQueries(1):
+            counts = category_product_counts()
+        self.assertEqual(counts, {
+            self.medicines.id: 3,
+            self.pain.id: 2,
+            self.tablets.id: 1,
+            self.devices.id: 1,
+        })
+        self.assertEqual(category_product_counts(active_only=False)[self.tablets.id], 2)
+
+    def test_product_list_category_filter(self):
+        client = Client()
+        response = client.get(reverse('frontend:product_list'), {'category': self.pain.id})
+        self.assertEqual(list(response.context['page_obj']), [self.aspirin, self.paracetamol])
+        self.assertIn((get_tree().get(self.pain.id), 2), response.context['categories'])
+
+        response = client.get(reverse('frontend:product_list'), {'category': 'nope'})
+        self.assertEqual(list(response.context['page_obj']), [])
+
+
+class ProductAPITest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.url = reverse('product-list')
+        self.medicines = Category.objects.create(name='Medicines', slug='medicines')
+        self.tablets = Category.objects.create(name='Tablets', slug='tablets', parent=self.medicines)
+        self.aspirin = self.create_product('Aspirin', 'API1', 5, [self.tablets])
+        self.bandage = self.create_product('Bandage', 'API2', 0, [])
+        self.cough = self.create_product('Cough Syrup', 'API3', 2, [self.medicines])
+        self.create_product('Retired', 'API4', 9, [], is_active=False)
+
+    def create_product(self, name, sku, stock_quantity, categories, is_active=True):
+        product = Product.objects.create(
+            name=name,
+            sku=sku,
+            description=f'{name} description',
+            price=Decimal('3.50'),
+            stock_quantity=stock_quantity,
+            is_active=is_active
+        )
+        product.categories.set(categories)
+        return product
+
+    def names(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return [product['name'] for product in response.json()['results']]
+
+    def test_default_fields_and_active_only(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.json()['results'][0], {
+            'id': self.aspirin.id,
+            'sku': 'API1',
+            'name': 'Aspirin',
+            'price': '3.50',
+            'stock_quantity': 5,
+            'in_stock': True,
+        })
+        self.assertEqual(self.names(), ['Aspirin', 'Bandage', 'Cough Syrup'])
+
+    def test_sparse_fieldset(self):
+        response = self.client.get(self.url, {'fields': 'name,categories'})
+        self.assertEqual(response.json()['results'], [
+            {'name': 'Aspirin', 'categories': [self.tablets.id]},
+            {'name': 'Bandage', 'categories': []},
+            {'name': 'Cough Syrup', 'categories': [self.medicines.id]},
+        ])
+        self.assertEqual(self.client.get(self.url, {'fields': 'name,secret'}).status_code, 400)
+
+    def test_filters(self):
+        self.assertEqual(self.names(category=self.medicines.id), ['Aspirin', 'Cough Syrup'])
+        self.assertEqual(self.names(category=self.tablets.id), ['Aspirin'])
+        self.assertEqual(self.names(in_stock='true'), ['Aspirin', 'Cough Syrup'])
+        self.assertEqual(self.names(in_stock='false'), ['Bandage'])
+        self.assertEqual(self.names(search='syrup'), ['Cough Syrup'])
+        self.assertEqual(self.client.get(self.url, {'in_stock': 'maybe'}).status_code, 400)
+
+    def test_query_count_does_not_grow_with_page(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, {'fields': 'id,categories'})
+        self.assertLessEqual(response.wsgi_request.query_stats.count, get_query_budget('product-list'))
+
+    def test_conditional_requests(self):
+        response = self.client.get(self.url)
+        etag = response['ETag']
+        self.assertFalse(response.has_header('Last-Modified'))
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        # A different view of the same rows is a different representation
+        self.assertEqual(self.client.get(self.url, {'fields': 'id'}, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        self.cough.price = Decimal('4.00')
+        self.cough.save()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_checkout_invalidates_etag(self):
+        """Test a stock decrement at checkout changes the page's ETag"""
+        etag = self.client.get(self.url)['ETag']
+        place_order([(self.aspirin.id, 1)], guest_name='Guest', guest_email='guest@example.com')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0]['stock_quantity'], 4)
+
+    def test_category_change_invalidates_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        self.bandage.categories.add(self.medicines)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class ProductExportTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.pain = Category.objects.create(name='Pain Relief', slug='pain-relief')
+        self.tablets = Category.objects.create(name='Tablets', slug='tablets', parent=self.pain)
+        for i in range(5):
+            product = Product.objects.create(
+                name=f'Export {i}',
+                sku=f'EXP{i}',
+                description='Line one\nline "two", with comma',
+                price=Decimal('1.25'),
+                stock_quantity=i,
+                is_active=i != 4
+            )
+            product.categories.set([self.tablets, self.pain] if i == 0 else [])
+
+    def test_ndjson_stream(self):
+        response = Client().get(reverse('product-export', args=['ndjson']))
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([row['sku'] for row in rows], ['EXP0', 'EXP1', 'EXP2', 'EXP3'])
+        self.assertEqual(rows[0]['categories'], ['pain-relief', 'tablets'])
+        self.assertEqual(rows[0]['price'], '1.25')
+
+    def test_csv_stream(self):
+        response = Client().get(reverse('product-export', args=['csv']))
+        self.assertIn('attachment; filename="catalog-', response['Content-Disposition'])
+        content = b''.join(response.streaming_content).decode()
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[0]['categories'], 'pain-relief|tablets')
+        self.assertEqual(rows[0]['description'], 'Line one\nline "two", with comma')
+        self.assertEqual(Client().get('/api/products/export.xml').status_code, 404)
+
+    async def test_streams_under_asgi(self):
+        """Test the ASGI handler sends export lines before reading the whole catalog"""
+        read = []
+
+        def counted_products():
+            for row in iter_products():
+                read.append(row['sku'])
+                yield row
+
+        sent = []
+
+        async def send(message):
+            if message['type'] == 'http.response.body' and message.get('body'):
+                sent.append((message['body'], len(read)))
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        path = reverse('product-export', args=['ndjson'])
+        scope = {'type': 'http', 'method': 'GET', 'path': path, 'query_string': b'', 'headers': []}
+        # Like the test client, keep the handler from closing the test's connection
+        request_started.disconnect(close_old_connections)
+        request_finished.disconnect(close_old_connections)
+        try:
+            with mock.patch.object(product_views, 'iter_products', counted_products), \
+                    mock.patch.object(product_views, 'async_lines', partial(async_lines, chunk_size=1)):
+                await ASGIHandler()(scope, receive, send)
+        finally:
+            request_started.connect(close_old_connections)
+            request_finished.connect(close_old_connections)
+
+        rows = [json.loads(line) for line in b''.join(body for body, _ in sent).splitlines()]
+        self.assertEqual([row['sku'] for row in rows], ['EXP0', 'EXP1', 'EXP2', 'EXP3'])
+        self.assertEqual(sent[0][1], 1)
+
+    def test_queries_are_per_chunk(self):
+        get_tree()
+        with self.assertNumQueries(1 + 2):
+            rows = list(iter_products(chunk_size=2))
+        self.assertEqual(len(rows), 4)
+
+    def test_export_command(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'catalog.csv')
+            call_command('export_catalog', '--format', 'csv', '--output', path, stderr=io.StringIO())
+            with open(path, newline='') as export:
+                self.assertEqual(len(list(csv.DictReader(export))), 4)
+        out = io.StringIO()
+        call_command('export_catalog', stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 4)
+
+
+class ProductImportTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.vitamins = Category.objects.create(name='Vitamins', slug='vitamins')
+        self.minerals = Category.objects.create(name='Minerals', slug='minerals')
+        self.existing = Product.objects.create(
+            name='Old Name', sku='IMP1', description='Old', price=Decimal('1.00'), stock_quantity=1
+        )
+        self.existing.categories.set([self.minerals])
+
+    def run_import(self, content, file_format='csv', **kwargs):
+        return import_products(io.StringIO(content), file_format, **kwargs)
+
+    def test_csv_upsert_with_row_errors(self):
+        result = self.run_import(
+            'sku,name,description,price,stock_quantity,categories\n'
+            'IMP1,Vitamin C,Updated,2.50,40,vitamins\n'
+            'IMP2,Zinc,New,abc,5,minerals\n'
+            'IMP3,Iron,"Multi\nline",3.00,,minerals|vitamins\n'
+            ',Nameless,,1.00,1,\n'
+            'IMP4,Magnesium,,1.00,1,unknown\n'
+        )
+        self.assertEqual((result.created, result.updated), (1, 1))
+        self.assertEqual([(line, sku) for line, sku, message in result.errors], [
+            (3, 'IMP2'), (6, ''), (7, 'IMP4')
+        ])
+        self.assertIn('Unknown categories: unknown', result.errors[2][2])
+
+        self.existing.refresh_from_db()
+        self.assertEqual((self.existing.name, self.existing.price, self.existing.stock_quantity),
+                         ('Vitamin C', Decimal('2.50'), 40))
+        self.assertEqual(list(self.existing.categories.all()), [self.vitamins])
+        iron = Product.objects.get(sku='IMP3')
+        self.assertEqual(iron.stock_quantity, 0)
+        self.assertEqual(set(iron.categories.all()), {self.minerals, self.vitamins})
+        self.assertEqual(list(search_products(Product.objects.all(), 'iron')), [iron])
+
+    def test_missing_categories_column_keeps_links(self):
+        self.run_import('sku,name,price\nIMP1,Renamed,1.00\n')
+        self.assertEqual(list(self.existing.categories.all()), [self.minerals])
+
+    def test_only_changed_links_mark_categories_changed(self):
+        """Test re-importing the same categories leaves categories_changed_at alone"""
+        Product.objects.update(categories_changed_at=None)
+        self.run_import('sku,name,price,categories\nIMP1,Renamed,1.00,minerals\n')
+        self.existing.refresh_from_db()
+        self.assertIsNone(self.existing.categories_changed_at)
+        self.run_import('sku,name,price,categories\nIMP1,Renamed,1.00,vitamins\n')
+        self.existing.refresh_from_db()
+        self.assertIsNotNone(self.existing.categories_changed_at)
+
+    def test_partial_file_keeps_missing_columns(self):
+        """Test re-importing only sku, name and price leaves other fields alone"""
+        self.existing.is_active = False
+        self.existing.stock_quantity = 7
+        self.existing.save()
+        result = self.run_import('sku,name,price\nIMP1,Renamed,3.00\nIMP5,Fresh,1.00\n')
+        self.assertEqual((result.created, result.updated), (1, 1))
+
+        self.existing.refresh_from_db()
+        self.assertEqual(
+            (self.existing.name, self.existing.price, self.existing.description,
+             self.existing.stock_quantity, self.existing.is_active),
+            ('Renamed', Decimal('3.00'), 'Old', 7, False),
+        )
+        fresh = Product.objects.get(sku='IMP5')
+        self.assertEqual((fresh.stock_quantity, fresh.is_active), (0, True))
+
+        self.run_import(json.dumps([{'sku': 'IMP1', 'name': 'Renamed', 'price': 3, 'is_active': True}]), 'json')
+        self.existing.refresh_from_db()
+        self.assertEqual((self.existing.stock_quantity, self.existing.is_active), (7, True))
+
+    def test_json_formats_round_trip_export(self):
+        exported = ''.join(ndjson_lines(iter_products()))
+        Product.objects.all().delete()
+        result = self.run_import(exported + 'not json\n', 'ndjson')
+        self.assertEqual(result.created, 1)
+        self.assertEqual(result.errors[0][0], 2)
+        self.assertEqual(list(Product.objects.get(sku='IMP1').categories.all()), [self.minerals])
+
+        result = self.run_import(json.dumps([{'sku': 'IMP9', 'name': 'Biotin', 'price': 4, 'is_active': False}]), 'json')
+        self.assertEqual(result.created, 1)
+        self.assertFalse(Product.objects.get(sku='IMP9').is_active)
+
+    def test_queries_do_not_grow_with_rows(self):
+        def queries(rows):
+            content = 'sku,name,price,categories\n' + ''.join(
+                f'BULK{i},Bulk {i},1.00,vitamins\n' for i in range(rows)
+            )
+            with CaptureQueriesContext(connection) as context:
+                self.run_import(content)
+            return len(context)
+        queries(1)
+        self.assertEqual(queries(3), queries(30))
+
+    def test_import_command_and_admin_upload(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'supplier.csv')
+            with open(path, 'w') as supplier:
+                supplier.write('sku,name,price\nCMD1,Command Product,1.00\nCMD2,Bad,x\n')
+            out, err = io.StringIO(), io.StringIO()
+            call_command('import_products', path, stdout=out, stderr=err)
+        self.assertIn('1 created, 0 updated, 1 errors', out.getvalue())
+        self.assertIn('line 3 (CMD2): Invalid price', err.getvalue())
+
+        User.objects.create_user(username='admin', password='adminpass123')
+        client = Client()
+        client.login(username='admin', password='adminpass123')
+        upload = SimpleUploadedFile('feed.ndjson', b'{"sku": "UP1", "name": "Uploaded", "price": "2.00"}\n')
+        response = client.post(reverse('frontend:admin_product_import'), {'file': upload})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(Product.objects.filter(sku='UP1').exists())
+        self.assertEqual(response.context['result'].created, 1)
+
+
+class RelatedProductsTest(TestCase):
+    def setUp(self):
+        self.vitamins = Category.objects.create(name='Vitamins', slug='vitamins')
+        self.products = {}
+        for name in ('Vitamin C', 'Vitamin D', 'Zinc', 'Bandage', 'Thermometer'):
+            self.products[name] = Product.objects.create(
+                name=name, sku=name.upper().replace(' ', '-'), price=Decimal('1.00'), stock_quantity=100
+            )
+        for name in ('Vitamin C', 'Vitamin D', 'Zinc'):
+            self.products[name].categories.add(self.vitamins)
+
+    def related_names(self, name):
+        return [product.name for product in related_products(self.products[name])]
+
+    def order(self, *names):
+        place_order([(self.products[name].id, 1) for name in names])
+
+    def test_ranks_co_purchases_and_category_overlap(self):
+        """Test frequent co-purchases outrank a shared category"""
+        for _ in range(4):
+            self.order('Vitamin C', 'Bandage')
+        self.order('Vitamin C', 'Zinc')
+        refresh(full=True)
+        # Bandage 4; Zinc 1 order + 2 for the category; Vitamin D 2
+        self.assertEqual(self.related_names('Vitamin C'), ['Bandage', 'Zinc', 'Vitamin D'])
+        self.assertEqual(self.related_names('Thermometer'), [])
+
+    def test_product_page_reads_precomputed_list(self):
+        """Test the detail page shows the stored ranking"""
+        refresh(full=True)
+        response = self.client.get(reverse('frontend:product_detail', args=[self.products['Zinc'].id]))
+        self.assertEqual([p.name for p in response.context['related_products']], ['Vitamin C', 'Vitamin D'])
+
+    def test_inactive_products_are_skipped(self):
+        refresh(full=True)
+        zinc = self.products['Zinc']
+        zinc.is_active = False
+        zinc.save()
+        self.assertEqual(self.related_names('Vitamin C'), ['Vitamin D'])
+        refresh()
+        self.assertFalse(RelatedProduct.objects.filter(related=zinc).exists())
+
+    def test_incremental_refresh_only_rescores_changed_products(self):
+        """Test an incremental run picks up new orders and leaves the rest"""
+        self.assertEqual(refresh(), len(self.products))
+        self.order('Bandage', 'Thermometer')
+        self.assertEqual(refresh(), 2)
+        self.assertEqual(self.related_names('Bandage'), ['Thermometer'])
+        self.assertEqual(refresh(), 0)
+
+    def test_checkout_does_not_rescore_category_members(self):
+        """Test a checkout bumping updated_at only rescores the products ordered"""
+        refresh(full=True)
+        self.order('Vitamin C')
+        self.assertEqual(refresh(), 1)
+
+    def test_incremental_refresh_rescores_category_members(self):
+        """Test a product joining a category shows up in its members' lists"""
+        refresh(full=True)
+        self.products['Bandage'].categories.add(self.vitamins)
+        # One product per chunk of updated ids
+        self.assertEqual(refresh(batch_size=1), 4)
+        self.assertIn('Bandage', self.related_names('Vitamin C'))
+        self.assertIn('Zinc', self.related_names('Bandage'))
+
+    def test_broad_categories_at_scale(self):
+        """Test category candidates stay capped when categories hold ~100 products"""
+        Product.objects.all().delete()
+        synthetic.generate(scale=0.001, seed=3, batch_size=100, branching=(2,))
+        leaves = Category.objects.filter(children__isnull=True).exclude(id=self.vitamins.id)
+        leaves = list(leaves.values_list('id', flat=True))
+        candidates = _category_candidates(leaves)
+        self.assertEqual([len(candidates[leaf]) for leaf in leaves], [CATEGORY_CANDIDATES] * 2)
+
+        self.assertEqual(refresh(full=True), Product.objects.count())
+        links = {}
+        for product_id, category_id in Product.categories.through.objects.values_list(
+            'product_id', 'category_id'
+        ):
+            links.setdefault(product_id, set()).add(category_id)
+        product = Product.objects.filter(is_active=True).order_by('-id').first()
+        stored = list(RelatedProduct.objects.filter(product=product).values_list('related_id', 'score'))
+        self.assertEqual(len(stored), TOP_K)
+        # Scores count every category in common, not only the capped ones
+        for related_id, value in stored:
+            orders = OrderItem.objects.filter(product=product, order__items__product_id=related_id)
+            common = links[product.id] & links[related_id]
+            self.assertEqual(value, orders.values('order').distinct().count() + CATEGORY_WEIGHT * len(common))
+
+    def test_command(self):
+        out = io.StringIO()
+        call_command('refresh_related_products', '--full', stdout=out)
+        self.assertIn('refreshed for 5 products', out.getvalue())
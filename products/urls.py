@@ -3,4 +3,5 @@ from . import views
 
 urlpatterns = [
     path('products/', views.ProductListView.as_view(), name='product-list'),
+    path('products/export.<str:file_format>', views.ProductExportView.as_view(), name='product-export'),
 ]
\ No newline at end of file
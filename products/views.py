@@ -1,11 +1,152 @@
+import hashlib
+
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
 from rest_framework import generics
-from rest_framework.response import Response
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.views import APIView
+from categories.tree import get_tree
+from project.pagination import KeysetCursorPagination
+from .export import FORMATS, async_lines, export_lines, iter_products
+from .filters import filter_by_category
 from .models import Product
+from .search import search_products
+
+# Public field name -> column read with values(); None marks computed fields
+FIELDS = {
+    'id': 'id',
+    'sku': 'sku',
+    'name': 'name',
+    'description': 'description',
+    'price': 'price',
+    'stock_quantity': 'stock_quantity',
+    'in_stock': None,
+    'categories': None,
+    'created_at': 'created_at',
+    'updated_at': 'updated_at',
+}
+DEFAULT_FIELDS = ['id', 'sku', 'name', 'price', 'stock_quantity', 'in_stock']
+BOOLEAN_VALUES = {'true': True, '1': True, 'yes': True, 'false': False, '0': False, 'no': False}
 
 class ProductListView(generics.ListAPIView):
-    queryset = Product.objects.all()
-    
+    """Active products, cursor paginated, as plain dicts read with values().
+
+    Query parameters: ``category`` (includes subcategories), ``search``,
+    ``in_stock``, ``fields`` (comma separated, see ``FIELDS``), ``cursor``
+    and ``page_size``. Responses carry an ETag built from the page's rows
+    and their ``updated_at`` values, and requests with a matching
+    ``If-None-Match`` get a 304 without serializing the page. There is no
+    Last-Modified: the newest ``updated_at`` on a page says nothing about
+    rows that left it or moved onto it.
+    """
+    pagination_class = KeysetCursorPagination
+    keyset_ordering = ['name', 'id']
+
+    def get_fields(self):
+        requested = self.request.query_params.get('fields')
+        if not requested:
+            return DEFAULT_FIELDS
+        fields = [field.strip() for field in requested.split(',') if field.strip()]
+        unknown = [field for field in fields if field not in FIELDS]
+        if unknown or not fields:
+            raise ValidationError({'fields': f"Unknown fields {unknown}; choose from {', '.join(FIELDS)}"})
+        return list(dict.fromkeys(fields))
+
+    def get_queryset(self):
+        params = self.request.query_params
+        products = Product.objects.filter(is_active=True)
+
+        category_id = params.get('category')
+        if category_id:
+            category = get_tree().get(category_id)
+            products = products.none() if category is None else filter_by_category(products, category)
+
+        in_stock = params.get('in_stock')
+        if in_stock:
+            if in_stock.lower() not in BOOLEAN_VALUES:
+                raise ValidationError({'in_stock': 'Expected true or false'})
+            if BOOLEAN_VALUES[in_stock.lower()]:
+                products = products.filter(stock_quantity__gt=0)
+            else:
+                products = products.filter(stock_quantity=0)
+
+        search = params.get('search')
+        if search:
+            # Keyset order becomes (search_rank, name, id)
+            products = search_products(products, search)
+            self.keyset_ordering = None
+        else:
+            self.keyset_ordering = ['name', 'id']
+        return products
+
     def list(self, request, *args, **kwargs):
-        products = self.get_queryset()
-        data = [{'id': p.id, 'name': p.name, 'price': str(p.price)} for p in products]
-        return Response(data)
\ No newline at end of file
+        fields = self.get_fields()
+        queryset = self.get_queryset()
+        keys = [field.lstrip('-') for field in self.keyset_ordering or queryset.query.order_by]
+        columns = {FIELDS[field] for field in fields if FIELDS[field]}
+        columns.update(keys, ['id', 'updated_at'])
+        if 'in_stock' in fields:
+            columns.add('stock_quantity')
+        rows = self.paginate_queryset(queryset.values(*columns))
+
+        etag = self.get_etag(rows, fields)
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is None:
+            response = self.get_paginated_response(self.serialize(rows, fields))
+        else:
+            response = not_modified
+        response['ETag'] = etag
+        patch_cache_control(response, no_cache=True)
+        return response
+
+    def get_etag(self, rows, fields):
+        # The page content is a function of the request, the rows' versions and
+        # whether neighbouring pages exist
+        digest = hashlib.sha1(self.request.get_full_path().encode())
+        digest.update(repr(fields).encode())
+        digest.update(repr([(row['id'], row['updated_at'].isoformat()) for row in rows]).encode())
+        page = self.paginator.page
+        digest.update(repr((page.has_next(), page.has_previous())).encode())
+        return f'"{digest.hexdigest()}"'
+
+    def serialize(self, rows, fields):
+        categories = {}
+        if 'categories' in fields and rows:
+            links = Product.categories.through.objects.filter(
+                product_id__in=[row['id'] for row in rows]
+            ).values_list('product_id', 'category_id').order_by('category_id')
+            for product_id, category_id in links:
+                categories.setdefault(product_id, []).append(category_id)
+
+        data = []
+        for row in rows:
+            item = {}
+            for field in fields:
+                if field == 'in_stock':
+                    item[field] = row['stock_quantity'] > 0
+                elif field == 'categories':
+                    item[field] = categories.get(row['id'], [])
+                elif field == 'price':
+                    item[field] = str(row['price'])
+                else:
+                    item[field] = row[FIELDS[field]]
+            data.append(item)
+        return data
+
+
+class ProductExportView(APIView):
+    """Stream every active product as NDJSON or CSV (``export.ndjson``/``export.csv``)"""
+
+    def get(self, request, file_format):
+        if file_format not in FORMATS:
+            raise NotFound(f"Unknown export format; choose from {', '.join(FORMATS)}")
+        lines = export_lines(file_format, iter_products())
+        # The ASGI handler would list() a synchronous iterator before sending
+        if isinstance(request._request, ASGIRequest):
+            lines = async_lines(lines)
+        response = StreamingHttpResponse(lines, content_type=FORMATS[file_format])
+        filename = f'catalog-{timezone.now():%Y%m%d}.{file_format}'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
\ No newline at end of file
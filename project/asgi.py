@@ -0,0 +1,7 @@
+import os
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'project.settings')
+# Serve the product page from frontend.async_views
+os.environ.setdefault('ASYNC_VIEWS', 'True')
+application = get_asgi_application()
\ No newline at end of file
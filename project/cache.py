@@ -0,0 +1,164 @@
+"""Cache helpers: namespaced keys, stampede protection and hit/miss counts.
+
+Keys are built with ``make_key(namespace, *parts)``; the namespace is the
+first segment and is what hits and misses are counted under. Keys that
+memcached would refuse (too long, whitespace) are hashed. Keys that embed
+``get_namespace_version(namespace)`` are all invalidated at once by
+``bump_namespace_version``; stale entries are simply never read again.
+
+``get_or_compute`` protects expensive values against stampedes:
+
+* on a miss, the process that wins a short ``add()`` lock computes the value
+  while the others poll for it for up to ``WAIT_TIMEOUT`` seconds instead of
+  all running the same queries;
+* a hit may recompute the value before it expires, with a probability that
+  grows as the expiry approaches and with the time the value took to
+  compute (the XFetch rule), so a hot key is refreshed by one process
+  while everyone else keeps reading it.
+
+The lock is only single-flight across processes on a backend with an
+atomic ``add()``, i.e. Redis or Memcached. The file cache checks and
+writes in two steps, so two gunicorn workers can both win it and compute
+the same value (the result is still correct). Use Redis or Memcached when
+stampedes across workers matter.
+
+Counts are kept per process in ``cache_stats()`` and per request for
+``CacheStatsMiddleware``'s ``X-Cache-Stats`` header.
+"""
+import hashlib
+import math
+import random
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.core.cache import cache as default_cache, caches
+from django.db import transaction
+
+MAX_KEY_LENGTH = 200
+LOCK_TIMEOUT = 30
+WAIT_TIMEOUT = 2.0
+WAIT_INTERVAL = 0.05
+# > 1 favours earlier recomputes, < 1 later ones
+BETA = 1.0
+EVENTS = ('hit', 'miss', 'early', 'wait')
+
+_totals = Counter()
+_totals_lock = threading.Lock()
+_request_counts = ContextVar('cache_request_counts', default=None)
+
+
+def make_key(namespace, *parts):
+    key = ':'.join(str(part) for part in (namespace, *parts))
+    if len(key) > MAX_KEY_LENGTH or any(ord(char) <= 32 or char == '\x7f' for char in key):
+        key = f'{namespace}:{hashlib.sha1(key.encode()).hexdigest()}'
+    return key
+
+
+def get_namespace_version(namespace):
+    key = make_key(namespace, 'version')
+    version = default_cache.get(key)
+    if version is None:
+        # Start from the clock so an evicted counter never reuses old keys
+        default_cache.add(key, time.time_ns(), None)
+        version = default_cache.get(key)
+    return version
+
+
+def _new_namespace_version(namespace):
+    # A fresh clock value rather than incr(), which file and database caches
+    # implement as get then set: a bump racing another could write back a
+    # version that was already superseded
+    default_cache.set(make_key(namespace, 'version'), time.time_ns(), None)
+
+
+def bump_namespace_version(namespace):
+    """Invalidate every key built from the namespace's version.
+
+    Bumped immediately for this process and again on commit, so a value
+    rebuilt by another process from pre-commit data is not kept.
+    """
+    _new_namespace_version(namespace)
+    transaction.on_commit(lambda: _new_namespace_version(namespace))
+
+
+def record(namespace, event, count=1):
+    with _totals_lock:
+        _totals[namespace, event] += count
+    counts = _request_counts.get()
+    if counts is not None:
+        counts[event] += count
+
+
+def cache_stats():
+    """Return ``{namespace: {event: count}}`` for this process"""
+    with _totals_lock:
+        totals = dict(_totals)
+    stats = {}
+    for (namespace, event), count in sorted(totals.items()):
+        stats.setdefault(namespace, dict.fromkeys(EVENTS, 0))[event] = count
+    return stats
+
+
+def reset_cache_stats():
+    with _totals_lock:
+        _totals.clear()
+
+
+@contextmanager
+def track_requests():
+    """Collect the events of the enclosed code in a fresh ``Counter``"""
+    counts = Counter()
+    token = _request_counts.set(counts)
+    try:
+        yield counts
+    finally:
+        _request_counts.reset(token)
+
+
+def _compute_and_store(cache, key, lock_key, compute, timeout):
+    try:
+        started = time.monotonic()
+        value = compute()
+        delta = time.monotonic() - started
+        expires = math.inf if timeout is None else time.time() + timeout
+        cache.set(key, (value, delta, expires), timeout)
+        return value
+    finally:
+        cache.delete(lock_key)
+
+
+def get_or_compute(key, compute, timeout, using='default', beta=BETA):
+    """Return the cached value of ``key``, calling ``compute()`` to fill it"""
+    cache = caches[using]
+    namespace = key.split(':', 1)[0]
+    lock_key = f'{key}:lock'
+
+    entry = cache.get(key)
+    if entry is not None:
+        value, delta, expires = entry
+        # -log(u) is exponentially distributed, so the chance of an early
+        # recompute rises sharply in the last few ``delta`` before expiry
+        early = time.time() - delta * beta * math.log(1 - random.random()) >= expires
+        if early and cache.add(lock_key, 1, LOCK_TIMEOUT):
+            record(namespace, 'early')
+            return _compute_and_store(cache, key, lock_key, compute, timeout)
+        record(namespace, 'hit')
+        return value
+
+    record(namespace, 'miss')
+    if cache.add(lock_key, 1, LOCK_TIMEOUT):
+        return _compute_and_store(cache, key, lock_key, compute, timeout)
+
+    deadline = time.monotonic() + WAIT_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(WAIT_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            record(namespace, 'wait')
+            return entry[0]
+    # The lock holder is slow or died; compute without storing a result
+    # that would race with its own
+    return compute()
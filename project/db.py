@@ -0,0 +1,59 @@
+"""Database connection reuse counters.
+
+Per process and per database alias, ``opened`` counts new connections
+(``connection_created``) and ``reused`` counts requests that started with a
+connection kept open by an earlier one (``DB_CONN_MAX_AGE``). A reuse ratio
+near 1 means the TCP and authentication handshake is rarely paid; near 0
+means persistent connections are off, expire too soon, or fail their
+health checks. ``connection_stats()`` is logged per gunicorn worker (see
+``gunicorn.conf.py``).
+"""
+import threading
+from collections import Counter
+
+from django.core.signals import request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+EVENTS = ('opened', 'reused')
+
+_totals = Counter()
+_totals_lock = threading.Lock()
+
+
+def record(alias, event):
+    with _totals_lock:
+        _totals[alias, event] += 1
+
+
+@receiver(connection_created, dispatch_uid='project.db.count_opened')
+def count_opened(sender, connection, **kwargs):
+    record(connection.alias, 'opened')
+
+
+# Connected after close_old_connections, so connections it closes as too
+# old or unusable are not counted
+@receiver(request_started, dispatch_uid='project.db.count_reused')
+def count_reused(sender, **kwargs):
+    for connection in connections.all(initialized_only=True):
+        if connection.connection is not None:
+            record(connection.alias, 'reused')
+
+
+def connection_stats():
+    """Return ``{alias: {'opened': n, 'reused': n, 'reuse_ratio': r}}`` for this process"""
+    with _totals_lock:
+        totals = dict(_totals)
+    stats = {}
+    for (alias, event), count in sorted(totals.items()):
+        stats.setdefault(alias, dict.fromkeys(EVENTS, 0))[event] = count
+    for counts in stats.values():
+        total = counts['opened'] + counts['reused']
+        counts['reuse_ratio'] = round(counts['reused'] / total, 3) if total else None
+    return stats
+
+
+def reset_connection_stats():
+    with _totals_lock:
+        _totals.clear()
@@ -0,0 +1,161 @@
+import logging
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from . import db  # noqa: F401  (connects the connection reuse counters)
+from .cache import EVENTS, track_requests
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStats:
+    """Execute wrapper counting queries and total database time"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - start
+
+
+def get_query_budget(view_name):
+    budgets = getattr(settings, 'QUERY_BUDGETS', {})
+    return budgets.get(view_name, getattr(settings, 'QUERY_BUDGET_DEFAULT', None))
+
+
+class AsyncCapableMiddleware:
+    """Base for middleware that runs in sync and async chains alike.
+
+    Under ASGI, a sync-only middleware forces Django to run the rest of the
+    chain through ``async_to_sync``, tying up a thread per request.
+    Subclasses implement ``__call__`` and ``__acall__``.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+
+def _wrap_connections(stack, stats):
+    for alias in settings.DATABASES:
+        stack.enter_context(connections[alias].execute_wrapper(stats))
+
+
+class QueryBudgetMiddleware(AsyncCapableMiddleware):
+    """Count SQL queries per request and compare them to the view's budget.
+
+    The totals are reported in a ``Server-Timing`` header and requests over
+    budget are logged as warnings, tagged with the resolved view name.
+    """
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats = QueryStats()
+        with ExitStack() as stack:
+            _wrap_connections(stack, stats)
+            response = self.get_response(request)
+        return self.report(request, response, stats)
+
+    async def __acall__(self, request):
+        stats = QueryStats()
+        stack = ExitStack()
+        # Connections are per thread: wrap the ones of the thread that
+        # sync_to_async, and so the async ORM, runs this request's queries in
+        await sync_to_async(_wrap_connections)(stack, stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        return self.report(request, response, stats)
+
+    def report(self, request, response, stats):
+        match = getattr(request, 'resolver_match', None)
+        view_name = match.view_name if match else None
+        request.query_stats = stats
+
+        if getattr(settings, 'QUERY_BUDGET_SERVER_TIMING', True):
+            timing = f'db;dur={stats.duration * 1000:.2f};desc="{stats.count} queries"'
+            if response.has_header('Server-Timing'):
+                timing = f"{response['Server-Timing']}, {timing}"
+            response['Server-Timing'] = timing
+
+        budget = get_query_budget(view_name)
+        if budget is not None and stats.count > budget:
+            logger.warning(
+                'Query budget exceeded for %s: %d queries (budget %d, %.2fms) on %s %s',
+                view_name, stats.count, budget, stats.duration * 1000,
+                request.method, request.path,
+            )
+        return response
+
+
+class CacheStatsMiddleware(AsyncCapableMiddleware):
+    """Report the request's ``project.cache`` events in an ``X-Cache-Stats`` header"""
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with track_requests() as counts:
+            response = self.get_response(request)
+        return self.report(request, response, counts)
+
+    async def __acall__(self, request):
+        with track_requests() as counts:
+            response = await self.get_response(request)
+        return self.report(request, response, counts)
+
+    def report(self, request, response, counts):
+        request.cache_stats = counts
+
+        if counts and getattr(settings, 'CACHE_STATS_HEADER', True):
+            response['X-Cache-Stats'] = ', '.join(
+                f'{event}={counts[event]}' for event in EVENTS if counts[event]
+            )
+        return response
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """WhiteNoise, usable in an async middleware chain.
+
+    Static files are looked up in WhiteNoise's in-memory index and served
+    the same way in both modes; everything else is passed on without
+    leaving the event loop.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def find_static(self, request):
+        if self.autorefresh:
+            return self.find_file(request.path_info)
+        return self.files.get(request.path_info)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        static_file = self.find_static(request)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return await self.get_response(request)
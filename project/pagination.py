@@ -0,0 +1,269 @@
+"""Keyset (cursor) pagination for HTML views and DRF endpoints.
+
+Pages are selected with a ``WHERE (key1, key2, ...) > (v1, v2, ...)``
+condition on the queryset's ordering instead of ``OFFSET``, so every page
+costs the same regardless of depth, and no ``COUNT(*)`` is issued unless
+asked for. Cursors are opaque URL-safe tokens holding the boundary row's
+ordering values and the direction of travel.
+"""
+import base64
+import binascii
+import datetime
+import decimal
+import json
+import operator
+import uuid
+from functools import reduce
+
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _encode_value(value):
+    # Full precision: DjangoJSONEncoder truncates microseconds, which would
+    # skip or repeat rows created within the same millisecond.
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (decimal.Decimal, uuid.UUID)):
+        return str(value)
+    return value
+
+
+def encode_cursor(values, direction):
+    payload = json.dumps({'v': [_encode_value(v) for v in values], 'd': direction}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        values, direction = payload['v'], payload['d']
+    except (TypeError, ValueError, KeyError, binascii.Error, UnicodeError):
+        raise InvalidCursor(token)
+    if direction not in (NEXT, PREVIOUS) or not isinstance(values, list):
+        raise InvalidCursor(token)
+    return values, direction
+
+
+def approximate_count(queryset, cap=1000):
+    """Cheap row count estimate.
+
+    PostgreSQL reads the planner's estimate from ``EXPLAIN``; other backends
+    count at most ``cap`` rows. Returns ``(count, exact)``.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql':
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows']), False
+    count = queryset.order_by()[:cap + 1].count()
+    return min(count, cap), count <= cap
+
+
+class KeysetPage:
+    def __init__(self, paginator, object_list, has_next, has_previous):
+        self.paginator = paginator
+        self.object_list = object_list
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        if not self._has_next or not self.object_list:
+            return None
+        return encode_cursor(self.paginator.key_values(self.object_list[-1]), NEXT)
+
+    @property
+    def previous_cursor(self):
+        if not self._has_previous or not self.object_list:
+            return None
+        return encode_cursor(self.paginator.key_values(self.object_list[0]), PREVIOUS)
+
+
+class KeysetPaginator:
+    """Paginate ``queryset`` by its ordering, made unique with the primary key.
+
+    ``ordering`` defaults to the queryset's ``order_by`` and then the model's
+    ``Meta.ordering``; only plain field or annotation names are supported.
+    ``count`` is ``None`` (never count), ``'approximate'`` or ``'exact'``.
+    """
+
+    def __init__(self, queryset, per_page, ordering=None, count=None):
+        ordering = list(ordering or queryset.query.order_by or queryset.model._meta.ordering)
+        if not all(isinstance(field, str) for field in ordering):
+            raise ValueError('Keyset pagination requires field name ordering')
+        names = [field.lstrip('-') for field in ordering]
+        if 'pk' not in names and 'id' not in names:
+            descending = ordering[-1].startswith('-') if ordering else False
+            ordering.append('-pk' if descending else 'pk')
+
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.ordering = ordering
+        self.keys = [(field.lstrip('-'), field.startswith('-')) for field in ordering]
+        self.count_mode = count
+        self._count = None
+
+    def key_values(self, obj):
+        if isinstance(obj, dict):
+            return [obj['id'] if name == 'pk' and 'pk' not in obj else obj[name] for name, _ in self.keys]
+        return [getattr(obj, name) for name, _ in self.keys]
+
+    def _after(self, values, forward):
+        # (a, b, c) > (x, y, z)  <=>  a > x OR (a = x AND b > y) OR (a = x AND b = y AND c > z)
+        if len(values) != len(self.keys):
+            raise InvalidCursor(values)
+        terms = []
+        for i, (name, descending) in enumerate(self.keys):
+            lookup = 'lt' if descending == forward else 'gt'
+            term = Q(**{f'{name}__{lookup}': values[i]})
+            for j, (prior, _) in enumerate(self.keys[:i]):
+                term &= Q(**{prior: values[j]})
+            terms.append(term)
+        return reduce(operator.or_, terms)
+
+    def page_queryset(self, cursor=None):
+        """Return ``(queryset, forward)`` for the page after/before ``cursor``"""
+        queryset = self.queryset
+        forward = True
+        if cursor:
+            values, direction = decode_cursor(cursor)
+            forward = direction == NEXT
+            try:
+                queryset = queryset.filter(self._after(values, forward))
+            except (TypeError, ValueError, ValidationError):
+                raise InvalidCursor(cursor)
+
+        if forward:
+            return queryset.order_by(*self.ordering), True
+        return queryset.order_by(*(
+            name if descending else f'-{name}' for name, descending in self.keys
+        )), False
+
+    def page(self, cursor=None):
+        """Return the page after/before ``cursor``; raises ``InvalidCursor``"""
+        queryset, forward = self.page_queryset(cursor)
+        rows = list(queryset[:self.per_page + 1])
+        more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if forward:
+            return KeysetPage(self, rows, has_next=more, has_previous=bool(cursor))
+        rows.reverse()
+        return KeysetPage(self, rows, has_next=True, has_previous=more)
+
+    def get_page(self, cursor=None):
+        """Like ``page`` but falls back to the first page on a bad cursor"""
+        try:
+            return self.page(cursor)
+        except InvalidCursor:
+            return self.page()
+
+    @property
+    def count(self):
+        if self.count_mode is None:
+            return None
+        if self._count is None:
+            if self.count_mode == 'exact':
+                self._count = (self.queryset.count(), True)
+            else:
+                self._count = approximate_count(self.queryset)
+        return self._count[0]
+
+    @property
+    def count_is_exact(self):
+        return self.count is not None and self._count[1]
+
+
+class KeysetCursorPagination(BasePagination):
+    """DRF pagination backed by ``KeysetPaginator``.
+
+    Views may set ``keyset_ordering`` and ``keyset_count`` to override the
+    queryset ordering and count mode.
+    """
+    page_size = api_settings.PAGE_SIZE or 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    count = None
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.paginator = KeysetPaginator(
+            queryset,
+            self.get_page_size(request),
+            ordering=getattr(view, 'keyset_ordering', None),
+            count=getattr(view, 'keyset_count', self.count),
+        )
+        try:
+            self.page = self.paginator.page(request.query_params.get(self.cursor_query_param))
+        except InvalidCursor:
+            raise NotFound('Invalid cursor')
+        return list(self.page)
+
+    def get_link(self, cursor):
+        if cursor is None:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, cursor)
+
+    def get_next_link(self):
+        return self.get_link(self.page.next_cursor)
+
+    def get_previous_link(self):
+        return self.get_link(self.page.previous_cursor)
+
+    def get_first_link(self):
+        return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+
+    def get_paginated_response(self, data):
+        payload = {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+        }
+        if self.paginator.count is not None:
+            payload['count'] = self.paginator.count
+            payload['count_is_exact'] = self.paginator.count_is_exact
+        payload['results'] = data
+        return Response(payload)
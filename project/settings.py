@@ -2,6 +2,7 @@ import os
 from pathlib import Path
 import environ
 import dj_database_url
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -42,12 +43,15 @@ INSTALLED_APPS = [
     'categories',
     'products',
     'orders',
+    'dashboard',
     'frontend',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',  # Add WhiteNoise
+    'project.middleware.StaticFilesMiddleware',  # WhiteNoise, async-capable
+    'project.middleware.QueryBudgetMiddleware',
+    'project.middleware.CacheStatsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -76,19 +80,84 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'project.wsgi.application'
 
+# Route the product page to frontend.async_views; project.asgi turns it on
+ASYNC_VIEWS = env.bool('ASYNC_VIEWS', default=False)
+
 # Database
+# Connections are kept open for DB_CONN_MAX_AGE seconds (0 closes them after
+# every request) and pinged before reuse when DB_CONN_HEALTH_CHECKS is on.
+# Under ASGI every request queries from a thread of its own, so a kept
+# connection is never reused; pool with PgBouncer instead (see README).
+DB_CONN_MAX_AGE = env.int('DB_CONN_MAX_AGE', default=0 if ASYNC_VIEWS else 600)
+DB_CONN_HEALTH_CHECKS = env.bool('DB_CONN_HEALTH_CHECKS', default=True)
+# 'session' or 'transaction' when DATABASE_URL points at PgBouncer
+DB_POOL_MODE = env('DB_POOL_MODE', default='')
+if DB_POOL_MODE not in ('', 'session', 'transaction'):
+    raise ImproperlyConfigured(f"DB_POOL_MODE must be 'session' or 'transaction', not {DB_POOL_MODE!r}")
+
 if env('DATABASE_URL', default=''):
     DATABASES = {
-        'default': dj_database_url.parse(env('DATABASE_URL'))
+        'default': dj_database_url.parse(
+            env('DATABASE_URL'),
+            conn_max_age=DB_CONN_MAX_AGE,
+            conn_health_checks=DB_CONN_HEALTH_CHECKS,
+        )
     }
+    if DB_POOL_MODE == 'transaction':
+        # Consecutive transactions may run on different server connections,
+        # which server-side cursors (QuerySet.iterator()) do not survive
+        DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
 else:
     DATABASES = {
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
             'NAME': BASE_DIR / 'db.sqlite3',
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': DB_CONN_HEALTH_CHECKS,
         }
     }
 
+# Cache: locmemcache:// is per process; share it between workers with e.g.
+# filecache:///var/tmp/django_cache?max_entries=50000&cull_frequency=10
+# (FileBasedCache keeps 300 entries by default), redis://host:6379/0 (needs
+# redis-py), pymemcache://host:11211 or dbcache://cache_table (run
+# createcachetable). Only Redis and Memcached lock atomically across
+# workers (see project.cache)
+CACHES = {
+    'default': env.cache_url('CACHE_URL', default='locmemcache://'),
+}
+CACHE_STATS_HEADER = env.bool('CACHE_STATS_HEADER', default=True)
+# {% fragment %} keys embed versions or timestamps, so this only bounds how
+# long superseded fragments linger
+FRAGMENT_CACHE_TIMEOUT = env.int('FRAGMENT_CACHE_TIMEOUT', default=60 * 60 * 24)
+# Anonymous catalog pages (0 disables); also bounds how stale a cached stock
+# level gets
+PAGE_CACHE_TIMEOUT = env.int('PAGE_CACHE_TIMEOUT', default=60)
+
+# Per-request SQL query budgets, keyed by resolved view name. Requests over
+# budget are logged by QueryBudgetMiddleware and fail QueryBudgetTestMixin.
+QUERY_BUDGETS = {
+    'frontend:home': 3,
+    'frontend:product_list': 3,
+    'frontend:product_detail': 4,
+    'frontend:cart': 3,
+    'frontend:checkout': 12,
+    'frontend:order_confirmation': 4,
+    'frontend:order_detail': 4,
+    'frontend:admin_order_detail': 4,
+    'frontend:admin_dashboard': 5,
+    'product-list': 2,
+    'order-list': 4,
+    'category-list': 2,
+}
+QUERY_BUDGET_DEFAULT = env.int('QUERY_BUDGET_DEFAULT', default=None)
+QUERY_BUDGET_SERVER_TIMING = env.bool('QUERY_BUDGET_SERVER_TIMING', default=True)
+
+# Cart storage: frontend.cart_stores.DatabaseCartStore or CacheCartStore
+CART_STORE = env('CART_STORE', default='frontend.cart_stores.DatabaseCartStore')
+CART_CACHE_ALIAS = env('CART_CACHE_ALIAS', default='default')
+CART_CACHE_TIMEOUT = env.int('CART_CACHE_TIMEOUT', default=30 * 24 * 60 * 60)
+
 # Custom user model
 AUTH_USER_MODEL = 'users.CustomUser'
 
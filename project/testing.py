@@ -0,0 +1,22 @@
+from .middleware import get_query_budget
+
+
+class QueryBudgetTestMixin:
+    """TestCase mixin asserting responses stay within their query budget.
+
+    Relies on ``QueryBudgetMiddleware`` having recorded the request's query
+    stats. The budget defaults to ``settings.QUERY_BUDGETS`` for the view.
+    """
+
+    def assertWithinQueryBudget(self, response, budget=None):
+        view_name = response.resolver_match.view_name
+        if budget is None:
+            budget = get_query_budget(view_name)
+        if budget is None:
+            self.fail(f'No query budget declared for {view_name}')
+
+        stats = response.wsgi_request.query_stats
+        if stats.count > budget:
+            self.fail(
+                f'{view_name} ran {stats.count} queries, budget is {budget}'
+            )
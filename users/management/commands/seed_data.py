@@ -1,15 +1,27 @@
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from django.contrib.auth import get_user_model
 from categories.models import Category
 from products.models import Product
 from decimal import Decimal
+from users import synthetic
 
 User = get_user_model()
 
 class Command(BaseCommand):
     help = 'Seed the database with pharmacy sample data'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale', type=float,
+            help='Generate synthetic data instead; 1.0 is ~200k products, 20k customers and 1M orders',
+        )
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for --scale')
+        parser.add_argument('--batch-size', type=int, default=synthetic.BATCH_SIZE, help='Rows per bulk insert')
+
     def handle(self, *args, **options):
+        if options['scale'] is not None:
+            return self.seed_synthetic(options)
+        
         self.stdout.write('Seeding database with pharmacy data...')
         
         # Create pharmacy categories
@@ -153,3 +165,20 @@ class Command(BaseCommand):
             self.stdout.write('Created test user: testuser/test123')
         
         self.stdout.write(self.style.SUCCESS('Pharmacy database seeded successfully!'))
+    
+    def seed_synthetic(self, options):
+        if options['scale'] <= 0:
+            raise CommandError('--scale must be positive')
+        self.stdout.write(f"Generating synthetic data at scale {options['scale']} (seed {options['seed']})...")
+        try:
+            synthetic.generate(
+                scale=options['scale'],
+                seed=options['seed'],
+                batch_size=options['batch_size'],
+                log=self.stdout.write,
+            )
+        except ValueError as exc:
+            raise CommandError(exc)
+        self.stdout.write(self.style.SUCCESS(
+            f'Synthetic data generated. Customers log in as {synthetic.USERNAME_PREFIX}NNNNNN / {synthetic.PASSWORD}'
+        ))
\ No newline at end of file
@@ -0,0 +1,263 @@
+"""Production-sized synthetic data for capacity planning.
+
+``generate(scale)`` builds a deep category tree, products, customers and
+orders with order items, all with ``bulk_create`` in batches. At scale 1
+that is about 1k categories, 200k products, 20k customers and 1M orders
+with roughly 2M items. Product popularity follows a Zipf distribution, so
+a few products appear in most orders, as in a real shop. Everything is
+drawn from one ``random.Random(seed)``, so a seed always produces the same
+data.
+
+MPTT fields are computed while the tree is built instead of calling
+``rebuild()``. Bulk inserts skip model signals, so the search index,
+category tree and catalog cache versions and dashboard counters are
+refreshed at the end.
+"""
+import itertools
+import random
+import time
+from bisect import bisect
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+from django.utils.text import slugify
+
+from categories.models import Category
+from categories.tree import bump_version
+from dashboard.stats import recompute
+from orders.models import Order, OrderItem
+from products.cache import bump_catalog_version
+from products.models import Product
+from products.search import rebuild_index
+
+SKU_PREFIX = 'SYN-'
+USERNAME_PREFIX = 'synthetic'
+BATCH_SIZE = 5000
+# Children per node at each depth: 12 roots, 4 levels, ~1k categories
+BRANCHING = (12, 5, 4, 3)
+SIZES = {'products': 200_000, 'customers': 20_000, 'orders': 1_000_000}
+ZIPF_EXPONENT = 1.1
+HISTORY_DAYS = 730
+STATUS_WEIGHTS = {'delivered': 70, 'shipped': 10, 'processing': 5, 'pending': 10, 'cancelled': 5}
+GUEST_SHARE = 0.2
+PASSWORD = 'synthetic123'
+
+CATEGORY_WORDS = [
+    'Pain Relief', 'Allergy', 'Cold & Flu', 'Digestive Health', 'Skin Care', 'Eye Care',
+    'Oral Care', 'First Aid', 'Vitamins', 'Minerals', 'Sleep', 'Heart Health', 'Diabetes',
+    'Baby Care', 'Women\'s Health', 'Men\'s Health', 'Mobility', 'Respiratory', 'Hair Care',
+    'Nutrition', 'Homeopathy', 'Travel Health', 'Hygiene', 'Devices',
+]
+PRODUCT_WORDS = [
+    'Ibuprofen', 'Paracetamol', 'Aspirin', 'Cetirizine', 'Loratadine', 'Omeprazole', 'Zinc',
+    'Magnesium', 'Vitamin C', 'Vitamin D3', 'Iron', 'Calcium', 'Melatonin', 'Probiotic',
+    'Saline', 'Hydrocortisone', 'Chlorhexidine', 'Glucosamine', 'Omega-3', 'Biotin',
+    'Thermometer', 'Bandage', 'Lozenges', 'Nasal Spray', 'Eye Drops', 'Sunscreen',
+]
+PRODUCT_FORMS = ['Tablets', 'Capsules', 'Syrup', 'Gel', 'Cream', 'Spray', 'Drops', 'Sachets']
+STRENGTHS = ['50mg', '100mg', '200mg', '250mg', '400mg', '500mg', '1000mg', '']
+FIRST_NAMES = ['Amina', 'Brian', 'Chen', 'Diego', 'Esi', 'Fatima', 'Grace', 'Hiro', 'Ivan',
+               'Jomo', 'Kofi', 'Lena', 'Mary', 'Nia', 'Omar', 'Priya', 'Ravi', 'Sara', 'Tom', 'Wanjiru']
+LAST_NAMES = ['Otieno', 'Smith', 'Kamau', 'Garcia', 'Mensah', 'Ali', 'Wang', 'Ivanova',
+              'Patel', 'Njoroge', 'Brown', 'Okafor', 'Kim', 'Muller', 'Achieng', 'Silva']
+
+
+def _batches(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+@contextmanager
+def _explicit_timestamps(*models):
+    # bulk_create calls pre_save, which would stamp every row with now()
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def build_category_tree(rng, branching=BRANCHING):
+    """Return unsaved categories in tree order with MPTT fields filled in.
+
+    Siblings are laid out by name, as ``order_insertion_by`` would; new roots
+    get tree ids after any existing trees.
+    """
+    nodes = []
+    counter = itertools.count(1)
+
+    def names(count, level):
+        if level == 0 and count <= len(CATEGORY_WORDS):
+            return sorted(rng.sample(CATEGORY_WORDS, count))
+        return sorted(f'{rng.choice(CATEGORY_WORDS)} {next(counter)}' for _ in range(count))
+
+    def build(name, parent, level, tree_id, lft):
+        node = Category(name=name, slug=f'syn-{len(nodes) + 1}-{slugify(name)}', parent=parent,
+                        level=level, tree_id=tree_id, lft=lft)
+        nodes.append(node)
+        right = lft + 1
+        if level + 1 < len(branching):
+            for child in names(branching[level + 1], level + 1):
+                right = build(child, node, level + 1, tree_id, right) + 1
+        node.rght = right
+        return right
+
+    last_tree = Category.objects.order_by('-tree_id').values_list('tree_id', flat=True).first() or 0
+    for tree_id, name in enumerate(names(branching[0], 0), last_tree + 1):
+        build(name, None, 0, tree_id, 1)
+    return nodes
+
+
+def zipf_cumulative_weights(count, exponent=ZIPF_EXPONENT):
+    total, weights = 0.0, []
+    for rank in range(1, count + 1):
+        total += 1 / rank ** exponent
+        weights.append(total)
+    return weights
+
+
+def _insert_categories(nodes):
+    # Parents must have ids before their children are inserted
+    for level in sorted({node.level for node in nodes}):
+        Category.objects.bulk_create([node for node in nodes if node.level == level])
+    return [node for node in nodes if node.is_leaf_node()]
+
+
+def _products(rng, count, now):
+    for i in range(count):
+        name = ' '.join(filter(None, [
+            rng.choice(PRODUCT_WORDS), rng.choice(STRENGTHS), f'({rng.choice(PRODUCT_FORMS)})'
+        ]))
+        stock = rng.randint(0, 9) if rng.random() < 0.05 else rng.randint(10, 500)
+        created_at = now - timedelta(seconds=rng.randint(0, HISTORY_DAYS * 86400))
+        yield Product(
+            sku=f'{SKU_PREFIX}{i:07d}',
+            name=f'{name} #{i}',
+            description=f'{name}. Synthetic product for load testing.',
+            price=Decimal(rng.randint(99, 19999)) / 100,
+            stock_quantity=stock,
+            is_active=rng.random() > 0.03,
+            created_at=created_at,
+            updated_at=created_at,
+        )
+
+
+def _customers(rng, count, password):
+    for i in range(count):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        username = f'{USERNAME_PREFIX}{i:06d}'
+        yield get_user_model()(
+            username=username,
+            email=f'{username}@example.com',
+            display_name=f'{first} {last}',
+            first_name=first,
+            last_name=last,
+            password=password,
+            is_customer=True,
+        )
+
+
+def generate(scale=1.0, seed=0, batch_size=BATCH_SIZE, branching=BRANCHING, log=None):
+    """Insert synthetic data and return the number of rows created per table"""
+    log = log or (lambda message: None)
+    if Product.objects.filter(sku__startswith=SKU_PREFIX).exists():
+        raise ValueError('Synthetic data is already present; flush the database first')
+
+    rng = random.Random(seed)
+    now = timezone.now()
+    sizes = {name: max(1, int(size * scale)) for name, size in SIZES.items()}
+    counts = {}
+    started = time.monotonic()
+
+    def done(name, count):
+        counts[name] = count
+        log(f'{name}: {count} rows ({time.monotonic() - started:.1f}s)')
+
+    with transaction.atomic():
+        nodes = build_category_tree(rng, branching)
+        leaves = _insert_categories(nodes)
+    done('categories', len(nodes))
+
+    # (product id, price) in insertion order, then shuffled into popularity rank
+    catalog = []
+    links = Product.categories.through
+    with _explicit_timestamps(Product), transaction.atomic():
+        for batch in _batches(_products(rng, sizes['products'], now), batch_size):
+            Product.objects.bulk_create(batch)
+            catalog.extend((product.id, product.price) for product in batch)
+            links.objects.bulk_create([
+                links(product_id=product.id, category_id=category.id)
+                for product in batch
+                for category in rng.sample(leaves, rng.choice((1, 1, 1, 2)))
+            ])
+    done('products', len(catalog))
+
+    password = make_password(PASSWORD)
+    customer_ids = []
+    with transaction.atomic():
+        for batch in _batches(_customers(rng, sizes['customers'], password), batch_size):
+            get_user_model().objects.bulk_create(batch)
+            customer_ids.extend(user.id for user in batch)
+    done('customers', len(customer_ids))
+
+    rng.shuffle(catalog)
+    popularity = zipf_cumulative_weights(len(catalog))
+    statuses, status_weights = zip(*STATUS_WEIGHTS.items())
+    order_count = item_count = 0
+    with _explicit_timestamps(Order), transaction.atomic():
+        for batch_start in range(0, sizes['orders'], batch_size):
+            orders, lines = [], []
+            for _ in range(min(batch_size, sizes['orders'] - batch_start)):
+                picks = {}
+                # Geometric number of lines, 1 to 8
+                for _ in range(min(8, 1 + int(rng.expovariate(0.7)))):
+                    rank = min(bisect(popularity, rng.random() * popularity[-1]), len(catalog) - 1)
+                    product_id, price = catalog[rank]
+                    picks[product_id] = (price, rng.choice((1, 1, 1, 2, 3)))
+                created_at = now - timedelta(seconds=rng.randint(0, HISTORY_DAYS * 86400))
+                guest = rng.random() < GUEST_SHARE
+                order = Order(
+                    user_id=None if guest else rng.choice(customer_ids),
+                    guest_name=f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}' if guest else None,
+                    guest_email=f'guest{batch_start + len(orders)}@example.com' if guest else None,
+                    status=rng.choices(statuses, status_weights)[0],
+                    total_amount=sum(price * quantity for price, quantity in picks.values()),
+                    created_at=created_at,
+                    updated_at=created_at,
+                )
+                orders.append(order)
+                lines.append(picks)
+            Order.objects.bulk_create(orders)
+            items = [
+                OrderItem(order_id=order.id, product_id=product_id, quantity=quantity, price=price)
+                for order, picks in zip(orders, lines)
+                for product_id, (price, quantity) in picks.items()
+            ]
+            OrderItem.objects.bulk_create(items, batch_size=batch_size)
+            order_count += len(orders)
+            item_count += len(items)
+    done('orders', order_count)
+    done('order items', item_count)
+
+    rebuild_index()
+    bump_version()
+    bump_catalog_version()
+    recompute()
+    log(f'search index and dashboard stats rebuilt ({time.monotonic() - started:.1f}s)')
+    return counts
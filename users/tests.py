@@ -1,5 +1,14 @@
 from django.test import TestCase
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db.models import Count
+from io import StringIO
+from categories.models import Category
+from dashboard.stats import get_stats
+from orders.models import Order, OrderItem
+from products.models import Product
+from products.search import search_products
+from . import synthetic
 from .forms import CustomUserCreationForm
 
 User = get_user_model()
@@ -154,3 +163,58 @@ class CustomUserCreationFormTest(TestCase):
             form.fields['display_name'].help_text,
             'Optional: How you want to be displayed'
         )
+
+
+class SyntheticDataTest(TestCase):
+    def generate(self, seed=0):
+        return synthetic.generate(scale=0.0002, seed=seed, batch_size=50, branching=(2, 3, 2))
+
+    def test_generates_consistent_data(self):
+        counts = self.generate()
+        self.assertEqual(counts, {
+            'categories': 2 + 6 + 12,
+            'products': 40,
+            'customers': 4,
+            'orders': 200,
+            'order items': OrderItem.objects.count(),
+        })
+        self.assertEqual(User.objects.filter(is_customer=True).count(), 4)
+        self.assertEqual(get_stats().total_orders, 200)
+        self.assertEqual(len(search_products(Product.objects.all(), 'synthetic')), 40)
+        # Every order total matches its lines
+        for order in Order.objects.prefetch_related('items')[:20]:
+            self.assertEqual(order.total_amount, sum(item.subtotal for item in order.items.all()))
+
+    def test_mptt_fields_match_a_rebuild(self):
+        self.generate()
+        generated = list(Category.objects.order_by('id').values_list('id', 'lft', 'rght', 'level', 'tree_id'))
+        Category.objects.rebuild()
+        rebuilt = list(Category.objects.order_by('id').values_list('id', 'lft', 'rght', 'level', 'tree_id'))
+        self.assertEqual(generated, rebuilt)
+
+    def test_popularity_is_skewed(self):
+        self.generate()
+        sales = sorted(
+            Product.objects.annotate(lines=Count('orderitem')).values_list('lines', flat=True),
+            reverse=True
+        )
+        self.assertGreater(sales[0], 5 * sales[len(sales) // 2])
+
+    def test_same_seed_same_data(self):
+        self.generate(seed=7)
+        first = list(Product.objects.order_by('sku').values_list('sku', 'name', 'price', 'stock_quantity'))
+        with self.assertRaises(ValueError):
+            self.generate(seed=7)
+        Order.objects.all().delete()
+        Product.objects.all().delete()
+        Category.objects.all().delete()
+        User.objects.all().delete()
+        self.generate(seed=7)
+        second = list(Product.objects.order_by('sku').values_list('sku', 'name', 'price', 'stock_quantity'))
+        self.assertEqual(first, second)
+
+    def test_seed_data_scale_option(self):
+        out = StringIO()
+        call_command('seed_data', '--scale', '0.0001', '--batch-size', '100', stdout=out)
+        self.assertIn('orders: 100 rows', out.getvalue())
+        self.assertEqual(Order.objects.count(), 100)